@@ -10,7 +10,13 @@ from misago.acl.builder import build_acl
 from misago.acl.providers import providers
 
 
-__ALL__ = ['get_user_acl', 'add_acl', 'serialize_acl']
+__ALL__ = [
+    'get_user_acl',
+    'get_acl_memo',
+    'set_acl_memo',
+    'add_acl',
+    'serialize_acl',
+]
 
 
 """
@@ -47,6 +53,35 @@ def get_user_acl(user):
         return new_acl
 
 
+def get_acl_memo(user, name):
+    """
+    Get value derived from User's ACL, or None if it wasn't memoized yet
+    """
+    memo = user.acl.setdefault('_memo', {})
+    if name not in memo:
+        memo[name] = cache.get(get_acl_memo_key(user, name))
+    return memo[name]
+
+
+def set_acl_memo(user, name, value):
+    """
+    Memoize value derived from User's ACL
+
+    Every value is stored in cache under its own key made from ACL key and
+    version, so other requests reuse it for as long as ACL version stays
+    valid, without growing ACL itself
+    """
+    user.acl.setdefault('_memo', {})[name] = value
+    cache.set(get_acl_memo_key(user, name), value)
+
+
+def get_acl_memo_key(user, name):
+    memo_key = user.acl.get('_memo_key')
+    if not memo_key:
+        memo_key = '%s_%s' % (user.acl_key, user.acl.get('_acl_version'))
+    return 'acl_memo_%s_%s' % (memo_key, name)
+
+
 def add_acl(user, target):
     """
     Add valid ACL to target (iterable of objects or single object)
@@ -79,6 +114,8 @@ def serialize_acl(target):
     for json serialization
     """
     serialized_acl = copy.deepcopy(target.acl)
+    serialized_acl.pop('_memo', None)
+    serialized_acl.pop('_memo_key', None)
 
     for serializer in providers.get_type_serializers(target):
         serializer(serialized_acl)
@@ -1,8 +1,11 @@
 from django.test import TestCase
 
+from misago.core import threadstore
+from misago.core.cache import cache
 from misago.users.models import User, AnonymousUser
 
-from misago.acl.api import get_user_acl
+from misago.acl.api import (
+    get_acl_memo, get_user_acl, serialize_acl, set_acl_memo)
 
 
 class GetUserACLTests(TestCase):
@@ -20,3 +23,36 @@ class GetUserACLTests(TestCase):
 
         self.assertTrue(acl)
         self.assertEqual(acl, AnonymousUser().acl)
+
+
+class ACLMemoTests(TestCase):
+    def tearDown(self):
+        cache.clear()
+        threadstore.clear()
+
+    def test_memo_is_reused(self):
+        """memoized value is reused by next requests"""
+        test_user = User.objects.create_user('Bob', 'bob@bob.com', 'pass123')
+        self.assertIsNone(get_acl_memo(test_user, 'test'))
+
+        set_acl_memo(test_user, 'test', [1, 2, 3])
+        self.assertEqual(get_acl_memo(test_user, 'test'), [1, 2, 3])
+
+        threadstore.clear()
+        test_user = User.objects.get(pk=test_user.pk)
+        self.assertEqual(get_acl_memo(test_user, 'test'), [1, 2, 3])
+
+    def test_memo_is_not_stored_in_acl(self):
+        """memoized values are kept apart from cached ACL"""
+        test_user = User.objects.create_user('Bob', 'bob@bob.com', 'pass123')
+        set_acl_memo(test_user, 'test', [1, 2, 3])
+
+        cached_acl = cache.get('acl_%s' % test_user.acl_key)
+        self.assertNotIn('_memo', cached_acl)
+
+    def test_memo_is_not_serialized(self):
+        """memoized values are excluded from serialized ACL"""
+        test_user = User.objects.create_user('Bob', 'bob@bob.com', 'pass123')
+        set_acl_memo(test_user, 'test', [1, 2, 3])
+
+        self.assertNotIn('_memo', serialize_acl(test_user))
@@ -1,4 +1,5 @@
 from hashlib import md5
+from uuid import uuid4
 
 from misago.core import threadstore
 
@@ -26,6 +27,10 @@ def override_acl(user, new_acl):
     """overrides user permissions with specified ones"""
     final_cache = user.acl
     final_cache.update(new_acl)
+    final_cache.pop('_memo', None)
+
+    # memos of overridden acl are kept apart from ones of original acl
+    final_cache['_memo_key'] = uuid4().hex
 
     if user.is_authenticated():
         user._acl_cache = final_cache
@@ -0,0 +1,223 @@
+"""
+In-process catalogue of categories tree
+
+Shared cache holds categories as compact tuples of their fields values, that
+are loaded into catalogue once per process and kept in memory for as long as
+version stored in shared cache stays same. Categories manager's clear_cache
+deletes this version, making all processes rebuild their catalogues on next
+request.
+
+Catalogue keeps categories as immutable records, and creates model instances
+from them only when those are first needed. It hands out copies of those
+instances, so views are free to set attributes on them without leaking those
+to other requests.
+
+Threads and posts counters and last thread change with every new post, so
+they are kept out of catalogue. Copies handed out have them set from
+separate stats cache entry, that is cleared without rebuilding catalogue.
+"""
+import copy
+import time
+from collections import namedtuple
+
+from django.db import DEFAULT_DB_ALIAS
+
+from misago.core import threadstore
+from misago.core.cache import cache
+
+from misago.categories.models import Category
+
+
+CATEGORY_FIELDS = tuple(f.attname for f in Category._meta.concrete_fields)
+CategoryRecord = namedtuple('CategoryRecord', CATEGORY_FIELDS)
+
+STATS_FIELDS = (
+    'threads',
+    'posts',
+    'last_post_on',
+    'last_thread_id',
+    'last_thread_title',
+    'last_thread_slug',
+    'last_poster_id',
+    'last_poster_name',
+    'last_poster_slug',
+)
+CATALOGUE_FIELDS = tuple(f for f in CATEGORY_FIELDS if f not in STATS_FIELDS)
+
+VERSION_CACHE_KEY = 'misago_categories_tree_version'
+STATS_CACHE_KEY = 'misago_categories_stats'
+
+_catalogue = None
+
+
+class CategoriesCatalogue(object):
+    def __init__(self, version, records):
+        self.version = version
+
+        self.records = records
+        self.records_dict = {}
+        self.instances = {}
+
+        self.ancestors = {}
+        self.descendants = {}
+        self.paths = {}
+
+        ancestors_stack = []
+        for record in records:
+            while ancestors_stack and ancestors_stack[-1].rght < record.lft:
+                ancestors_stack.pop()
+
+            ancestors_ids = [r.id for r in ancestors_stack]
+            for ancestor_id in ancestors_ids:
+                self.descendants[ancestor_id].append(record.id)
+
+            self.records_dict[record.id] = record
+            self.ancestors[record.id] = ancestors_ids
+            self.descendants[record.id] = []
+
+            ancestors_stack.append(record)
+
+    def get_instance(self, category_id):
+        if category_id not in self.instances:
+            self.instances[category_id] = Category.from_db(
+                DEFAULT_DB_ALIAS, CATEGORY_FIELDS,
+                self.records_dict[category_id])
+        return self.instances[category_id]
+
+    def get_record(self, category_id):
+        return self.records_dict.get(category_id)
+
+    def get_root(self):
+        """
+        Returns shared instance of tree root, without current stats
+        """
+        return self.get_instance(self.records[0].id)
+
+    def get_categories(self, ids=None):
+        """
+        Returns list of copies of categories (with specified ids), with parents
+        set to other copies from this list
+        """
+        stats = get_stats()
+
+        categories_dict = {}
+        categories_list = []
+
+        for record in self.records:
+            if ids is None or record.id in ids:
+                category = copy_category(self.get_instance(record.id), stats)
+                categories_dict[category.pk] = category
+                categories_list.append(category)
+
+        for category in categories_list:
+            if category.parent_id in categories_dict:
+                category.parent = categories_dict[category.parent_id]
+
+        return categories_list
+
+    def get_path(self, category_id):
+        """
+        Returns list of copies of category's ancestors below tree root,
+        each linked to its parent copy
+        """
+        if category_id not in self.paths:
+            self.paths[category_id] = [
+                ancestor_id
+                for ancestor_id in self.ancestors.get(category_id, [])
+                if self.records_dict[ancestor_id].level > 0
+            ]
+
+        stats = get_stats()
+
+        path = []
+        for ancestor_id in self.paths[category_id]:
+            category = copy_category(self.get_instance(ancestor_id), stats)
+            if path:
+                category.parent = path[-1]
+            path.append(category)
+        return path
+
+    def get_ancestors_ids(self, category_id):
+        return self.ancestors.get(category_id, [])
+
+    def get_descendants_ids(self, category_id):
+        return self.descendants.get(category_id, [])
+
+    def get_top_category_id(self, root_id, category_id):
+        """
+        Returns id of root's child that is category or its ancestor,
+        or None if category is not in root's subtree
+        """
+        if category_id not in self.ancestors or root_id not in self.ancestors:
+            return None
+
+        path = self.ancestors[category_id] + [category_id]
+        depth = len(self.ancestors[root_id])
+
+        if len(path) > depth + 1 and path[depth] == root_id:
+            return path[depth + 1]
+        return None
+
+
+def copy_category(category, stats):
+    category_copy = copy.copy(category)
+    category_copy._state = copy.copy(category._state)
+
+    if category.pk in stats:
+        stats_values = dict(zip(STATS_FIELDS, stats[category.pk]))
+        category_copy.__dict__.update(stats_values)
+        category_copy._loaded_values = dict(
+            category._loaded_values, **stats_values)
+    return category_copy
+
+
+def get_catalogue():
+    global _catalogue
+
+    version = get_version()
+    if not _catalogue or _catalogue.version != version:
+        _catalogue = build_catalogue(version)
+    return _catalogue
+
+
+def get_version():
+    version = threadstore.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = cache.get(VERSION_CACHE_KEY)
+        if version is None:
+            version = int(time.time() * 1000)
+            cache.set(VERSION_CACHE_KEY, version, None)
+        threadstore.set(VERSION_CACHE_KEY, version)
+    return version
+
+
+def build_catalogue(version):
+    values = Category.objects.get_cached_categories_values()
+    return CategoriesCatalogue(version, [CategoryRecord(*v) for v in values])
+
+
+def clear_catalogue():
+    cache.delete(VERSION_CACHE_KEY)
+    threadstore.set(VERSION_CACHE_KEY, None)
+
+
+def get_stats():
+    """
+    Returns dict of category_id: tuple of STATS_FIELDS values
+    """
+    stats = threadstore.get(STATS_CACHE_KEY)
+    if stats is None:
+        stats = cache.get(STATS_CACHE_KEY)
+        if stats is None:
+            queryset = Category.objects.all_categories(include_root=True)
+            stats = dict(
+                (values[0], values[1:])
+                for values in queryset.values_list('id', *STATS_FIELDS))
+            cache.set(STATS_CACHE_KEY, stats)
+        threadstore.set(STATS_CACHE_KEY, stats)
+    return stats
+
+
+def clear_stats():
+    cache.delete(STATS_CACHE_KEY)
+    threadstore.set(STATS_CACHE_KEY, None)
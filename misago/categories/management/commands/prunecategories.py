@@ -1,9 +1,17 @@
 from datetime import timedelta
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
+from misago.readtracker.models import ThreadRead
+from misago.threads.counts import invalidate_threads_counts
+from misago.threads.deletion import ContentDeletion
+from misago.threads.models import Event, Post, Thread
+
 from misago.categories.models import Category
+from misago.categories.synchronization import synchronize_categories
 
 
 class Command(BaseCommand):
@@ -13,46 +21,111 @@ class Command(BaseCommand):
     """
     help = 'Prunes categories'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            dest='dry_run',
+            default=False,
+            help='Report number of threads to prune without pruning them.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=500,
+            help='Number of threads pruned in single query.',
+        )
+
     def handle(self, *args, **options):
+        dry_run = options.get('dry_run')
+        chunk_size = options.get('chunk_size') or 500
+
         now = timezone.now()
-        synchronize_categories = []
+        categories_to_sync = set()
+        deletion = ContentDeletion(chunk_size)
 
         for category in Category.objects.iterator():
-            archive = category.archive_pruned_in
-            pruned_threads = 0
-
-            threads_qs = category.thread_set.filter(weight=0)
-
-            if category.prune_started_after:
-                cutoff = now - timedelta(days=category.prune_started_after)
-                prune_qs = threads_qs.filter(started_on__lte=cutoff)
-                for thread in prune_qs.iterator():
-                    if archive:
-                        thread.move(archive)
-                        thread.save()
-                    else:
-                        thread.delete()
-                    pruned_threads += 1
-
-            if category.prune_replied_after:
-                cutoff = now - timedelta(days=category.prune_replied_after)
-                prune_qs = threads_qs.filter(last_post_on__lte=cutoff)
-                for thread in prune_qs.iterator():
-                    if archive:
-                        thread.move(archive)
-                        thread.save()
-                    else:
-                        thread.delete()
-                    pruned_threads += 1
+            prune_qs = self.get_prune_queryset(category, now)
+            if prune_qs is None:
+                continue
+
+            archive_id = category.archive_pruned_in_id
+            if dry_run:
+                self.report_category(category, prune_qs.count(), archive_id)
+                continue
+
+            if archive_id:
+                pruned_threads = self.move_threads(
+                    prune_qs, archive_id, chunk_size)
+            else:
+                pruned_threads = deletion.delete_threads(prune_qs)
 
             if pruned_threads:
-                if category not in synchronize_categories:
-                    synchronize_categories.append(category)
-                if archive and archive not in synchronize_categories:
-                    synchronize_categories.append(archive)
+                categories_to_sync.add(category.pk)
+                if archive_id:
+                    categories_to_sync.add(archive_id)
+
+        if categories_to_sync:
+            invalidate_threads_counts(categories_to_sync)
+            synchronize_categories(categories_to_sync)
+
+        if dry_run:
+            self.stdout.write('\n\nNo categories were pruned')
+        else:
+            self.stdout.write('\n\nCategories were pruned')
+
+    def get_prune_queryset(self, category, now):
+        prune_filters = []
+
+        if category.prune_started_after:
+            cutoff = now - timedelta(days=category.prune_started_after)
+            prune_filters.append(Q(started_on__lte=cutoff))
+
+        if category.prune_replied_after:
+            cutoff = now - timedelta(days=category.prune_replied_after)
+            prune_filters.append(Q(last_post_on__lte=cutoff))
+
+        # moving threads to same category would never complete
+        if not prune_filters or category.archive_pruned_in_id == category.pk:
+            return None
+
+        prune_filter = prune_filters[0]
+        for other_filter in prune_filters[1:]:
+            prune_filter |= other_filter
+
+        return category.thread_set.filter(prune_filter, weight=0)
+
+    def move_threads(self, queryset, archive_id, chunk_size):
+        queryset = queryset.order_by('id').values_list('id', flat=True)
+
+        moved_threads = 0
+        while True:
+            threads_ids = list(queryset[:chunk_size])
+            if not threads_ids:
+                break
+
+            with transaction.atomic():
+                Thread.objects.filter(id__in=threads_ids).update(
+                    category_id=archive_id)
+                Post.objects.filter(thread_id__in=threads_ids).update(
+                    category_id=archive_id)
+                Event.objects.filter(thread_id__in=threads_ids).update(
+                    category_id=archive_id)
+
+                # queryset update skips move_thread signal, that would
+                # delete read trackers of moved threads
+                ThreadRead.objects.filter(thread_id__in=threads_ids).delete()
+
+            moved_threads += len(threads_ids)
+        return moved_threads
 
-        for category in synchronize_categories:
-            category.synchronize()
-            category.save()
+    def report_category(self, category, threads, archive_id):
+        if not threads:
+            return
 
-        self.stdout.write('\n\nCategories were pruned')
+        if archive_id:
+            message = '%s: %s threads would be moved to archive'
+        else:
+            message = '%s: %s threads would be deleted'
+        self.stdout.write(message % (category.name, threads))
@@ -1,13 +1,29 @@
 from django.core.management.base import BaseCommand
 from misago.core.management.progressbar import show_progress
 from misago.categories.models import Category
+from misago.categories.synchronization import synchronize_categories
 
 
 class Command(BaseCommand):
+    """
+    Moderation keeps categories counters up to date with incremental
+    updates, this command repairs them in case those drifted off
+    """
     help = 'Synchronizes categories'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=100,
+            help='Number of categories synchronized in single query.',
+        )
+
     def handle(self, *args, **options):
-        categories_to_sync = Category.objects.count()
+        chunk_size = options.get('chunk_size') or 100
+        categories_ids = list(Category.objects.values_list('id', flat=True))
+        categories_to_sync = len(categories_ids)
 
         message = 'Synchronizing %s categories...\n'
         self.stdout.write(message % categories_to_sync)
@@ -16,11 +32,9 @@ class Command(BaseCommand):
 
         synchronized_count = 0
         show_progress(self, synchronized_count, categories_to_sync)
-        for category in Category.objects.iterator():
-            category.synchronize()
-            category.save()
-
-            synchronized_count += 1
+        for i in range(0, categories_to_sync, chunk_size):
+            synchronized_count += synchronize_categories(
+                categories_ids[i:i + chunk_size], chunk_size)
             show_progress(self, synchronized_count, categories_to_sync)
 
         self.stdout.write(message % synchronized_count)
@@ -9,12 +9,16 @@ from mptt.models import MPTTModel, TreeForeignKey
 from misago.acl import version as acl_version
 from misago.acl.models import BaseRole
 from misago.conf import settings
-from misago.core.cache import cache
+from misago.core.cache import cache, invalidate_on_commit
+from misago.core.models import ChangesTrackingMixin
 from misago.core.utils import slugify
 from misago.threads import threadtypes
 
 
-CACHE_NAME = 'misago_categories_tree'
+# bump when format of values stored in cache changes, so values cached
+# in old format are not read after upgrade
+CACHE_FORMAT_VERSION = 2
+CACHE_NAME = 'misago_categories_tree_v%s' % CACHE_FORMAT_VERSION
 CATEGORIES_TREE_ID = 1
 
 
@@ -28,11 +32,13 @@ class CategoryManager(TreeManager):
     def get_special(self, special_role):
         cache_name = '%s_%s' % (CACHE_NAME, special_role)
 
-        special_category = cache.get(cache_name, 'nada')
-        if special_category == 'nada':
-            special_category = self.get(special_role=special_role)
-            cache.set(cache_name, special_category)
-        return special_category
+        special_values = cache.get(cache_name, 'nada')
+        if special_values == 'nada':
+            special_values = self.values_list(
+                *self.get_values_fields()).get(special_role=special_role)
+            cache.set(cache_name, special_values)
+        return self.model.from_db(
+            self.db, self.get_values_fields(), special_values)
 
     def all_categories(self, include_root=False):
         qs = self.filter(tree_id=CATEGORIES_TREE_ID)
@@ -41,23 +47,64 @@ class CategoryManager(TreeManager):
         return qs.order_by('lft')
 
     def get_cached_categories_dict(self):
-        categories_dict = cache.get(CACHE_NAME, 'nada')
-        if categories_dict == 'nada':
-            categories_dict = self.get_categories_dict_from_db()
-            cache.set(CACHE_NAME, categories_dict)
+        categories_dict = {}
+        for category in self.get_catalogue().get_categories():
+            categories_dict[category.pk] = category
         return categories_dict
 
+    def get_cached_categories_values(self):
+        """
+        Returns list of tuples with fields values of all categories in tree,
+        that are smaller and faster to unpickle than model instances
+        """
+        categories_values = cache.get(CACHE_NAME, 'nada')
+        if categories_values == 'nada':
+            categories_values = self.get_values_from_db(
+                self.all_categories(include_root=True))
+            cache.set(CACHE_NAME, categories_values)
+        return categories_values
+
     def get_categories_dict_from_db(self):
         categories_dict = {}
         for category in self.all_categories(include_root=True):
             categories_dict[category.pk] = category
         return categories_dict
 
+    def get_values_fields(self):
+        return tuple(f.attname for f in self.model._meta.concrete_fields)
+
+    def get_values_from_db(self, queryset):
+        return [tuple(v) for v in queryset.values_list(
+            *self.get_values_fields())]
+
+    def get_catalogue(self):
+        from misago.categories.catalogue import get_catalogue
+        return get_catalogue()
+
     def clear_cache(self):
-        cache.delete(CACHE_NAME)
+        invalidate_on_commit(self.delete_cached_values)
+
+    def delete_cached_values(self):
+        from misago.categories.catalogue import clear_catalogue, clear_stats
+
+        cache.delete_many([
+            CACHE_NAME,
+            '%s_private_threads' % CACHE_NAME,
+            '%s_root_category' % CACHE_NAME,
+        ])
+        clear_catalogue()
+        clear_stats()
+
+    def clear_stats_cache(self):
+        """
+        Clears categories counters and last threads without rebuilding
+        catalogue
+        """
+        from misago.categories.catalogue import clear_stats
+        invalidate_on_commit(clear_stats)
 
 
-class Category(MPTTModel):
+class Category(ChangesTrackingMixin, MPTTModel):
     parent = TreeForeignKey(
         'self',
         null=True,
@@ -1,5 +1,6 @@
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver, Signal
-from misago.core import serializer
+from misago.core import fpc, serializer
 from misago.categories.models import Category, CategoryRole
 
 
@@ -7,9 +8,82 @@ delete_category_content = Signal()
 move_category_content = Signal(providing_args=["new_category"])
 
 
+# fields displayed on categories lists cached for guests
+FPC_CATEGORY_FIELDS = (
+    'parent_id',
+    'lft',
+    'rght',
+    'level',
+    'name',
+    'slug',
+    'description',
+    'css_class',
+    'is_closed',
+    'threads',
+    'posts',
+    'last_post_on',
+    'last_thread_id',
+    'last_thread_title',
+    'last_thread_slug',
+    'last_poster_id',
+    'last_poster_name',
+    'last_poster_slug',
+)
+
+
 """
 Signal handlers
 """
+@receiver(post_save, sender=Category)
+def invalidate_saved_category_fpc(sender, **kwargs):
+    category = kwargs['instance']
+    if kwargs['created'] or category.has_changed(
+            FPC_CATEGORY_FIELDS, kwargs['update_fields']):
+        fpc.invalidate()
+
+
+@receiver(post_delete, sender=Category)
+def invalidate_deleted_category_fpc(sender, **kwargs):
+    fpc.invalidate()
+
+
+@receiver(post_save, sender=Category)
+def invalidate_saved_category_tree(sender, **kwargs):
+    from misago.categories.utils import invalidate_categories_tree
+
+    category = kwargs['instance']
+    if kwargs['created'] or category.has_changed(
+            Category.objects.get_values_fields(), kwargs['update_fields']):
+        invalidate_categories_tree()
+
+
+@receiver(post_delete, sender=Category)
+def invalidate_deleted_category_tree(sender, **kwargs):
+    from misago.categories.utils import invalidate_categories_tree
+    invalidate_categories_tree()
+
+
+@receiver(post_save, sender=Category)
+def invalidate_saved_category_catalogue(sender, **kwargs):
+    """
+    Catalogue is rebuilt only when tree or category's settings change,
+    counters and last thread are kept in separate stats cache
+    """
+    from misago.categories.catalogue import CATALOGUE_FIELDS, STATS_FIELDS
+
+    category = kwargs['instance']
+    if kwargs['created'] or category.has_changed(
+            CATALOGUE_FIELDS, kwargs['update_fields']):
+        Category.objects.clear_cache()
+    elif category.has_changed(STATS_FIELDS, kwargs['update_fields']):
+        Category.objects.clear_stats_cache()
+
+
+@receiver(post_delete, sender=Category)
+def invalidate_deleted_category_catalogue(sender, **kwargs):
+    Category.objects.clear_cache()
+
+
 from misago.core.signals import secret_key_changed
 @receiver(secret_key_changed)
 def update_roles_pickles(sender, **kwargs):
@@ -27,3 +101,7 @@ def update_usernames(sender, **kwargs):
         last_poster_name=sender.username,
         last_poster_slug=sender.slug
     )
+
+    from misago.categories.utils import invalidate_categories_tree
+    invalidate_categories_tree()
+    Category.objects.clear_stats_cache()
@@ -0,0 +1,191 @@
+"""
+Set-based categories synchronization
+
+Synchronizing category one by one costs three queries and save for each of
+them. synchronize_categories recomputes threads, posts and last threads of
+many categories with few grouped queries and single UPDATE per chunk.
+
+Moderation changes categories counters with F() expressions instead of
+resyncing them, falling back to synchronization only when last thread has
+to be found again. Full synchronization is kept as repair job, run by
+synchronizecategories command.
+"""
+from django.db.models import Case, Count, F, Max, Q, Sum, Value, When
+
+from misago.core import fpc
+
+from misago.categories.models import Category
+from misago.threads.models import Thread
+
+
+LAST_THREAD_FIELDS = (
+    'last_post_on',
+    'last_thread_id',
+    'last_thread_title',
+    'last_thread_slug',
+    'last_poster_id',
+    'last_poster_name',
+    'last_poster_slug',
+)
+
+SYNCHRONIZED_FIELDS = ('threads', 'posts') + LAST_THREAD_FIELDS
+
+
+def synchronize_categories(categories_ids=None, chunk_size=100):
+    """
+    Synchronizes all categories or categories with specified ids, returns
+    number of synchronized categories
+    """
+    if categories_ids is None:
+        categories_ids = Category.objects.values_list('id', flat=True)
+    categories_ids = sorted(set(categories_ids))
+
+    for i in range(0, len(categories_ids), chunk_size):
+        synchronize_categories_chunk(categories_ids[i:i + chunk_size])
+
+    if categories_ids:
+        invalidate_categories_caches()
+    return len(categories_ids)
+
+
+def synchronize_categories_chunk(categories_ids):
+    values = get_categories_values(categories_ids)
+
+    updates = {}
+    for field in SYNCHRONIZED_FIELDS:
+        updates[field] = Case(
+            *[When(pk=category_id, then=Value(values[category_id][field]))
+              for category_id in categories_ids],
+            output_field=Category._meta.get_field(field)
+        )
+
+    Category.objects.filter(pk__in=categories_ids).update(**updates)
+
+
+def get_categories_values(categories_ids):
+    queryset = Thread.objects.filter(category_id__in=categories_ids)
+    approved_queryset = queryset.filter(is_unapproved=False)
+
+    threads = dict(approved_queryset.order_by().values_list(
+        'category_id').annotate(Count('id')))
+    replies = dict(queryset.order_by().values_list(
+        'category_id').annotate(Sum('replies')))
+    last_posts = dict(approved_queryset.order_by().values_list(
+        'category_id').annotate(Max('last_post_on')))
+
+    last_threads = {}
+    if last_posts:
+        last_threads_queryset = approved_queryset.filter(
+            last_post_on__in=set(last_posts.values())).order_by('-id')
+        for thread in last_threads_queryset.values(
+                'id', 'category_id', 'title', 'slug', 'last_post_on',
+                'last_poster_id', 'last_poster_name', 'last_poster_slug'):
+            category_id = thread['category_id']
+            if category_id in last_threads:
+                continue
+            if thread['last_post_on'] == last_posts.get(category_id):
+                last_threads[category_id] = thread
+
+    values = {}
+    for category_id in categories_ids:
+        category_values = dict((f, None) for f in LAST_THREAD_FIELDS)
+        category_values['threads'] = threads.get(category_id, 0)
+
+        if category_values['threads']:
+            category_values['posts'] = (
+                category_values['threads'] + replies.get(category_id, 0))
+        else:
+            category_values['posts'] = 0
+
+        if category_id in last_threads:
+            category_values.update(get_last_thread_values(
+                last_threads[category_id]))
+
+        values[category_id] = category_values
+    return values
+
+
+def get_last_thread_values(thread):
+    return {
+        'last_post_on': thread['last_post_on'],
+        'last_thread_id': thread['id'],
+        'last_thread_title': thread['title'],
+        'last_thread_slug': thread['slug'],
+        'last_poster_id': thread['last_poster_id'],
+        'last_poster_name': thread['last_poster_name'],
+        'last_poster_slug': thread['last_poster_slug'],
+    }
+
+
+def add_thread_to_category(category_id, thread):
+    """
+    Counts thread in category's counters and makes it category's last thread
+    if it has newer last post
+    """
+    if thread.is_unapproved:
+        Category.objects.filter(pk=category_id).update(
+            posts=F('posts') + thread.replies)
+    else:
+        Category.objects.filter(pk=category_id).update(
+            threads=F('threads') + 1,
+            posts=F('posts') + thread.replies + 1,
+        )
+
+        last_thread_values = get_last_thread_values({
+            'id': thread.pk,
+            'title': thread.title,
+            'slug': thread.slug,
+            'last_post_on': thread.last_post_on,
+            'last_poster_id': thread.last_poster_id,
+            'last_poster_name': thread.last_poster_name,
+            'last_poster_slug': thread.last_poster_slug,
+        })
+
+        Category.objects.filter(
+            Q(last_post_on__isnull=True) |
+            Q(last_post_on__lt=thread.last_post_on),
+            pk=category_id
+        ).update(**last_thread_values)
+
+    invalidate_categories_caches()
+
+
+def remove_thread_from_category(category_id, thread):
+    """
+    Removes thread from category's counters, and synchronizes category
+    if thread was its last thread
+    """
+    if thread.is_unapproved:
+        Category.objects.filter(pk=category_id).update(
+            posts=F('posts') - thread.replies)
+    else:
+        Category.objects.filter(pk=category_id).update(
+            threads=F('threads') - 1,
+            posts=F('posts') - thread.replies - 1,
+        )
+
+    # deleting last thread sets category's last_thread to null
+    # and clears thread's pk
+    last_thread_filter = Q(last_thread_id__isnull=True,
+                           last_post_on__isnull=False)
+    if thread.pk:
+        last_thread_filter |= Q(last_thread_id=thread.pk)
+
+    category_last_thread = Category.objects.filter(
+        last_thread_filter, pk=category_id)
+    if category_last_thread.exists():
+        synchronize_categories([category_id])
+    else:
+        invalidate_categories_caches()
+
+
+def invalidate_categories_caches():
+    """
+    Queryset updates skip signals, so caches invalidated when category is
+    saved have to be invalidated explicitly
+    """
+    from misago.categories.utils import invalidate_categories_tree
+
+    Category.objects.clear_stats_cache()
+    invalidate_categories_tree()
+    fpc.invalidate()
@@ -0,0 +1,175 @@
+from misago.core.cache import cache
+from misago.core.testutils import MisagoTestCase
+
+from misago.categories.catalogue import (
+    STATS_FIELDS, get_catalogue, get_stats)
+from misago.categories.models import CACHE_NAME, Category
+
+
+class CategoriesCatalogueTests(MisagoTestCase):
+    def setUp(self):
+        super(CategoriesCatalogueTests, self).setUp()
+
+        self.root = Category.objects.root_category()
+        self.first_category = Category.objects.get(slug='first-category')
+
+        """
+        Create categories tree for test cases:
+
+        First category (created by migration)
+
+        Category A
+          + Category B
+            + Subcategory C
+        """
+        Category(
+            name='Category A',
+            slug='category-a',
+        ).insert_at(self.root, position='last-child', save=True)
+
+        self.category_a = Category.objects.get(slug='category-a')
+        Category(
+            name='Category B',
+            slug='category-b',
+        ).insert_at(self.category_a, position='last-child', save=True)
+
+        self.category_b = Category.objects.get(slug='category-b')
+        Category(
+            name='Subcategory C',
+            slug='subcategory-c',
+        ).insert_at(self.category_b, position='last-child', save=True)
+
+        Category.objects.clear_cache()
+
+        self.root = Category.objects.root_category()
+        self.category_a = Category.objects.get(slug='category-a')
+        self.category_b = Category.objects.get(slug='category-b')
+        self.category_c = Category.objects.get(slug='subcategory-c')
+
+    def test_catalogue_tree(self):
+        """catalogue contains whole categories tree"""
+        catalogue = get_catalogue()
+
+        self.assertEqual(catalogue.get_root(), self.root)
+        self.assertEqual([c.pk for c in catalogue.get_categories()], [
+            self.root.pk,
+            self.first_category.pk,
+            self.category_a.pk,
+            self.category_b.pk,
+            self.category_c.pk,
+        ])
+
+    def test_ancestors_and_descendants(self):
+        """catalogue knows categories ancestors and descendants"""
+        catalogue = get_catalogue()
+
+        self.assertEqual(catalogue.get_ancestors_ids(self.category_c.pk), [
+            self.root.pk,
+            self.category_a.pk,
+            self.category_b.pk,
+        ])
+        self.assertEqual(catalogue.get_ancestors_ids(self.root.pk), [])
+
+        self.assertEqual(catalogue.get_descendants_ids(self.category_a.pk), [
+            self.category_b.pk,
+            self.category_c.pk,
+        ])
+        self.assertEqual(
+            catalogue.get_descendants_ids(self.first_category.pk), [])
+
+    def test_get_categories(self):
+        """catalogue returns copies of requested categories"""
+        catalogue = get_catalogue()
+
+        categories = catalogue.get_categories(
+            [self.category_a.pk, self.category_b.pk])
+        self.assertEqual(categories, [self.category_a, self.category_b])
+        self.assertEqual(categories[1].parent, categories[0])
+
+        categories[0].subcategories = [categories[1]]
+        for category in catalogue.get_categories():
+            self.assertFalse(hasattr(category, 'subcategories'))
+
+    def test_catalogue_is_invalidated(self):
+        """catalogue is rebuilt after categories cache is cleared"""
+        catalogue = get_catalogue()
+        self.assertEqual(get_catalogue(), catalogue)
+
+        Category(
+            name='Category D',
+            slug='category-d',
+        ).insert_at(self.root, position='last-child', save=True)
+        Category.objects.clear_cache()
+
+        new_catalogue = get_catalogue()
+        self.assertNotEqual(new_catalogue, catalogue)
+        self.assertIn('category-d',
+            [c.slug for c in new_catalogue.get_categories()])
+
+    def test_get_top_category_id(self):
+        """catalogue resolves top category under specified root"""
+        catalogue = get_catalogue()
+
+        self.assertEqual(catalogue.get_top_category_id(
+            self.root.pk, self.category_c.pk), self.category_a.pk)
+        self.assertEqual(catalogue.get_top_category_id(
+            self.root.pk, self.category_a.pk), self.category_a.pk)
+        self.assertEqual(catalogue.get_top_category_id(
+            self.category_a.pk, self.category_c.pk), self.category_b.pk)
+
+        self.assertIsNone(catalogue.get_top_category_id(
+            self.category_a.pk, self.category_a.pk))
+        self.assertIsNone(catalogue.get_top_category_id(
+            self.first_category.pk, self.category_c.pk))
+        self.assertIsNone(catalogue.get_top_category_id(
+            self.category_c.pk, self.category_a.pk))
+
+    def test_catalogue_records(self):
+        """catalogue keeps compact records and creates instances lazily"""
+        catalogue = get_catalogue()
+
+        for values in cache.get(CACHE_NAME):
+            self.assertIsInstance(values, tuple)
+
+        record = catalogue.get_record(self.category_b.pk)
+        self.assertEqual(record.name, self.category_b.name)
+        self.assertEqual(record.parent_id, self.category_a.pk)
+
+        self.assertEqual(catalogue.instances, {})
+        get_stats()
+        with self.assertNumQueries(0):
+            category = catalogue.get_categories([self.category_b.pk])[0]
+        self.assertEqual(category, self.category_b)
+        self.assertEqual(category.slug, self.category_b.slug)
+        self.assertEqual(list(catalogue.instances), [self.category_b.pk])
+
+    def test_saving_category_invalidates_catalogue(self):
+        """saving category rebuilds catalogue"""
+        catalogue = get_catalogue()
+
+        self.category_b.name = 'Renamed category'
+        self.category_b.save()
+
+        new_catalogue = get_catalogue()
+        self.assertNotEqual(new_catalogue, catalogue)
+        self.assertEqual(
+            new_catalogue.get_record(self.category_b.pk).name,
+            'Renamed category')
+
+    def test_saving_category_stats_keeps_catalogue(self):
+        """saving category counters updates stats without catalogue rebuild"""
+        catalogue = get_catalogue()
+
+        category = Category.objects.get(pk=self.category_b.pk)
+        category.save()
+        self.assertEqual(get_catalogue(), catalogue)
+
+        category.threads = 5
+        category.posts = 12
+        category.save(update_fields=['threads', 'posts'])
+        self.assertEqual(get_catalogue(), catalogue)
+
+        category = catalogue.get_categories([self.category_b.pk])[0]
+        self.assertEqual(category.threads, 5)
+        self.assertEqual(category.posts, 12)
+        self.assertFalse(category.has_changed(STATS_FIELDS))
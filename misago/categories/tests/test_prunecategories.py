@@ -1,9 +1,11 @@
 from datetime import timedelta
 
+from django.contrib.auth import get_user_model
 from django.test import TestCase
 from django.utils import timezone
 from django.utils.six import StringIO
 
+from misago.readtracker.models import ThreadRead
 from misago.threads import testutils
 
 from misago.categories.management.commands import prunecategories
@@ -182,3 +184,67 @@ class PruneCategoriesTests(TestCase):
 
         command_output = out.getvalue().strip()
         self.assertEqual(command_output, 'Categories were pruned')
+
+    def test_category_archive_deletes_read_trackers(self):
+        """command deletes read trackers of archived threads"""
+        category = Category.objects.all_categories()[:1][0]
+        archive = Category.objects.create(
+            lft=7,
+            rght=8,
+            tree_id=2,
+            level=0,
+            name='Archive',
+            slug='archive',
+        )
+
+        category.prune_started_after = 20
+        category.archive_pruned_in = archive
+        category.save()
+
+        User = get_user_model()
+        user = User.objects.create_user('Bob', 'bob@bob.com', 'pass123')
+
+        started_on = timezone.now() - timedelta(days=30)
+        archived_thread = testutils.post_thread(
+            category, started_on=started_on)
+        kept_thread = testutils.post_thread(category)
+
+        for thread in (archived_thread, kept_thread):
+            ThreadRead.objects.create(
+                user=user,
+                category=category,
+                thread=thread,
+                last_read_on=timezone.now(),
+            )
+
+        command = prunecategories.Command()
+        command.execute(stdout=StringIO())
+
+        read_threads = ThreadRead.objects.values_list('thread_id', flat=True)
+        self.assertEqual(list(read_threads), [kept_thread.pk])
+
+    def test_category_prune_dry_run(self):
+        """command in dry run mode reports threads without pruning them"""
+        category = Category.objects.all_categories()[:1][0]
+
+        category.prune_started_after = 20
+        category.save()
+
+        started_on = timezone.now() - timedelta(days=30)
+        for t in xrange(5):
+            testutils.post_thread(category, started_on=started_on)
+        testutils.post_thread(category)
+
+        # run command
+        command = prunecategories.Command()
+
+        out = StringIO()
+        command.execute(stdout=out, dry_run=True)
+
+        category.synchronize()
+        self.assertEqual(category.threads, 6)
+
+        command_output = out.getvalue().strip().splitlines()
+        self.assertEqual(
+            command_output[0], '%s: 5 threads would be deleted' % category.name)
+        self.assertEqual(command_output[-1], 'No categories were pruned')
@@ -0,0 +1,114 @@
+from misago.core.testutils import MisagoTestCase
+from misago.threads import moderation, testutils
+from misago.users.testutils import AuthenticatedUserTestCase
+
+from misago.categories.models import Category
+from misago.categories.synchronization import synchronize_categories
+
+
+class SynchronizeCategoriesTests(MisagoTestCase):
+    def setUp(self):
+        super(SynchronizeCategoriesTests, self).setUp()
+
+        self.root = Category.objects.root_category()
+        self.category = Category.objects.get(slug='first-category')
+
+        Category(
+            name='Category A',
+            slug='category-a',
+        ).insert_at(self.root, position='last-child', save=True)
+        self.category_a = Category.objects.get(slug='category-a')
+
+    def test_synchronize_categories(self):
+        """synchronize_categories updates categories counters"""
+        threads = [testutils.post_thread(self.category) for t in xrange(3)]
+        for thread in threads:
+            [testutils.reply_thread(thread) for r in xrange(2)]
+        testutils.post_thread(self.category, is_unapproved=True)
+
+        Category.objects.update(threads=0, posts=0, last_thread=None)
+
+        self.assertEqual(synchronize_categories(), 4)
+
+        category = Category.objects.get(pk=self.category.pk)
+        self.assertEqual(category.threads, 3)
+        self.assertEqual(category.posts, 9)
+        self.assertEqual(category.last_thread_id, threads[-1].pk)
+        self.assertEqual(category.last_thread_title, threads[-1].title)
+
+        category_a = Category.objects.get(pk=self.category_a.pk)
+        self.assertEqual(category_a.threads, 0)
+        self.assertEqual(category_a.posts, 0)
+        self.assertIsNone(category_a.last_thread_id)
+
+    def test_synchronize_categories_matches_synchronize(self):
+        """synchronize_categories gives same result as model synchronize"""
+        threads = [testutils.post_thread(self.category) for t in xrange(3)]
+        testutils.reply_thread(threads[0])
+
+        Category.objects.update(threads=0, posts=0, last_thread=None)
+        synchronize_categories([self.category.pk])
+        synchronized = Category.objects.get(pk=self.category.pk)
+
+        category = Category.objects.get(pk=self.category.pk)
+        category.synchronize()
+
+        for field in ('threads', 'posts', 'last_thread_id', 'last_post_on'):
+            self.assertEqual(
+                getattr(synchronized, field), getattr(category, field))
+
+
+class ModerationCountersTests(AuthenticatedUserTestCase):
+    def setUp(self):
+        super(ModerationCountersTests, self).setUp()
+
+        self.root = Category.objects.root_category()
+        self.category = Category.objects.get(slug='first-category')
+
+        Category(
+            name='Category A',
+            slug='category-a',
+        ).insert_at(self.root, position='last-child', save=True)
+        self.category_a = Category.objects.get(slug='category-a')
+
+        self.thread = testutils.post_thread(self.category)
+        testutils.reply_thread(self.thread)
+        self.other_thread = testutils.post_thread(self.category)
+
+    def assertCountersSynchronized(self, *categories):
+        for category in categories:
+            category = Category.objects.get(pk=category.pk)
+            counters = (category.threads, category.posts,
+                        category.last_thread_id)
+
+            category.synchronize()
+            self.assertEqual(counters, (category.threads, category.posts,
+                                        category.last_thread_id))
+
+    def test_move_thread(self):
+        """moving thread updates categories counters"""
+        moderation.move_thread(self.user, self.thread, self.category_a)
+        self.assertCountersSynchronized(self.category, self.category_a)
+
+        moderation.move_thread(self.user, self.other_thread, self.category_a)
+        self.assertCountersSynchronized(self.category, self.category_a)
+
+        category = Category.objects.get(pk=self.category.pk)
+        self.assertEqual(category.threads, 0)
+        self.assertIsNone(category.last_thread_id)
+
+    def test_delete_thread(self):
+        """deleting thread updates category counters"""
+        moderation.delete_thread(self.user, self.other_thread)
+        self.assertCountersSynchronized(self.category)
+
+        moderation.delete_thread(self.user, self.thread)
+        self.assertCountersSynchronized(self.category)
+
+    def test_approve_thread(self):
+        """approving thread updates category counters"""
+        thread = testutils.post_thread(self.category, is_unapproved=True)
+        self.assertCountersSynchronized(self.category)
+
+        moderation.approve_thread(self.user, thread)
+        self.assertCountersSynchronized(self.category)
@@ -94,8 +94,62 @@ class CategoriesUtilsTests(AuthenticatedUserTestCase):
             self.user, Category.objects.get(slug='subcategory-f'))
         self.assertEqual(len(categories_tree), 0)
 
+    def test_categories_tree_aggregates_content(self):
+        """get_categories_tree sums subcategories content into parents"""
+        Category.objects.filter(slug='subcategory-c').update(
+            threads=3, posts=10)
+        Category.objects.filter(slug='subcategory-d').update(
+            threads=2, posts=5)
+        Category.objects.filter(slug='category-b').update(
+            threads=1, posts=1)
+
+        categories_tree = get_categories_tree(self.user)
+        category_a = categories_tree[1]
+
+        self.assertEqual(category_a.threads, 6)
+        self.assertEqual(category_a.posts, 16)
+        self.assertEqual(category_a.subcategories[0].threads, 6)
+        self.assertEqual(category_a.subcategories[0].posts, 16)
+
+    def test_categories_tree_is_cached(self):
+        """get_categories_tree is cached until category is changed"""
+        categories_tree = get_categories_tree(self.user)
+        self.assertEqual(categories_tree[1].threads, 0)
+
+        # queryset update bypasses signals, leaving cached tree stale
+        Category.objects.filter(slug='category-b').update(threads=5)
+        categories_tree = get_categories_tree(self.user)
+        self.assertEqual(categories_tree[1].threads, 0)
+
+        # saving category without changes keeps cached tree
+        category_e = Category.objects.get(slug='category-e')
+        category_e.save()
+        categories_tree = get_categories_tree(self.user)
+        self.assertEqual(categories_tree[1].threads, 0)
+
+        category_e.description = 'Changed description'
+        category_e.save()
+        categories_tree = get_categories_tree(self.user)
+        self.assertEqual(categories_tree[1].threads, 5)
+
     def test_get_category_path(self):
         """get_categories_tree returns all children of root nodes"""
         for node in get_categories_tree(self.user):
             parent_nodes = len(get_category_path(node))
-            self.assertEqual(parent_nodes, node.level)
\ No newline at end of file
+            self.assertEqual(parent_nodes, node.level)
+
+    def test_get_category_path_from_catalogue(self):
+        """get_category_path resolves path without database queries"""
+        Category.objects.clear_cache()
+        category_c = Category.objects.get(slug='subcategory-c')
+        get_category_path(self.first_category)
+
+        with self.assertNumQueries(0):
+            category_path = get_category_path(category_c)
+
+        self.assertEqual(category_path, [
+            self.category_a,
+            self.category_b,
+            category_c,
+        ])
+        self.assertEqual(category_path[1].parent, self.category_a)
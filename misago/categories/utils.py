@@ -1,5 +1,10 @@
-from misago.acl import add_acl
+import time
+
+from django.utils.crypto import get_random_string
+
+from misago.acl import add_acl, get_acl_memo, set_acl_memo
 from misago.core import threadstore
+from misago.core.cache import cache, invalidate_on_commit
 from misago.readtracker import categoriestracker
 
 from misago.categories.models import Category
@@ -12,76 +17,173 @@ __all__ = [
 ]
 
 
+"""
+Categories tree
+
+Aggregating categories threads, posts and last threads up the tree depends
+only on user's ACL and categories rows. Aggregated trees are cached per ACL
+and categories version that changes whenever any category is saved, leaving
+only read flags to be set for user on every request.
+"""
+AGGREGATED_FIELDS = (
+    'threads',
+    'posts',
+    'last_post_on',
+    'last_thread_id',
+    'last_thread_title',
+    'last_thread_slug',
+    'last_poster_name',
+    'last_poster_slug',
+)
+
+TREE_CACHE_KEY = 'misago_categories_tree'
+VERSION_CACHE_KEY = 'misago_categories_tree_aggregates_version'
+
+
 def get_categories_tree(user, parent=None):
     if not user.acl['visible_categories']:
         return []
 
+    tree = get_aggregated_tree(user, parent)
+    categories_list = tree['categories']
+
+    categoriestracker.make_read_aware(user, categories_list)
+
+    for category in reversed(categories_list):
+        for field, value in tree['aggregates'].get(category.pk, {}).items():
+            setattr(category, field, value)
+
+        if category.acl['can_browse'] and category.parent:
+            if not category.is_read:
+                category.parent.is_read = False
+
+    flat_list = []
+    for category in categories_list:
+        if category.level == tree['parent_level']:
+            flat_list.append(category)
+    return flat_list
+
+
+def get_aggregated_tree(user, parent=None):
+    cache_key = get_tree_cache_key(user, parent)
+    version = get_version()
+
+    tree = cache.get(cache_key)
+    if not tree or tree['version'] != version:
+        tree = aggregate_tree(user, parent)
+        tree['version'] = version
+        cache.set(cache_key, tree)
+    return tree
+
+
+def get_tree_cache_key(user, parent):
+    """
+    Trees are cached under token memoized in user's ACL, so they are
+    invalidated together with it
+    """
+    acl_token = get_acl_memo(user, 'categories_tree')
+    if not acl_token:
+        acl_token = get_random_string(12)
+        set_acl_memo(user, 'categories_tree', acl_token)
+
+    return '%s_%s_%s' % (TREE_CACHE_KEY, acl_token, parent.pk if parent else 0)
+
+
+def aggregate_tree(user, parent=None):
+    """
+    Links categories with their subcategories and aggregates subcategories
+    content in single bottom-up pass over categories list
+
+    Aggregated values are kept separate from categories, because read flags
+    are set from categories own last posts dates.
+    """
     if parent:
         queryset = parent.get_descendants().order_by('lft')
     else:
         queryset = Category.objects.all_categories()
 
     queryset_with_acl = queryset.filter(id__in=user.acl['visible_categories'])
-    visible_categories = list(queryset_with_acl)
+    categories_list = list(queryset_with_acl)
 
     categories_dict = {}
-    categories_list = []
-
     parent_level = parent.level + 1 if parent else 1
 
-    for category in visible_categories:
+    for category in categories_list:
         category.subcategories = []
         categories_dict[category.pk] = category
-        categories_list.append(category)
 
         if category.parent_id and category.level > parent_level:
             categories_dict[category.parent_id].subcategories.append(category)
 
     add_acl(user, categories_list)
-    categoriestracker.make_read_aware(user, categories_list)
 
-    for category in reversed(visible_categories):
-        if category.acl['can_browse']:
-            category.parent = categories_dict.get(category.parent_id)
-            if category.parent:
-                category.parent.threads += category.threads
-                category.parent.posts += category.posts
-
-                if category.parent.last_post_on and category.last_post_on:
-                    parent_last_post = category.parent.last_post_on
-                    category_last_post = category.last_post_on
-                    update_last_thead = parent_last_post < category_last_post
-                elif not category.parent.last_post_on and category.last_post_on:
-                    update_last_thead = True
-                else:
-                    update_last_thead = False
-
-                if update_last_thead:
-                    category.parent.last_post_on = category.last_post_on
-                    category.parent.last_thread_id = category.last_thread_id
-                    category.parent.last_thread_title = category.last_thread_title
-                    category.parent.last_thread_slug = category.last_thread_slug
-                    category.parent.last_poster_name = category.last_poster_name
-                    category.parent.last_poster_slug = category.last_poster_slug
-
-                if not category.is_read:
-                    category.parent.is_read = False
+    aggregates = {}
+    for category in reversed(categories_list):
+        if not category.acl['can_browse']:
+            continue
 
-    flat_list = []
-    for category in categories_list:
-        if category.level == parent_level:
-            flat_list.append(category)
-    return flat_list
+        category_parent = categories_dict.get(category.parent_id)
+        category.parent = category_parent
+        if not category_parent:
+            continue
+
+        category_values = aggregates.get(category.pk)
+        if not category_values:
+            category_values = get_aggregated_values(category)
+
+        parent_values = aggregates.get(category_parent.pk)
+        if not parent_values:
+            parent_values = get_aggregated_values(category_parent)
+            aggregates[category_parent.pk] = parent_values
+
+        parent_values['threads'] += category_values['threads']
+        parent_values['posts'] += category_values['posts']
+
+        parent_last_post = parent_values['last_post_on']
+        category_last_post = category_values['last_post_on']
+        if category_last_post and (
+                not parent_last_post or parent_last_post < category_last_post):
+            for field in AGGREGATED_FIELDS[2:]:
+                parent_values[field] = category_values[field]
+
+    return {
+        'parent_level': parent_level,
+        'categories': categories_list,
+        'aggregates': aggregates,
+    }
+
+
+def get_aggregated_values(category):
+    return dict((f, getattr(category, f)) for f in AGGREGATED_FIELDS)
+
+
+def get_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = reset_version()
+    return version
+
+
+def reset_version():
+    version = int(time.time() * 1000)
+    cache.set(VERSION_CACHE_KEY, version, None)
+    return version
+
+
+def invalidate_categories_tree():
+    invalidate_on_commit(bump_version)
+
+
+def bump_version():
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        reset_version()
 
 
 def get_category_path(category):
     if category.special_role:
         return [category]
 
-    categories_dict = Category.objects.get_cached_categories_dict()
-
-    category_path = []
-    while category and category.level > 0:
-        category_path.append(category)
-        category = category.parent
-    return [f for f in reversed(category_path)]
\ No newline at end of file
+    catalogue = Category.objects.get_catalogue()
+    return catalogue.get_path(category.pk) + [category]
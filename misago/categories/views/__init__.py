@@ -4,6 +4,8 @@ from django.shortcuts import render
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from misago.core.fpc import anonymous_fpc
+
 from misago.categories.serializers import CategorySerializer
 from misago.categories.utils import get_categories_tree
 
@@ -23,6 +25,7 @@ def categories(request):
 
 
 @api_view()
+@anonymous_fpc
 def api(request):
     categories_tree = get_categories_tree(request.user)
     return Response(CategorySerializer(categories_tree, many=True).data)
\ No newline at end of file
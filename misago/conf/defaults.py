@@ -284,6 +284,51 @@ MISAGO_USERS_PER_PAGE = 12
 MISAGO_FRESH_CONTENT_PERIOD = 40
 
 
+# Threads lists and categories index displayed to guests are identical for
+# all of them, so they are stored in full-page cache ("FPC"). This setting
+# controls for how many seconds those pages are cached.
+# Set to 0 to disable full-page cache for guests.
+MISAGO_ANONYMOUS_FPC_TIMEOUT = 300
+
+
+# Threads lists counts are cached, but on huge forums even single count
+# may take long time. If estimated number of threads on "all" list exceeds
+# this value, estimate is displayed instead of exact count.
+# Set to 0 to always count threads.
+MISAGO_THREADS_LIST_APPROXIMATE_COUNT = 0
+
+
+# Buffer threads reads in cache instead of writing them to database on every
+# page view. If you enable this, make sure that "flushreadtracker" management
+# command is ran periodically (eg. every minute) to write buffered reads.
+# Categories are marked as read only after buffered reads are written.
+MISAGO_READTRACKER_BUFFER = False
+
+
+# Update usernames stored on renamed user's threads, posts and events in
+# background instead of during rename. If you enable this, make sure that
+# "updateusernames" management command is ran periodically (eg. every minute).
+MISAGO_DEFER_USERNAME_UPDATES = False
+
+
+# Online tracker skips updating user's last click if previous one happened
+# less than this number of seconds ago from same IP.
+# Set to 0 to update last click on every request.
+MISAGO_ONLINE_TRACKER_THRESHOLD = 30
+
+
+# Buffer online tracker clicks in cache instead of writing them to database.
+# If you enable this, make sure that "flushonlinetracker" management command
+# is ran periodically (eg. every minute) to write buffered clicks.
+MISAGO_ONLINE_TRACKER_BUFFER = False
+
+
+# Presence backend used to record users clicks and tell if they are online.
+# "DatabasePresence" keeps them in database, buffering them in cache if
+# MISAGO_ONLINE_TRACKER_BUFFER is enabled.
+MISAGO_PRESENCE_BACKEND = 'misago.users.online.presence.DatabasePresence'
+
+
 # X-Sendfile
 # X-Sendfile is feature provided by Http servers that allows web apps to
 # delegate serving files over to the better performing server instead of
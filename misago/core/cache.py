@@ -1,5 +1,6 @@
 from django.core.cache import (
     caches, cache as default_cache, InvalidCacheBackendError)
+from django.db import connection, transaction
 
 
 try:
@@ -12,3 +13,18 @@ try:
     fpc_cache = caches['misago_fpc']
 except InvalidCacheBackendError:
     fpc_cache = cache
+
+
+def invalidate_on_commit(invalidate):
+    """
+    Calls invalidate now and once again after current transaction commits,
+    so caches rebuilt by other processes from data that wasn't committed yet
+    don't stay valid
+    """
+    invalidate()
+
+    if connection.in_atomic_block:
+        for sids, func in connection.run_on_commit:
+            if func == invalidate:
+                return
+        transaction.on_commit(invalidate)
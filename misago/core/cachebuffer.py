@@ -0,0 +1,174 @@
+"""
+Write-behind buffer kept in cache
+
+Buffer keeps newest value of every item under item's own key, and marks item
+as dirty with separate key. First write that marks item as dirty also adds
+item's key to journal of current generation, so items are journaled once
+between flushes no matter how often they change.
+
+Flush starts new generation and reads journals of two last generations, so
+items journaled by writers that were halfway through writing to previous
+generation when it ended are picked on next flush. Dirty marks are removed
+before items values are read, so writes made during flush mark their items
+again and are not lost. Journals never rely on their counters staying in
+cache, so counter that was evicted or reset only makes writers start
+numbering over, and all keys expire after timeout.
+
+Items that should keep greatest value written can be set with set_max, that
+compares and sets value while holding short lock kept in cache.
+"""
+import time
+
+from misago.core.cache import cache
+
+
+BUFFER_TIMEOUT = 3600 * 24
+JOURNAL_CHUNK_SIZE = 500
+JOURNAL_ATTEMPTS = 10
+
+LOCK_TIMEOUT = 5
+LOCK_ATTEMPTS = 10
+LOCK_DELAY = 0.005
+
+
+class CacheBuffer(object):
+    def __init__(self, name, timeout=BUFFER_TIMEOUT):
+        self.name = name
+        self.timeout = timeout
+        self.generation_key = '%s_generation' % name
+
+    def get_value_key(self, key):
+        if isinstance(key, tuple):
+            key = '_'.join([unicode(k) for k in key])
+        return '%s_value_%s' % (self.name, key)
+
+    def get_dirty_key(self, key):
+        return '%s_dirty_%s' % (self.name, self.get_value_key(key))
+
+    def get_journal_key(self, generation, sequence):
+        return '%s_journal_%s_%s' % (self.name, generation, sequence)
+
+    def get(self, key):
+        return cache.get(self.get_value_key(key))
+
+    def get_many(self, keys):
+        """
+        Returns dict of key: value for items that are in buffer
+        """
+        values_keys = dict((self.get_value_key(k), k) for k in keys)
+        values = cache.get_many(values_keys.keys())
+        return dict((values_keys[k], v) for k, v in values.items())
+
+    def set(self, key, value):
+        cache.set(self.get_value_key(key), value, self.timeout)
+        self.mark_dirty(key)
+
+    def set_max(self, key, value):
+        """
+        Sets item's value if it's greater than value already in buffer,
+        returns True if value was set
+        """
+        lock_key = '%s_lock_%s' % (self.name, self.get_value_key(key))
+        for attempt in xrange(LOCK_ATTEMPTS):
+            if cache.add(lock_key, True, LOCK_TIMEOUT):
+                try:
+                    return self.set_if_greater(key, value)
+                finally:
+                    cache.delete(lock_key)
+            time.sleep(LOCK_DELAY)
+
+        # lock holder is stuck or gone, compare without lock
+        return self.set_if_greater(key, value)
+
+    def set_if_greater(self, key, value):
+        current_value = self.get(key)
+        if current_value is None or current_value < value:
+            self.set(key, value)
+            return True
+        return False
+
+    def delete(self, key):
+        cache.delete(self.get_value_key(key))
+
+    def mark_dirty(self, key):
+        if cache.add(self.get_dirty_key(key), True, self.timeout):
+            self.journal(key)
+
+    def journal(self, key):
+        generation = self.get_generation()
+        sequence_key = self.get_journal_key(generation, 'sequence')
+
+        for attempt in xrange(JOURNAL_ATTEMPTS):
+            try:
+                sequence = cache.incr(sequence_key)
+            except ValueError:
+                cache.add(sequence_key, 0, self.timeout)
+                continue
+
+            journal_key = self.get_journal_key(generation, sequence)
+            if cache.add(journal_key, key, self.timeout):
+                return
+
+    def get_generation(self):
+        generation = cache.get(self.generation_key)
+        if generation is None:
+            cache.add(self.generation_key, 1, None)
+            generation = cache.get(self.generation_key, 1)
+        return generation
+
+    def start_generation(self):
+        """
+        Starts new generation, returns number of generation that ended
+        """
+        generation = self.get_generation()
+        try:
+            cache.incr(self.generation_key)
+        except ValueError:
+            cache.add(self.generation_key, generation + 1, None)
+        return generation
+
+    def read_journal(self, generation):
+        """
+        Returns set of keys journaled in generation, removing them from it
+        """
+        sequence_key = self.get_journal_key(generation, 'sequence')
+        last_sequence = cache.get(sequence_key, 0)
+
+        journal_keys = []
+        for sequence in xrange(1, last_sequence + 1):
+            journal_keys.append(self.get_journal_key(generation, sequence))
+
+        keys = set()
+        for i in xrange(0, len(journal_keys), JOURNAL_CHUNK_SIZE):
+            chunk = journal_keys[i:i + JOURNAL_CHUNK_SIZE]
+            keys.update(cache.get_many(chunk).values())
+            cache.delete_many(chunk)
+        return keys
+
+    def flush(self, save):
+        """
+        Calls save with dict of key: value of items changed since last flush,
+        returns number of flushed items
+
+        If save raises, its items are marked as dirty again
+        """
+        generation = self.start_generation()
+
+        keys = self.read_journal(generation - 1)
+        keys.update(self.read_journal(generation))
+        if not keys:
+            return 0
+
+        cache.delete_many([self.get_dirty_key(k) for k in keys])
+        items = self.get_many(keys)
+        if not items:
+            return 0
+
+        try:
+            save(items)
+        except Exception:
+            for key in items:
+                self.mark_dirty(key)
+            raise
+
+        return len(items)
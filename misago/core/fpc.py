@@ -0,0 +1,108 @@
+"""
+Full-page cache for anonymous users
+
+All anonymous users share same ACL, so API responses they get are
+identical. Views decorated with anonymous_fpc store their JSON responses in
+fpc_cache, keyed by request path, query string, language and versions of
+content and ACL, and serve those to next anonymous visitors.
+
+HTML pages are never cached, because they contain CSRF token and make
+middlewares set cookies after view returns.
+"""
+import time
+from functools import wraps
+from hashlib import md5
+
+from django.utils.translation import get_language
+
+from misago.acl import version as acl_version
+from misago.conf import settings
+
+from misago.core.cache import fpc_cache, invalidate_on_commit
+
+
+FPC_CACHE_KEY = 'misago_fpc'
+VERSION_CACHE_KEY = 'misago_fpc_version'
+
+
+def anonymous_fpc(f):
+    @wraps(f)
+    def decorator(request, *args, **kwargs):
+        if not is_cacheable(request):
+            return f(request, *args, **kwargs)
+
+        cache_key = get_cache_key(request)
+        response = fpc_cache.get(cache_key)
+        if response is None:
+            response = f(request, *args, **kwargs)
+            set_cache(cache_key, response)
+        return response
+    return decorator
+
+
+def is_cacheable(request):
+    if not settings.MISAGO_ANONYMOUS_FPC_TIMEOUT:
+        return False
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    return request.user.is_anonymous()
+
+
+def is_response_cacheable(response):
+    if response.status_code != 200 or response.cookies:
+        return False
+    return response.get('Content-Type', '').startswith('application/json')
+
+
+def set_cache(cache_key, response):
+    timeout = settings.MISAGO_ANONYMOUS_FPC_TIMEOUT
+
+    def cache_response(response):
+        if is_response_cacheable(response):
+            fpc_cache.set(cache_key, response, timeout)
+
+    if callable(getattr(response, 'render', None)):
+        # api responses get their content type once they are rendered
+        response.add_post_render_callback(cache_response)
+    else:
+        cache_response(response)
+
+
+def get_cache_key(request):
+    key_hash = md5('\n'.join([
+        request.get_full_path(),
+        request.META.get('HTTP_ACCEPT', ''),
+        get_language() or '',
+        str(get_version()),
+        str(acl_version.get_version()),
+    ])).hexdigest()
+
+    return '%s_%s' % (FPC_CACHE_KEY, key_hash)
+
+
+def get_version():
+    version = fpc_cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = reset_version()
+    return version
+
+
+def reset_version():
+    """
+    Versions are started from current time, so losing version from cache
+    never makes pages cached for its earlier value valid again
+    """
+    version = int(time.time() * 1000)
+    fpc_cache.set(VERSION_CACHE_KEY, version, None)
+    return version
+
+
+def invalidate():
+    invalidate_on_commit(bump_version)
+
+
+def bump_version():
+    try:
+        fpc_cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        reset_version()
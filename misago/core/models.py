@@ -4,3 +4,43 @@ from django.db import models
 class CacheVersion(models.Model):
     cache = models.CharField(max_length=128)
     version = models.PositiveIntegerField(default=0)
+
+
+class ChangesTrackingMixin(object):
+    """
+    Remembers values model instance was loaded from database with, so signal
+    handlers can tell if save changed fields they care about
+    """
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(ChangesTrackingMixin, cls).from_db(
+            db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super(ChangesTrackingMixin, self).save(*args, **kwargs)
+        self._loaded_values = dict(
+            (f.attname, getattr(self, f.attname))
+            for f in self._meta.concrete_fields)
+
+    def has_changed(self, fields, update_fields=None):
+        """
+        Returns true if any of fields was changed since instance was loaded
+        or saved. Fields are given by their attribute names.
+        """
+        if update_fields is not None:
+            updated_attnames = set(
+                self._meta.get_field(f).attname for f in update_fields)
+            fields = [f for f in fields if f in updated_attnames]
+
+        loaded_values = getattr(self, '_loaded_values', None)
+        if loaded_values is None:
+            return bool(fields)
+
+        for field in fields:
+            if field not in loaded_values:
+                return True
+            if loaded_values[field] != getattr(self, field):
+                return True
+        return False
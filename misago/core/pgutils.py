@@ -1,6 +1,8 @@
-from django.db.migrations.operations import RunSQL
+import json
+from uuid import uuid4
 
-from django.core.paginator import Paginator
+from django.db import connections
+from django.db.migrations.operations import RunSQL
 
 
 class CreatePartialIndex(RunSQL):
@@ -45,29 +47,94 @@ DROP INDEX %(index_name)s
 
     def describe(self):
         message = "Create PostgreSQL partial index on field %s in %s for %s"
-        formats = (self.field, self.model_name, self.values)
+        formats = (self.field, self.model, self.condition)
         return message % formats
 
 
-def batch_update(queryset, step=50):
+def count_estimate(queryset):
     """
-    Util because psycopg2 iterators aren't really memory effective
+    Returns PostgreSQL planner's estimate of number of rows in queryset
+
+    Estimate is as good as table statistics are, but it costs single EXPLAIN
+    instead of scan of every row that COUNT(*) needs
     """
-    paginator = Paginator(queryset, step)
-    for page_number in paginator.page_range:
-        for obj in paginator.page(page_number).object_list:
-            yield obj
+    sql, params = queryset.query.sql_with_params()
+
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) %s' % sql, params)
+        plan = cursor.fetchone()[0]
+
+    if not isinstance(plan, list):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
 
 
-def batch_delete(queryset, step=50):
+def batch_update(queryset, step=50, server_side=False):
     """
-    Another util cos paginator goes bobbins when you are deleting
+    Iterates over queryset in chunks of step rows, walking by primary key
+
+    Every chunk is selected with "id > last_id ORDER BY id LIMIT step", so
+    cost of getting chunk doesn't grow with position in table. Server side
+    mode streams primary keys from single PostgreSQL cursor instead
     """
-    queryset_exists = True
-    while queryset_exists:
-        for obj in queryset[:step]:
+    if server_side:
+        chunks = server_side_chunks(queryset, step)
+    else:
+        chunks = keyset_chunks(queryset, step)
+
+    for chunk in chunks:
+        for obj in chunk:
             yield obj
-        queryset_exists = queryset.exists()
+
+
+def batch_delete(queryset, step=50, server_side=False):
+    """
+    Iterates over queryset which items are deleted during iteration
+
+    Walking by primary key skips rows already seen, so it's safe to delete
+    them without need for running exists() after every chunk
+    """
+    return batch_update(queryset, step, server_side)
+
+
+def keyset_chunks(queryset, step):
+    queryset = queryset.order_by('pk')
+
+    last_pk = None
+    while True:
+        if last_pk is None:
+            chunk = list(queryset[:step])
+        else:
+            chunk = list(queryset.filter(pk__gt=last_pk)[:step])
+
+        if chunk:
+            yield chunk
+            last_pk = chunk[-1].pk
+        if len(chunk) < step:
+            break
+
+
+def server_side_chunks(queryset, step):
+    pks_queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    sql, params = pks_queryset.query.sql_with_params()
+
+    connection = connections[queryset.db]
+    connection.ensure_connection()
+
+    cursor_name = 'misago_batch_%s' % uuid4().hex
+    cursor = connection.connection.cursor(cursor_name, withhold=True)
+    cursor.itersize = step
+
+    try:
+        cursor.execute(sql, params)
+        while True:
+            pks = [row[0] for row in cursor.fetchmany(step)]
+            if pks:
+                yield list(queryset.filter(pk__in=pks).order_by('pk'))
+            if len(pks) < step:
+                break
+    finally:
+        cursor.close()
 
 
 class CreatePartialCompositeIndex(CreatePartialIndex):
@@ -102,5 +169,5 @@ DROP INDEX %(index_name)s
     def describe(self):
         message = ("Create PostgreSQL partial composite "
                    "index on fields %s in %s for %s")
-        formats = (', '.join(self.fields), self.model_name, self.values)
+        formats = (', '.join(self.fields), self.model, self.condition)
         return message % formats
@@ -1,11 +1,13 @@
 from collections import OrderedDict
+from django.core.paginator import Paginator
 from django.http import Http404
 from django.shortcuts import *  # noqa
 
 
 def paginate(object_list, page, per_page, orphans=0,
              allow_empty_first_page=True,
-             allow_explicit_first_page=False):
+             allow_explicit_first_page=False,
+             count=None):
     from django.http import Http404
     from django.core.paginator import Paginator, EmptyPage
     from misago.core.exceptions import ExplicitFirstPage
@@ -15,55 +17,124 @@ def paginate(object_list, page, per_page, orphans=0,
     elif not page:
         page = 1
 
+    if count is not None:
+        return paginate_with_count(
+            object_list, page, per_page, orphans, allow_empty_first_page,
+            count)
+
+    paginator = Paginator(
+        object_list, per_page, orphans=orphans,
+        allow_empty_first_page=allow_empty_first_page)
+
     try:
-        return Paginator(
-            object_list, per_page, orphans=orphans,
-            allow_empty_first_page=allow_empty_first_page).page(page)
+        return paginator.page(page)
     except EmptyPage:
         raise Http404()
 
 
-def pagination_dict(page, include_page_range=True):
-    pagination = {
-        'page': page.number,
-        'pages': page.paginator.num_pages,
-        'page_range': None,
-        'first': None,
-        'previous': None,
-        'next': None,
-        'last': None,
-        'before': 0,
-        'more': 0,
-    }
-
-    if include_page_range:
-        pagination['page_range'] = list(page.paginator.page_range)
-
-    if page.has_previous():
-        pagination['first'] = 1
-        if page.previous_page_number() > 1:
-            pagination['previous'] = page.previous_page_number()
-
-    if page.has_next():
-        pagination['last'] = page.paginator.num_pages
-        if page.next_page_number() <= page.paginator.num_pages:
-            pagination['next'] = page.next_page_number()
-
-    if page.start_index():
-        pagination['before'] = page.start_index() - 1
-    pagination['more'] = page.paginator.count - page.end_index()
+def paginate_with_count(object_list, page, per_page, orphans,
+                        allow_empty_first_page, count):
+    """
+    Paginates without counting object_list, using cached or estimated count
+
+    Count may be stale or approximate, so it's used only to display number
+    of pages. Page is sliced from object_list together with rows that tell
+    if there's next page, and paginator's count is made to agree with them.
+    """
+    from django.http import Http404
+    from django.core.paginator import InvalidPage, Page
+
+    try:
+        number = int(page)
+    except (TypeError, ValueError):
+        raise Http404()
+    if number < 1:
+        raise Http404()
+
+    bottom = (number - 1) * per_page
+    next_page_from = per_page + orphans
+    page_list = list(object_list[bottom:bottom + next_page_from + 1])
+
+    if len(page_list) > next_page_from:
+        count = max(count, bottom + len(page_list))
+        page_list = page_list[:per_page]
+    else:
+        count = bottom + len(page_list)
+
+    paginator = CountedPaginator(
+        object_list, per_page, orphans=orphans,
+        allow_empty_first_page=allow_empty_first_page)
+    paginator.known_count = count
+
+    try:
+        number = paginator.validate_number(number)
+    except InvalidPage:
+        raise Http404()
+    return Page(page_list, number, paginator)
+
+
+class CountedPaginator(Paginator):
+    @property
+    def count(self):
+        return self.known_count
+
+
+class CursorPage(object):
+    def __init__(self, object_list, key, has_previous, has_next):
+        self.object_list = object_list
+        self.key = key
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def previous_cursor(self):
+        if self.has_previous():
+            return getattr(self.object_list[0], self.key)
+        return None
+
+    def next_cursor(self):
+        if self.has_next():
+            return getattr(self.object_list[-1], self.key)
+        return None
+
+
+def paginate_cursor(queryset, per_page, key, before=None, after=None):
+    """
+    Seeks page of queryset ordered descending by unique key
+
+    Unlike paginate, this doesn't count or offset queryset, so it performs
+    same on all pages as long as there's index on key. Page can be seeked
+    before or after cursor, but not both.
+    """
+    if before is not None and after is not None:
+        raise Http404()
+
+    if before is not None:
+        queryset = queryset.filter(**{'%s__gt' % key: before}).order_by(key)
+        object_list = list(queryset[:per_page + 1])
+
+        has_previous = len(object_list) > per_page
+        object_list = list(reversed(object_list[:per_page]))
+        return CursorPage(object_list, key, has_previous, True)
+    else:
+        if after is not None:
+            queryset = queryset.filter(**{'%s__lt' % key: after})
+        object_list = list(queryset.order_by('-%s' % key)[:per_page + 1])
+
+        has_next = len(object_list) > per_page
+        object_list = object_list[:per_page]
+        return CursorPage(object_list, key, after is not None, has_next)
+
 
+def cursor_pagination_dict(page):
     return OrderedDict([
-        ('count', page.paginator.count),
-        ('page', pagination['page']),
-        ('pages', pagination['pages']),
-        ('page_range', pagination['page_range']),
-        ('first', pagination['first']),
-        ('previous', pagination['previous']),
-        ('next', pagination['next']),
-        ('last', pagination['last']),
-        ('before', pagination['before']),
-        ('more', pagination['more'])
+        ('previous_cursor', page.previous_cursor()),
+        ('next_cursor', page.next_cursor()),
     ])
 
 
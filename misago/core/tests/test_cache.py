@@ -0,0 +1,21 @@
+from django.db import connection
+from django.test import TestCase
+
+from misago.core.cache import invalidate_on_commit
+
+
+class InvalidateOnCommitTests(TestCase):
+    def test_invalidate_on_commit(self):
+        """invalidation is ran now and once after transaction commits"""
+        calls = []
+
+        def invalidate():
+            calls.append(True)
+
+        invalidate_on_commit(invalidate)
+        invalidate_on_commit(invalidate)
+        self.assertEqual(len(calls), 2)
+
+        on_commit = [f for sids, f in connection.run_on_commit
+                     if f == invalidate]
+        self.assertEqual(len(on_commit), 1)
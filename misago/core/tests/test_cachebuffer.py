@@ -0,0 +1,103 @@
+from misago.core.cache import cache
+from misago.core.cachebuffer import CacheBuffer
+from misago.core.testutils import MisagoTestCase
+
+
+class CacheBufferTests(MisagoTestCase):
+    def setUp(self):
+        super(CacheBufferTests, self).setUp()
+        self.buffer = CacheBuffer('test_buffer')
+        self.flushed = []
+
+    def save(self, items):
+        self.flushed.append(items)
+
+    def test_set_get(self):
+        """buffer keeps newest value of item"""
+        self.buffer.set((1, 2), 'first')
+        self.buffer.set((1, 2), 'second')
+
+        self.assertEqual(self.buffer.get((1, 2)), 'second')
+        self.assertEqual(self.buffer.get_many([(1, 2), (2, 3)]), {
+            (1, 2): 'second',
+        })
+
+    def test_set_max(self):
+        """set_max keeps greatest value of item"""
+        self.assertTrue(self.buffer.set_max(1, 5))
+        self.assertFalse(self.buffer.set_max(1, 3))
+        self.assertEqual(self.buffer.get(1), 5)
+
+        self.assertTrue(self.buffer.set_max(1, 7))
+        self.assertEqual(self.buffer.get(1), 7)
+
+        # lock left by writer that died is ignored after attempts
+        cache.set('test_buffer_lock_%s' % self.buffer.get_value_key(1), True)
+        self.assertTrue(self.buffer.set_max(1, 9))
+        self.assertEqual(self.buffer.get(1), 9)
+
+    def test_flush(self):
+        """flush saves changed items once"""
+        self.buffer.set(1, 'first')
+        self.buffer.set(2, 'second')
+        self.buffer.set(1, 'third')
+
+        self.assertEqual(self.buffer.flush(self.save), 2)
+        self.assertEqual(self.flushed, [{1: 'third', 2: 'second'}])
+
+        self.assertEqual(self.buffer.flush(self.save), 0)
+        self.assertEqual(len(self.flushed), 1)
+
+        # flushed items are still readable from buffer
+        self.assertEqual(self.buffer.get(1), 'third')
+
+    def test_flush_changes_made_during_save(self):
+        """items changed while they were saved are flushed again"""
+        def save(items):
+            self.buffer.set(1, 'changed')
+            self.save(items)
+
+        self.buffer.set(1, 'value')
+        self.buffer.flush(save)
+        self.buffer.flush(self.save)
+
+        self.assertEqual(self.flushed, [{1: 'value'}, {1: 'changed'}])
+
+    def test_flush_journaled_to_ended_generation(self):
+        """items journaled to generation after it ended are flushed"""
+        generation = self.buffer.get_generation()
+        self.buffer.flush(self.save)
+
+        # writer that read generation before flush started new one
+        cache.set(self.buffer.get_value_key(1), 'late')
+        cache.add(self.buffer.get_dirty_key(1), True)
+        cache.set(self.buffer.get_journal_key(generation, 'sequence'), 1)
+        cache.set(self.buffer.get_journal_key(generation, 1), 1)
+
+        self.assertEqual(self.buffer.flush(self.save), 1)
+        self.assertEqual(self.flushed, [{1: 'late'}])
+
+    def test_flush_after_journal_reset(self):
+        """items are flushed after journal sequence is evicted"""
+        self.buffer.set(1, 'first')
+        self.buffer.flush(self.save)
+
+        generation = self.buffer.get_generation()
+        self.buffer.set(1, 'second')
+        cache.delete(self.buffer.get_journal_key(generation, 'sequence'))
+        self.buffer.set(2, 'third')
+
+        self.buffer.flush(self.save)
+        self.assertEqual(self.flushed[1], {1: 'second', 2: 'third'})
+
+    def test_failed_save(self):
+        """items that failed to save are flushed again"""
+        def failing_save(items):
+            raise RuntimeError()
+
+        self.buffer.set(1, 'value')
+        with self.assertRaises(RuntimeError):
+            self.buffer.flush(failing_save)
+
+        self.assertEqual(self.buffer.flush(self.save), 1)
+        self.assertEqual(self.flushed, [{1: 'value'}])
@@ -0,0 +1,112 @@
+from django.test.utils import override_settings
+
+from misago.categories.models import Category
+from misago.threads import testutils
+from misago.threads.models import Thread
+from misago.users.testutils import AuthenticatedUserTestCase, UserTestCase
+
+from misago.core import fpc
+
+
+class AnonymousFPCTests(UserTestCase):
+    def setUp(self):
+        super(AnonymousFPCTests, self).setUp()
+
+        self.category = Category.objects.get(slug='first-category')
+        self.thread = testutils.post_thread(category=self.category)
+
+    def test_threads_api_is_cached(self):
+        """threads api response is cached for guests"""
+        response = self.client.get('/api/threads/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.thread.title, response.content)
+
+        # queryset update bypasses signals, leaving cached response stale
+        Thread.objects.update(title='Renamed thread')
+
+        response = self.client.get('/api/threads/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.thread.title, response.content)
+
+        fpc.invalidate()
+
+        response = self.client.get('/api/threads/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(self.thread.title, response.content)
+        self.assertIn('Renamed thread', response.content)
+
+    def test_threads_api_is_invalidated(self):
+        """threads api cache is invalidated by new thread"""
+        response = self.client.get('/api/threads/')
+        self.assertEqual(response.status_code, 200)
+
+        new_thread = testutils.post_thread(
+            category=self.category, title='Other thread')
+
+        response = self.client.get('/api/threads/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(new_thread.title, response.content)
+
+    def test_unchanged_thread_save(self):
+        """saving thread without changing its list fields keeps cache"""
+        response = self.client.get('/api/threads/')
+        self.assertEqual(response.status_code, 200)
+
+        version = fpc.get_version()
+
+        thread = Thread.objects.get(pk=self.thread.pk)
+        thread.has_events = True
+        thread.save()
+        self.assertEqual(fpc.get_version(), version)
+
+        thread.title = 'Renamed thread'
+        thread.save()
+        self.assertNotEqual(fpc.get_version(), version)
+
+    def test_pages_are_not_cached(self):
+        """html pages with csrf tokens aren't cached"""
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+
+        Thread.objects.update(title='Renamed thread')
+
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Renamed thread', response.content)
+        self.assertIn('csrftoken', response.cookies)
+
+    def test_cache_key_includes_query(self):
+        """cache key differs for different query strings"""
+        response = self.client.get('/api/threads/')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get('/api/threads/?list=bob')
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(MISAGO_ANONYMOUS_FPC_TIMEOUT=0)
+    def test_cache_disabled(self):
+        """fpc can be disabled"""
+        response = self.client.get('/api/threads/')
+        self.assertEqual(response.status_code, 200)
+
+        Thread.objects.update(title='Renamed thread')
+
+        response = self.client.get('/api/threads/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Renamed thread', response.content)
+
+
+class AuthenticatedFPCTests(AuthenticatedUserTestCase):
+    def test_threads_api_is_not_cached(self):
+        """threads api response is not cached for users"""
+        category = Category.objects.get(slug='first-category')
+        testutils.post_thread(category=category)
+
+        response = self.client.get('/api/threads/')
+        self.assertEqual(response.status_code, 200)
+
+        Thread.objects.update(title='Renamed thread')
+
+        response = self.client.get('/api/threads/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Renamed thread', response.content)
@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from misago.core.pgutils import batch_delete, batch_update
+
+
+class BatchUtilsTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        for i in xrange(7):
+            User.objects.create_user(
+                'User%s' % i, 'user%s@example.com' % i, 'pass123')
+
+        self.queryset = User.objects.all()
+        self.users_ids = list(
+            self.queryset.order_by('pk').values_list('pk', flat=True))
+
+    def test_batch_update(self):
+        """batch_update yields all items in queryset"""
+        items = [user.pk for user in batch_update(self.queryset, 3)]
+        self.assertEqual(items, self.users_ids)
+
+    def test_batch_update_server_side(self):
+        """batch_update in server side mode yields all items in queryset"""
+        items = batch_update(self.queryset, 3, server_side=True)
+        self.assertEqual([user.pk for user in items], self.users_ids)
+
+    def test_batch_delete(self):
+        """batch_delete yields all items while they are deleted"""
+        items = []
+        for user in batch_delete(self.queryset, 3):
+            items.append(user.pk)
+            user.delete()
+
+        self.assertEqual(items, self.users_ids)
+        self.assertFalse(self.queryset.exists())
@@ -2,7 +2,7 @@ from django.core.urlresolvers import reverse
 from django.http import Http404
 from django.test import TestCase
 
-from misago.core.shortcuts import get_int_or_404
+from misago.core.shortcuts import get_int_or_404, paginate, paginate_cursor
 
 
 class PaginateTests(TestCase):
@@ -33,6 +33,37 @@ class PaginateTests(TestCase):
         valid_url = "/forum/test-pagination/"
         self.assertEqual(response['Location'], valid_url)
 
+    def test_paginate_with_lower_count(self):
+        """count lower than real doesn't truncate last page"""
+        page = paginate(range(14), 2, 5, 1, count=6)
+        self.assertEqual(list(page.object_list), [5, 6, 7, 8, 9])
+        self.assertTrue(page.has_next())
+
+        page = paginate(range(14), 3, 5, 1, count=6)
+        self.assertEqual(list(page.object_list), [10, 11, 12, 13])
+        self.assertFalse(page.has_next())
+
+    def test_paginate_with_higher_count(self):
+        """count higher than real only misstates number of pages"""
+        page = paginate(range(11), None, 5, 1, count=100)
+        self.assertEqual(list(page.object_list), [0, 1, 2, 3, 4])
+        self.assertEqual(page.paginator.num_pages, 20)
+
+        page = paginate(range(11), 2, 5, 1, count=100)
+        self.assertEqual(list(page.object_list), [5, 6, 7, 8, 9, 10])
+        self.assertFalse(page.has_next())
+        self.assertEqual(page.paginator.num_pages, 2)
+
+        with self.assertRaises(Http404):
+            paginate(range(11), 3, 5, 1, count=100)
+
+
+class PaginateCursorTests(TestCase):
+    def test_both_cursors_handling(self):
+        """paginate_cursor raises 404 for both before and after cursors"""
+        with self.assertRaises(Http404):
+            paginate_cursor(None, 10, 'id', before=20, after=10)
+
 
 class ValidateSlugTests(TestCase):
     urls = 'misago.core.testproject.urls'
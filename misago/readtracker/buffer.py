@@ -0,0 +1,123 @@
+"""
+Write-behind buffer for threads reads
+
+Instead of writing ThreadRead rows on every page view, reads are kept in
+cache buffer and written to database in bulk by "flushreadtracker" command.
+
+Buffer keeps only newest read of thread by user, so user browsing thread
+many times between flushes results in single write. Buffered reads are
+also read when threads are made read aware, and thread_tracked and
+thread_read signals are sent when read is recorded, so only database write
+and categories read records sync wait for flush.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Value, When
+from django.db.transaction import atomic
+
+from misago.acl import add_acl
+from misago.core.cachebuffer import CacheBuffer
+
+from misago.readtracker import categoriestracker
+from misago.readtracker.models import ThreadRead
+
+
+FLUSH_CHUNK_SIZE = 500
+
+reads_buffer = CacheBuffer('misago_readtracker_buffer')
+
+
+def record(user, thread, last_read_on):
+    reads_buffer.set_max((user.pk, thread.pk), last_read_on)
+
+
+def get_read(user, thread):
+    """
+    Returns date of user's buffered read of thread or None
+    """
+    return reads_buffer.get((user.pk, thread.pk))
+
+
+def get_reads(user, threads_ids):
+    """
+    Returns dict of thread_id: last_read_on of user's buffered reads
+    """
+    reads = reads_buffer.get_many([(user.pk, t) for t in threads_ids])
+    return dict((read_key[1], v) for read_key, v in reads.items())
+
+
+def flush():
+    return reads_buffer.flush(save_reads)
+
+
+@atomic
+def save_reads(reads):
+    from misago.threads.models import Thread
+
+    users_ids = set([user_id for user_id, thread_id in reads])
+    threads_ids = set([thread_id for user_id, thread_id in reads])
+
+    users = get_user_model().objects.in_bulk(users_ids)
+    threads = Thread.objects.select_related('category').in_bulk(threads_ids)
+
+    read_records = {}
+    queryset = ThreadRead.objects.filter(
+        user_id__in=users_ids, thread_id__in=threads_ids)
+    for read_record in queryset:
+        read_key = (read_record.user_id, read_record.thread_id)
+        read_records[read_key] = read_record
+
+    new_records = []
+    updated_records = {}
+    read_threads = []
+
+    for read_key, last_read_on in reads.items():
+        user_id, thread_id = read_key
+        if user_id not in users or thread_id not in threads:
+            continue
+
+        thread = threads[thread_id]
+        read_record = read_records.get(read_key)
+
+        if read_record:
+            if read_record.last_read_on < last_read_on:
+                updated_records[read_record.pk] = last_read_on
+        else:
+            new_records.append(ThreadRead(
+                user_id=user_id,
+                category_id=thread.category_id,
+                thread_id=thread_id,
+                last_read_on=last_read_on,
+            ))
+
+        if last_read_on >= thread.last_post_on:
+            read_threads.append(read_key)
+
+    if updated_records:
+        update_records(updated_records)
+
+    if new_records:
+        ThreadRead.objects.bulk_create(new_records)
+
+    synced_categories = set()
+    for user_id, thread_id in read_threads:
+        user = users[user_id]
+        thread = threads[thread_id]
+
+        if (user_id, thread.category_id) not in synced_categories:
+            synced_categories.add((user_id, thread.category_id))
+
+            add_acl(user, thread.category)
+            categoriestracker.sync_record(user, thread.category)
+
+
+def update_records(updated_records):
+    records_ids = sorted(updated_records.keys())
+    for i in xrange(0, len(records_ids), FLUSH_CHUNK_SIZE):
+        chunk = records_ids[i:i + FLUSH_CHUNK_SIZE]
+        ThreadRead.objects.filter(pk__in=chunk).update(
+            last_read_on=Case(
+                *[When(pk=pk, then=Value(updated_records[pk]))
+                  for pk in chunk],
+                output_field=ThreadRead._meta.get_field('last_read_on')
+            )
+        )
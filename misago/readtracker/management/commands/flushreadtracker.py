@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from misago.readtracker import buffer
+
+
+class Command(BaseCommand):
+    help = 'Writes buffered threads reads to database'
+
+    def handle(self, *args, **options):
+        flushed_count = buffer.flush()
+        self.stdout.write('Threads reads flushed: %s' % flushed_count)
@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.utils import timezone
+from django.utils.six import StringIO
+
+from misago.categories.models import Category
+from misago.core.testutils import MisagoTestCase
+from misago.threads import testutils
+
+from misago.readtracker import buffer, signals, threadstracker
+from misago.readtracker.management.commands import flushreadtracker
+from misago.readtracker.models import ThreadRead
+
+
+class ReadTrackerBufferTests(MisagoTestCase):
+    def setUp(self):
+        super(ReadTrackerBufferTests, self).setUp()
+
+        self.category = Category.objects.all_categories()[:1][0]
+        self.thread = testutils.post_thread(
+            category=self.category,
+            started_on=timezone.now() - timedelta(days=1)
+        )
+
+        User = get_user_model()
+        self.user = User.objects.create_user("Bob", "bob@test.com", "Pass.123")
+
+    def test_record_coalesces_reads(self):
+        """buffer keeps only newest read of thread by user"""
+        older_read = timezone.now() - timedelta(hours=5)
+        newer_read = timezone.now() - timedelta(hours=2)
+
+        buffer.record(self.user, self.thread, newer_read)
+        buffer.record(self.user, self.thread, older_read)
+
+        read_key = (self.user.pk, self.thread.pk)
+        self.assertEqual(buffer.reads_buffer.get(read_key), newer_read)
+
+    @override_settings(MISAGO_READTRACKER_BUFFER=True)
+    def test_buffered_read_thread(self):
+        """buffered read is seen by reader and sends read signal"""
+        post = testutils.reply_thread(self.thread, posted_on=timezone.now())
+
+        threadstracker.make_read_aware(self.user, self.thread)
+        self.assertFalse(self.thread.is_read)
+
+        read_threads = []
+        def thread_read(sender, **kwargs):
+            read_threads.append(kwargs['thread'].pk)
+
+        signals.thread_read.connect(thread_read)
+        try:
+            threadstracker.read_thread(self.user, self.thread, post)
+        finally:
+            signals.thread_read.disconnect(thread_read)
+
+        self.assertEqual(read_threads, [self.thread.pk])
+        self.assertFalse(ThreadRead.objects.exists())
+
+        threadstracker.make_read_aware(self.user, self.thread)
+        self.assertTrue(self.thread.is_read)
+
+        threadstracker.make_read_aware(self.user, [self.thread])
+        self.assertTrue(self.thread.is_read)
+
+        buffer.flush()
+        record = self.user.threadread_set.get(thread=self.thread)
+        self.assertEqual(record.last_read_on, post.posted_on)
+
+    def test_flush_creates_records(self):
+        """flush creates thread read records"""
+        read_on = timezone.now() - timedelta(hours=5)
+        buffer.record(self.user, self.thread, read_on)
+
+        self.assertEqual(buffer.flush(), 1)
+
+        record = self.user.threadread_set.get(thread=self.thread)
+        self.assertEqual(record.category_id, self.category.pk)
+        self.assertEqual(record.last_read_on, read_on)
+
+        # flushed reads are not flushed again
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_flush_updates_records(self):
+        """flush updates existing thread read records"""
+        self.user.threadread_set.create(
+            category=self.category,
+            thread=self.thread,
+            last_read_on=timezone.now() - timedelta(days=2)
+        )
+
+        buffer.record(self.user, self.thread, self.thread.last_post_on)
+        buffer.flush()
+
+        record = self.user.threadread_set.get(thread=self.thread)
+        self.assertEqual(record.last_read_on, self.thread.last_post_on)
+        self.user.categoryread_set.get(category=self.category)
+
+    def test_flush_skips_deleted_threads(self):
+        """flush skips reads of threads that were deleted"""
+        buffer.record(self.user, self.thread, timezone.now())
+        self.thread.delete()
+
+        buffer.flush()
+        self.assertFalse(ThreadRead.objects.exists())
+
+    def test_flushreadtracker_command(self):
+        """flushreadtracker command flushes buffered reads"""
+        buffer.record(self.user, self.thread, timezone.now())
+
+        command = flushreadtracker.Command()
+
+        out = StringIO()
+        command.execute(stdout=out)
+        command_output = out.getvalue().splitlines()[0].strip()
+
+        self.assertEqual(command_output, 'Threads reads flushed: 1')
@@ -1,7 +1,9 @@
 from django.db.transaction import atomic
 from django.utils import timezone
 
-from misago.readtracker import categoriestracker, signals
+from misago.conf import settings
+
+from misago.readtracker import buffer, categoriestracker, signals
 from misago.readtracker.dates import is_date_tracked
 from misago.readtracker.models import CategoryRead, ThreadRead
 
@@ -74,6 +76,14 @@ def make_threads_dict_read_aware(user, threads_dict):
             thread.is_new = False
             thread.is_read = record.last_read_on >= thread.last_post_on
 
+    if settings.MISAGO_READTRACKER_BUFFER:
+        buffered_reads = buffer.get_reads(user, threads_dict.keys())
+        for thread_id, last_read_on in buffered_reads.items():
+            thread = threads_dict[thread_id]
+            thread.is_new = False
+            if last_read_on >= thread.last_post_on:
+                thread.is_read = True
+
 
 def make_thread_read_aware(user, thread):
     thread.is_read = True
@@ -103,6 +113,9 @@ def make_thread_read_aware(user, thread):
                     thread.read_record = thread_record
                 except ThreadRead.DoesNotExist:
                     pass
+
+                if settings.MISAGO_READTRACKER_BUFFER:
+                    make_thread_buffered_read_aware(user, thread)
             else:
                 thread.is_read = True
                 thread.is_new = False
@@ -110,6 +123,15 @@ def make_thread_read_aware(user, thread):
             categoriestracker.start_record(user, thread.category)
 
 
+def make_thread_buffered_read_aware(user, thread):
+    buffered_read_on = buffer.get_read(user, thread)
+    if buffered_read_on and buffered_read_on > thread.last_read_on:
+        thread.last_read_on = buffered_read_on
+        thread.is_new = False
+        if thread.last_post_on <= buffered_read_on:
+            thread.is_read = True
+
+
 def make_posts_read_aware(user, thread, posts):
     try:
         is_thread_read = thread.is_read
@@ -131,7 +153,24 @@ def make_posts_read_aware(user, thread, posts):
 def read_thread(user, thread, last_read_reply):
     if not thread.is_read:
         if thread.last_read_on < last_read_reply.posted_on:
-            sync_record(user, thread, last_read_reply)
+            if settings.MISAGO_READTRACKER_BUFFER:
+                buffer_record(user, thread, last_read_reply)
+            else:
+                sync_record(user, thread, last_read_reply)
+
+
+def buffer_record(user, thread, last_read_reply):
+    """
+    Buffers read and sends signals sync_record would send, categories
+    read records are synced when buffered read is flushed
+    """
+    buffer.record(user, thread, last_read_reply.posted_on)
+
+    if thread.is_new:
+        signals.thread_tracked.send(sender=user, thread=thread)
+
+    if last_read_reply.posted_on == thread.last_post_on:
+        signals.thread_read.send(sender=user, thread=thread)
 
 
 @atomic
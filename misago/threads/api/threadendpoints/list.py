@@ -1,4 +1,5 @@
 from django.http import Http404
+from django.utils.decorators import method_decorator
 from rest_framework.response import Response
 
 from misago.acl import add_acl
@@ -6,11 +7,14 @@ from misago.categories.models import CATEGORIES_TREE_ID, Category
 from misago.categories.permissions import (
     allow_see_category, allow_browse_category)
 from misago.categories.serializers import BasicCategorySerializer
+from misago.core.fpc import anonymous_fpc
 from misago.core.shortcuts import (
-    get_int_or_404, get_object_or_404, paginate, pagination_dict)
+    cursor_pagination_dict, get_int_or_404, get_object_or_404, paginate,
+    paginate_cursor, pagination_dict)
 from misago.readtracker import threadstracker
 
 from misago.threads.mixins.threadslists import ThreadsListMixin
+from misago.threads.pinned import get_pinned_threads
 from misago.threads.serializers import ThreadListSerializer
 from misago.threads.subscriptions import make_subscription_aware
 from misago.threads.utils import add_categories_to_threads
@@ -35,12 +39,24 @@ class BaseListEndpoint(object):
             category__in=threads_categories
         )
 
+    def get_cursors(self, request):
+        cursors = {}
+        for cursor in ('before', 'after'):
+            if request.query_params.get(cursor):
+                cursors[cursor] = get_int_or_404(request.query_params[cursor])
+        if len(cursors) > 1:
+            raise Http404()
+        return cursors
+
+    @method_decorator(anonymous_fpc)
     def __call__(self, request):
         try:
             page = int(request.query_params.get('page', 0))
         except ValueError:
             raise Http404()
 
+        cursors = self.get_cursors(request)
+
         list_type = request.query_params.get('list') or 'all'
         if list_type not in LIST_TYPES:
             raise Http404()
@@ -57,17 +73,33 @@ class BaseListEndpoint(object):
         rest_queryset = self.get_rest_queryset(
             category, queryset, threads_categories)
 
-        page = paginate(rest_queryset, page, 24, 6,
-            allow_explicit_first_page=True
-        )
-        response_dict = pagination_dict(page, include_page_range=False)
-
-        if page.number > 1:
+        if cursors:
+            # cursor mode seeks over last_post_id index instead of counting
+            # and offsetting, which keeps infinite scroll fast on any depth
+            page = paginate_cursor(rest_queryset, 24, 'last_post_id', **cursors)
+            response_dict = cursor_pagination_dict(page)
             threads = list(page.object_list)
         else:
-            pinned_threads = self.get_pinned_threads(
-                category, queryset, threads_categories)
-            threads = list(pinned_threads) + list(page.object_list)
+            threads_count = self.get_threads_count(request, category,
+                threads_categories, list_type, rest_queryset)
+
+            page = paginate(rest_queryset, page, 24, 6,
+                allow_explicit_first_page=True,
+                count=threads_count
+            )
+            response_dict = pagination_dict(page, include_page_range=False)
+
+            if page.number > 1:
+                threads = list(page.object_list)
+            else:
+                pinned_threads = self.get_pinned_threads(
+                    category, queryset, threads_categories)
+                threads = list(pinned_threads) + list(page.object_list)
+
+            if page.has_next():
+                response_dict['next_cursor'] = page[-1].last_post_id
+            else:
+                response_dict['next_cursor'] = None
 
         if list_type in ('new', 'unread'):
             """we already know all threads on list are unread"""
@@ -77,12 +109,12 @@ class BaseListEndpoint(object):
                 request.user, threads)
         add_categories_to_threads(category, categories, threads)
 
-        visible_subcategories = []
+        threads_categories_ids = set(c.pk for c in threads_categories)
+        visible_subcategories = set()
         for thread in threads:
             if (thread.top_category and
-                    thread.category in threads_categories and
-                    thread.top_category not in visible_subcategories):
-                visible_subcategories.append(thread.top_category.pk)
+                    thread.category_id in threads_categories_ids):
+                visible_subcategories.add(thread.top_category.pk)
 
         if self.serialize_subcategories:
             response_dict['subcategories'] = []
@@ -119,21 +151,8 @@ class ThreadsListEndpoint(ThreadsListMixin, BaseListEndpoint):
         else:
             return categories[0]
 
-    def get_subcategories(self, category, categories):
-        subcategories = []
-        for subcategory in categories:
-            if category.has_child(subcategory):
-                subcategories.append(subcategory)
-        return subcategories
-
     def get_pinned_threads(self, category, queryset, threads_categories):
-        if category.level:
-            return list(queryset.filter(weight=2)) + list(queryset.filter(
-                weight=1,
-                category__in=threads_categories
-            ))
-        else:
-            return queryset.filter(weight=2)
+        return get_pinned_threads(queryset, category, threads_categories)
 
 
     def get_rest_queryset(self, category, queryset, threads_categories):
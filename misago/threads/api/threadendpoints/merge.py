@@ -7,6 +7,7 @@ from rest_framework.response import Response
 from misago.acl import add_acl
 from misago.categories.models import CATEGORIES_TREE_ID, Category
 from misago.categories.permissions import can_see_category, can_browse_category
+from misago.categories.synchronization import synchronize_categories
 
 from misago.threads.models import Thread
 from misago.threads.permissions import can_see_thread
@@ -109,9 +110,7 @@ def merge_threads(user, validated_data, threads):
     if new_thread.category not in categories:
         categories.append(new_thread.category)
 
-    for category in categories:
-        category.synchronize()
-        category.save()
+    synchronize_categories([c.pk for c in categories])
 
     # set extra attrs on thread for UI
     new_thread.is_read = False
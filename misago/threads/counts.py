@@ -1,3 +1,12 @@
+import time
+from functools import partial
+from hashlib import md5
+
+from misago.conf import settings
+from misago.core.cache import cache, invalidate_on_commit
+from misago.core.pgutils import count_estimate
+
+
 def sync_user_unread_private_threads_count(user):
     if not user.sync_unread_private_threads:
         return
@@ -9,4 +18,118 @@ def sync_user_unread_private_threads_count(user):
     user.save(update_fields=[
         'unread_private_threads',
         'sync_unread_private_threads'
-    ])
\ No newline at end of file
+    ])
+
+"""
+Threads lists counts
+
+Counting threads on list is expensive, yet its result is used only to
+display number of pages. Counts are cached per category, list type and
+user's ACL key, and invalidated by bumping version of category that had
+threads added, moved, pinned, hidden or approved, once more after that
+change is committed. Users that can see their own unapproved or hidden
+threads get counts cached separately. Pages are never sliced by those
+counts, so stale or approximate count only misstates number of pages.
+"""
+CACHEABLE_LISTS = ('all', )
+USER_VISIBILITY_GROUPS = (
+    'show_accepted_visible',
+    'show_accepted',
+    'show_owned',
+    'show_owned_visible',
+)
+COUNTS_CACHE_KEY = 'misago_threads_count'
+VERSION_CACHE_KEY = 'misago_threads_count_version'
+
+
+def get_threads_list_count(user, category, threads_categories, list_type,
+                           queryset):
+    if list_type not in CACHEABLE_LISTS:
+        return queryset.count()
+
+    cache_key = get_threads_list_count_key(
+        user, category, threads_categories, list_type)
+
+    threads_count = cache.get(cache_key)
+    if threads_count is None:
+        threads_count = count_threads(queryset)
+        cache.set(cache_key, threads_count)
+    return threads_count
+
+
+def count_threads(queryset):
+    approximate_from = settings.MISAGO_THREADS_LIST_APPROXIMATE_COUNT
+    if approximate_from:
+        estimated_count = count_estimate(queryset)
+        if estimated_count > approximate_from:
+            return estimated_count
+    return queryset.count()
+
+
+def get_threads_list_count_key(user, category, threads_categories, list_type):
+    versions_keys = []
+    for threads_category in threads_categories:
+        versions_keys.append(get_version_key(threads_category.pk))
+
+    versions = cache.get_many(versions_keys)
+    for version_key in versions_keys:
+        if version_key not in versions:
+            versions[version_key] = reset_version(version_key)
+
+    if is_count_user_specific(user, threads_categories):
+        user_key = str(user.pk)
+    else:
+        user_key = ''
+
+    key_hash = md5(','.join([
+        str(category.pk),
+        list_type,
+        user.acl_key,
+        user_key,
+    ] + [str(versions[k]) for k in versions_keys])).hexdigest()
+
+    return '%s_%s' % (COUNTS_CACHE_KEY, key_hash)
+
+
+def is_count_user_specific(user, threads_categories):
+    """
+    Returns true if threads visible to user include their own threads that
+    other users with same ACL can't see
+    """
+    from misago.threads.permissions.threads import get_threads_visibility
+
+    if user.is_anonymous():
+        return False
+
+    visibility = get_threads_visibility(user, threads_categories)
+    for group in USER_VISIBILITY_GROUPS:
+        if visibility[group]:
+            return True
+    return False
+
+
+def get_version_key(category_id):
+    return '%s_%s' % (VERSION_CACHE_KEY, category_id)
+
+
+def reset_version(version_key):
+    """
+    Versions are started from current time, so category losing its version
+    from cache never gets count cached for its earlier version
+    """
+    version = int(time.time() * 1000)
+    cache.set(version_key, version, None)
+    return version
+
+
+def invalidate_threads_counts(categories_ids):
+    invalidate_on_commit(partial(bump_versions, set(categories_ids)))
+
+
+def bump_versions(categories_ids):
+    for category_id in categories_ids:
+        version_key = get_version_key(category_id)
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            reset_version(version_key)
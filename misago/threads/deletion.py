@@ -0,0 +1,154 @@
+"""
+Bulk content deletion
+
+Deleting threads and posts one by one fires signals and resyncs affected
+threads and categories for every item deleted. ContentDeletion deletes
+them in chunks of ids instead. Rows depending on deleted threads and posts
+are deleted with raw queryset deletes filtered by those ids, so no rows are
+collected and no per-instance signals are sent. Threads and categories that
+had content removed are remembered, so those can be synchronized and caches
+invalidated once when deletion is done.
+"""
+from django.db import transaction
+
+from misago.categories.models import Category
+from misago.categories.synchronization import synchronize_categories
+from misago.core import fpc
+from misago.core.pgutils import keyset_chunks
+from misago.readtracker.models import ThreadRead
+
+from misago.threads.counts import invalidate_threads_counts
+from misago.threads.models import (
+    Event, Post, Subscription, Thread, ThreadParticipant)
+from misago.threads.pinned import invalidate_pinned_threads
+from misago.threads.synchronization import synchronize_threads
+
+
+def raw_delete(queryset):
+    """
+    Deletes queryset rows in single query, without collecting them
+    """
+    queryset._raw_delete(queryset.db)
+
+
+class ContentDeletion(object):
+    def __init__(self, chunk_size=500):
+        self.chunk_size = chunk_size
+
+        self.deleted_threads = set()
+        self.deleted_posts = 0
+
+        self.changed_threads = set()
+        self.changed_categories = set()
+
+        self.has_pinned_threads = False
+
+    def delete_threads(self, queryset, limit=None):
+        """
+        Deletes threads in queryset, returns number of deleted threads
+        """
+        deleted = 0
+        queryset = queryset.only('id', 'category_id', 'weight')
+        for chunk in self.get_chunks(queryset, limit):
+            threads_ids = []
+            for thread in chunk:
+                threads_ids.append(thread.pk)
+                self.changed_categories.add(thread.category_id)
+                if thread.weight:
+                    self.has_pinned_threads = True
+
+            with transaction.atomic():
+                self.delete_threads_rows(threads_ids)
+
+            self.deleted_threads.update(threads_ids)
+            deleted += len(threads_ids)
+        return deleted
+
+    def delete_threads_rows(self, threads_ids):
+        Category.objects.filter(last_thread_id__in=threads_ids).update(
+            last_thread=None)
+
+        posts = Post.objects.filter(thread_id__in=threads_ids)
+        raw_delete(Post.mentions.through.objects.filter(post__in=posts))
+        raw_delete(posts)
+
+        for model in (Event, Subscription, ThreadParticipant, ThreadRead):
+            raw_delete(model.objects.filter(thread_id__in=threads_ids))
+
+        raw_delete(Thread.objects.filter(id__in=threads_ids))
+
+    def delete_posts(self, queryset, limit=None):
+        """
+        Deletes posts in queryset, returns number of deleted posts
+        """
+        deleted = 0
+        queryset = queryset.only('id', 'category_id', 'thread_id')
+        for chunk in self.get_chunks(queryset, limit):
+            posts_ids = []
+            for post in chunk:
+                posts_ids.append(post.pk)
+                self.changed_categories.add(post.category_id)
+                self.changed_threads.add(post.thread_id)
+
+            with transaction.atomic():
+                self.delete_posts_rows(posts_ids)
+
+            deleted += len(posts_ids)
+        self.deleted_posts += deleted
+        return deleted
+
+    def delete_posts_rows(self, posts_ids):
+        # threads are left without first or last post until synchronized
+        Thread.objects.filter(first_post_id__in=posts_ids).update(
+            first_post=None)
+        Thread.objects.filter(last_post_id__in=posts_ids).update(
+            last_post=None)
+
+        raw_delete(Post.mentions.through.objects.filter(
+            post_id__in=posts_ids))
+        raw_delete(Post.objects.filter(id__in=posts_ids))
+
+    def get_chunks(self, queryset, limit):
+        chunk_size = self.chunk_size
+        if limit is not None:
+            if limit < 1:
+                return
+            chunk_size = min(chunk_size, limit)
+
+        remaining = limit
+        for chunk in keyset_chunks(queryset, chunk_size):
+            if remaining is not None:
+                chunk = chunk[:remaining]
+                remaining -= len(chunk)
+
+            yield chunk
+            if remaining == 0:
+                break
+
+    def synchronize(self):
+        """
+        Synchronizes threads and categories that had content deleted
+        """
+        changed_threads = self.changed_threads - self.deleted_threads
+        if changed_threads:
+            # threads may lose their last post when all posts are deleted
+            empty_threads = changed_threads - set(Post.objects.filter(
+                thread_id__in=changed_threads).order_by().values_list(
+                    'thread_id', flat=True).distinct())
+            if empty_threads:
+                self.delete_threads(Thread.objects.filter(
+                    id__in=empty_threads))
+
+            synchronize_threads(changed_threads - empty_threads)
+
+        if self.changed_categories:
+            invalidate_threads_counts(self.changed_categories)
+            synchronize_categories(self.changed_categories)
+            fpc.invalidate()
+
+        if self.has_pinned_threads:
+            invalidate_pinned_threads()
+
+        self.changed_threads = set()
+        self.changed_categories = set()
+        self.has_pinned_threads = False
@@ -1,39 +1,117 @@
 import time
+from multiprocessing import Pool
 
 from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Max, Min
 
 from misago.core.management.progressbar import show_progress
-from misago.core.pgutils import batch_update
 
 from misago.threads.models import Thread
+from misago.threads.synchronization import synchronize_threads
+
+
+def synchronize_threads_range(ids_range):
+    """
+    Synchronizes threads in ids range, returns tuple of number of
+    synchronized threads and list of ids of threads without posts
+    """
+    start, end = ids_range
+    queryset = Thread.objects.filter(id__gte=start, id__lt=end)
+
+    threads_ids = list(queryset.values_list('id', flat=True))
+    synchronized = synchronize_threads(threads_ids)
+
+    if synchronized < len(threads_ids):
+        empty_threads = list(queryset.filter(
+            post__isnull=True).values_list('id', flat=True))
+    else:
+        empty_threads = []
+    return synchronized, empty_threads
 
 
 class Command(BaseCommand):
     help = 'Synchronizes threads'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            dest='processes',
+            type=int,
+            default=1,
+            help='Number of processes synchronizing threads.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=500,
+            help='Range of threads ids synchronized in single step.',
+        )
+
     def handle(self, *args, **options):
         threads_to_sync = Thread.objects.count()
 
         if not threads_to_sync:
             self.stdout.write('\n\nNo threads were found')
         else:
-            self.sync_threads(threads_to_sync)
+            self.sync_threads(
+                threads_to_sync,
+                options.get('processes') or 1,
+                options.get('chunk_size') or 500,
+            )
 
-    def sync_threads(self, threads_to_sync):
+    def sync_threads(self, threads_to_sync, processes, chunk_size):
         message = 'Synchronizing %s threads...\n'
         self.stdout.write(message % threads_to_sync)
 
         message = '\n\nSynchronized %s threads'
 
+        ids_ranges = self.get_ids_ranges(chunk_size)
+
         synchronized_count = 0
+        empty_threads = []
         show_progress(self, synchronized_count, threads_to_sync)
         start_time = time.time()
-        for thread in batch_update(Thread.objects.all()):
-            thread.synchronize()
-            thread.save()
 
-            synchronized_count += 1
-            show_progress(
-                self, synchronized_count, threads_to_sync, start_time)
+        if processes > 1:
+            # forked processes can't share parent's database connection
+            connections.close_all()
+
+            pool = Pool(processes)
+            try:
+                results = pool.imap_unordered(
+                    synchronize_threads_range, ids_ranges)
+                for synchronized, empty in results:
+                    synchronized_count += synchronized
+                    empty_threads += empty
+                    show_progress(
+                        self, synchronized_count, threads_to_sync, start_time)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for ids_range in ids_ranges:
+                synchronized, empty = synchronize_threads_range(ids_range)
+                synchronized_count += synchronized
+                empty_threads += empty
+                show_progress(
+                    self, synchronized_count, threads_to_sync, start_time)
+
+        if empty_threads:
+            # threads without posts have nothing to be synchronized from
+            self.stdout.write('\n\nSkipped %s threads without posts: %s' % (
+                len(empty_threads),
+                ', '.join([str(i) for i in sorted(empty_threads)]),
+            ))
 
         self.stdout.write(message % synchronized_count)
+
+    def get_ids_ranges(self, chunk_size):
+        ids = Thread.objects.aggregate(Min('id'), Max('id'))
+        first_id, last_id = ids['id__min'], ids['id__max']
+
+        ids_ranges = []
+        for start in range(first_id, last_id + 1, chunk_size):
+            ids_ranges.append((start, min(start + chunk_size, last_id + 1)))
+        return ids_ranges
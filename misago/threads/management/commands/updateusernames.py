@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from misago.threads import usernames
+
+
+class Command(BaseCommand):
+    help = 'Updates usernames on content of renamed users'
+
+    def handle(self, *args, **options):
+        updated_count = usernames.flush()
+        self.stdout.write('Renamed users updated: %s' % updated_count)
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from misago.core.pgutils import CreatePartialCompositeIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misago_threads', '0002_threads_settings'),
+    ]
+
+    operations = [
+        CreatePartialCompositeIndex(
+            model='Thread',
+            fields=('category_id', 'last_post_id'),
+            index_name='misago_thread_list_visible_partial',
+            condition='weight < 2 AND is_hidden = FALSE AND is_unapproved = FALSE',
+        ),
+        CreatePartialCompositeIndex(
+            model='Thread',
+            fields=('category_id', 'last_post_id'),
+            index_name='misago_thread_list_partial',
+            condition='weight < 2',
+        ),
+        CreatePartialCompositeIndex(
+            model='Thread',
+            fields=('category_id', 'last_post_id'),
+            index_name='misago_thread_list_unapproved_partial',
+            condition='has_unapproved_posts = TRUE',
+        ),
+        CreatePartialCompositeIndex(
+            model='Thread',
+            fields=('category_id', 'last_post_id'),
+            index_name='misago_thread_list_reported_partial',
+            condition='has_reported_posts = TRUE',
+        ),
+    ]
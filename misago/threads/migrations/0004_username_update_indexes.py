@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from misago.core.pgutils import CreatePartialCompositeIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misago_threads', '0003_thread_list_indexes'),
+    ]
+
+    operations = [
+        CreatePartialCompositeIndex(
+            model='Thread',
+            fields=('starter_id', 'id'),
+            index_name='misago_thread_starter_partial',
+            condition='starter_id IS NOT NULL',
+        ),
+        CreatePartialCompositeIndex(
+            model='Thread',
+            fields=('last_poster_id', 'id'),
+            index_name='misago_thread_last_poster_partial',
+            condition='last_poster_id IS NOT NULL',
+        ),
+        CreatePartialCompositeIndex(
+            model='Post',
+            fields=('poster_id', 'id'),
+            index_name='misago_post_poster_partial',
+            condition='poster_id IS NOT NULL',
+        ),
+        CreatePartialCompositeIndex(
+            model='Post',
+            fields=('last_editor_id', 'id'),
+            index_name='misago_post_last_editor_partial',
+            condition='last_editor_id IS NOT NULL',
+        ),
+        CreatePartialCompositeIndex(
+            model='Event',
+            fields=('author_id', 'id'),
+            index_name='misago_event_author_partial',
+            condition='author_id IS NOT NULL',
+        ),
+    ]
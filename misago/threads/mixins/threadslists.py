@@ -12,6 +12,7 @@ from misago.categories.permissions import (
 from misago.core.shortcuts import get_object_or_404, validate_slug
 from misago.readtracker import threadstracker
 
+from misago.threads.counts import get_threads_list_count
 from misago.threads.models import Thread
 from misago.threads.permissions import exclude_invisible_threads
 
@@ -124,18 +125,22 @@ class ThreadsListMixin(object):
                                          "unapproved content lists."))
 
     def get_categories(self, request):
-        return [Category.objects.root_category()] + list(
-            Category.objects.all_categories().filter(
-                id__in=request.user.acl['visible_categories']
-            ).select_related('parent'))
+        catalogue = Category.objects.get_catalogue()
 
-    def get_subcategories(self, request, category, all_categories):
-        if category.is_leaf_node():
-            return []
+        categories_ids = set(request.user.acl['visible_categories'])
+        categories_ids.add(catalogue.get_root().pk)
 
-        visible_categories = request.user.acl['visible_categories']
-        queryset = category.get_descendants().filter(id__in=visible_categories)
-        return list(queryset.order_by('lft'))
+        return catalogue.get_categories(categories_ids)
+
+    def get_subcategories(self, category, categories):
+        catalogue = Category.objects.get_catalogue()
+        descendants_ids = set(catalogue.get_descendants_ids(category.pk))
+
+        subcategories = []
+        for subcategory in categories:
+            if subcategory.pk in descendants_ids:
+                subcategories.append(subcategory)
+        return subcategories
 
     def get_queryset(self, request, categories, list_type):
         # [:1] cos we are cutting off root caregory on forum threads list
@@ -145,6 +150,11 @@ class ThreadsListMixin(object):
         queryset = get_threads_queryset(request.user, categories, list_type)
         return queryset.order_by('-last_post_id')
 
+    def get_threads_count(self, request, category, threads_categories,
+                          list_type, queryset):
+        return get_threads_list_count(
+            request.user, category, threads_categories, list_type, queryset)
+
     def get_extra_context(self, request, category, subcategories, list_type):
         return {
             'is_index': not settings.MISAGO_CATEGORIES_ON_INDEX
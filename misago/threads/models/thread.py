@@ -2,6 +2,7 @@ from django.db import models, transaction
 from django.utils.translation import ugettext_lazy as _
 
 from misago.conf import settings
+from misago.core.models import ChangesTrackingMixin
 from misago.core.utils import slugify
 
 
@@ -26,7 +27,7 @@ THREAD_WEIGHT_CHOICES = (
 )
 
 
-class Thread(models.Model):
+class Thread(ChangesTrackingMixin, models.Model):
     category = models.ForeignKey('misago_categories.Category')
     title = models.CharField(max_length=255)
     slug = models.CharField(max_length=255)
@@ -123,36 +124,16 @@ class Thread(models.Model):
         move_thread.send(sender=self)
 
     def synchronize(self):
-        self.replies = self.post_set.filter(is_unapproved=False).count()
-        if self.replies > 0:
-            self.replies -= 1
+        from misago.threads.synchronization import get_thread_synchronization
 
-        reported_post_qs = self.post_set.filter(has_reports=True)
-        self.has_reported_posts = reported_post_qs.exists()
+        for field, value in get_thread_synchronization(self).items():
+            setattr(self, field, value)
 
-        if self.has_reported_posts:
-            open_reports_qs = self.post_set.filter(has_open_reports=True)
-            self.has_open_reports = open_reports_qs.exists()
-        else:
-            self.has_open_reports = False
-
-        unapproved_post_qs = self.post_set.filter(is_unapproved=True)
-        self.has_unapproved_posts = unapproved_post_qs.exists()
-
-        hidden_post_qs = self.post_set.filter(is_hidden=True)[:1]
-        self.has_hidden_posts = hidden_post_qs.exists()
-
-        self.has_events = self.event_set.exists()
-
-        first_post = self.post_set.order_by('id')[:1][0]
-        self.set_first_post(first_post)
-
-        last_post_qs = self.post_set.filter(is_unapproved=False).order_by('-id')
-        last_post = last_post_qs[:1]
-        if last_post:
-            self.set_last_post(last_post[0])
-        else:
-            self.set_last_post(first_post)
+        for field in ('first_post', 'starter', 'last_post', 'last_poster'):
+            cache_name = self._meta.get_field(field).get_cache_name()
+            cached = getattr(self, cache_name, None)
+            if cached and cached.pk != getattr(self, '%s_id' % field):
+                delattr(self, cache_name)
 
     @property
     def thread_type(self):
@@ -2,7 +2,13 @@ from django.db.transaction import atomic
 from django.utils import timezone
 from django.utils.translation import ugettext as _
 
+from misago.categories.synchronization import (
+    add_thread_to_category, remove_thread_from_category,
+    synchronize_categories)
+
+from misago.threads.counts import invalidate_threads_counts
 from misago.threads.events import record_event
+from misago.threads.pinned import invalidate_pinned_threads
 
 
 @atomic
@@ -13,6 +19,9 @@ def pin_thread_globally(user, thread):
 
         thread.weight = 2
         thread.save(update_fields=['has_events', 'weight'])
+
+        invalidate_pinned_threads()
+        invalidate_threads_counts([thread.category_id])
         return True
     else:
         return False
@@ -26,6 +35,9 @@ def pin_thread_locally(user, thread):
 
         thread.weight = 1
         thread.save(update_fields=['has_events', 'weight'])
+
+        invalidate_pinned_threads()
+        invalidate_threads_counts([thread.category_id])
         return True
     else:
         return False
@@ -39,6 +51,9 @@ def unpin_thread(user, thread):
 
         thread.weight = 0
         thread.save(update_fields=['has_events', 'weight'])
+
+        invalidate_pinned_threads()
+        invalidate_threads_counts([thread.category_id])
         return True
     else:
         return False
@@ -53,8 +68,18 @@ def move_thread(user, thread, new_category):
             'category': thread.category
         })
 
+        invalidate_threads_counts([thread.category_id, new_category.pk])
+
+        old_category_id = thread.category_id
         thread.move(new_category)
         thread.save(update_fields=['has_events', 'category'])
+
+        remove_thread_from_category(old_category_id, thread)
+        add_thread_to_category(new_category.pk, thread)
+
+        if thread.weight:
+            invalidate_pinned_threads()
+        invalidate_threads_counts([thread.category_id])
         return True
     else:
         return False
@@ -70,6 +95,8 @@ def merge_thread(user, thread, other_thread):
 
     thread.merge(other_thread)
     other_thread.delete()
+
+    synchronize_categories([thread.category_id, other_thread.category_id])
     return True
 
 
@@ -79,11 +106,17 @@ def approve_thread(user, thread):
         message = _("%(user)s approved thread.")
         record_event(user, thread, "check", message, {'user': user})
 
+        remove_thread_from_category(thread.category_id, thread)
+
         thread.is_closed = False
         thread.first_post.is_unapproved = False
         thread.first_post.save(update_fields=['is_unapproved'])
         thread.synchronize()
         thread.save(update_fields=['has_events', 'is_unapproved'])
+
+        add_thread_to_category(thread.category_id, thread)
+
+        invalidate_threads_counts([thread.category_id])
         return True
     else:
         return False
@@ -127,6 +160,8 @@ def unhide_thread(user, thread):
         thread.save(update_fields=['has_events', 'is_hidden'])
         thread.synchronize()
         thread.save()
+
+        invalidate_threads_counts([thread.category_id])
         return True
     else:
         return False
@@ -153,6 +188,8 @@ def hide_thread(user, thread):
 
         thread.is_hidden = True
         thread.save(update_fields=['has_events', 'is_hidden'])
+
+        invalidate_threads_counts([thread.category_id])
         return True
     else:
         return False
@@ -161,4 +198,5 @@ def hide_thread(user, thread):
 @atomic
 def delete_thread(user, thread):
     thread.delete()
+    remove_thread_from_category(thread.category_id, thread)
     return True
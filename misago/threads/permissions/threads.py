@@ -1,10 +1,12 @@
+from hashlib import md5
+
 from django.core.exceptions import PermissionDenied
 from django.db.models import Q
 from django.http import Http404
 from django.utils import timezone
 from django.utils.translation import ungettext, ugettext_lazy as _
 
-from misago.acl import add_acl, algebra
+from misago.acl import add_acl, algebra, get_acl_memo, set_acl_memo
 from misago.acl.decorators import return_boolean
 from misago.acl.models import Role
 from misago.categories.models import Category, RoleCategoryACL, CategoryRole
@@ -747,54 +749,22 @@ def exclude_invisible_category_threads(queryset, user, category):
 
 
 def exclude_invisible_threads(user, categories, queryset):
-    show_all = []
-    show_accepted_visible = []
-    show_accepted = []
-    show_visible = []
-    show_owned = []
-    show_owned_visible = []
-
-    for category in categories:
-        add_acl(user, category)
-
-        if not (category.acl['can_see'] and category.acl['can_browse']):
-            continue
-
-        can_hide = category.acl['can_hide_threads']
-        if category.acl['can_see_all_threads']:
-            can_mod = category.acl['can_approve_content']
-
-            if can_mod and can_hide:
-                show_all.append(category)
-            elif user.is_authenticated():
-                if not can_mod and not can_hide:
-                    show_accepted_visible.append(category)
-                elif not can_mod:
-                    show_accepted.append(category)
-                elif not can_hide:
-                    show_visible.append(category)
-            else:
-                show_accepted_visible.append(category)
-        elif user.is_authenticated():
-            if can_hide:
-                show_owned.append(category)
-            else:
-                show_owned_visible.append(category)
+    visibility = get_threads_visibility(user, categories)
 
     conditions = None
-    if show_all:
-        conditions = Q(category__in=show_all)
+    if visibility['show_all']:
+        conditions = Q(category_id__in=visibility['show_all'])
 
-    if show_accepted_visible:
+    if visibility['show_accepted_visible']:
         if user.is_authenticated():
             condition = Q(
-                Q(starter=user) | Q(is_unapproved=False),
-                category__in=show_accepted_visible,
+                Q(starter_id=user.pk) | Q(is_unapproved=False),
+                category_id__in=visibility['show_accepted_visible'],
                 is_hidden=False,
             )
         else:
             condition = Q(
-                category__in=show_accepted_visible,
+                category_id__in=visibility['show_accepted_visible'],
                 is_hidden=False,
                 is_unapproved=False,
             )
@@ -804,10 +774,10 @@ def exclude_invisible_threads(user, categories, queryset):
         else:
             conditions = condition
 
-    if show_accepted:
+    if visibility['show_accepted']:
         condition = Q(
-            Q(starter=user) | Q(is_unapproved=False),
-            category__in=show_accepted,
+            Q(starter_id=user.pk) | Q(is_unapproved=False),
+            category_id__in=visibility['show_accepted'],
         )
 
         if conditions:
@@ -815,26 +785,32 @@ def exclude_invisible_threads(user, categories, queryset):
         else:
             conditions = condition
 
-    if show_visible:
-        condition = Q(category__in=show_visible, is_hidden=False)
+    if visibility['show_visible']:
+        condition = Q(
+            category_id__in=visibility['show_visible'],
+            is_hidden=False,
+        )
 
         if conditions:
             conditions = conditions | condition
         else:
             conditions = condition
 
-    if show_owned:
-        condition = Q(category__in=show_owned, starter=user)
+    if visibility['show_owned']:
+        condition = Q(
+            category_id__in=visibility['show_owned'],
+            starter_id=user.pk,
+        )
 
         if conditions:
             conditions = conditions | condition
         else:
             conditions = condition
 
-    if show_owned_visible:
+    if visibility['show_owned_visible']:
         condition = Q(
-            category__in=show_owned_visible,
-            starter=user,
+            category_id__in=visibility['show_owned_visible'],
+            starter_id=user.pk,
             is_hidden=False,
         )
 
@@ -849,6 +825,69 @@ def exclude_invisible_threads(user, categories, queryset):
         return Thread.objects.none()
 
 
+def get_threads_visibility(user, categories):
+    """
+    Returns ids of categories grouped by rules of threads visibility
+
+    Grouping depends only on user's ACL, so its memoized with it for every
+    set of categories, leaving only user id to be filled per request.
+    """
+    categories_key = ','.join(sorted(str(c.pk) for c in categories))
+    memo_name = 'threads_visibility_%s' % md5(categories_key).hexdigest()
+
+    visibility = get_acl_memo(user, memo_name)
+    if visibility is None:
+        visibility = build_threads_visibility(user, categories)
+        set_acl_memo(user, memo_name, visibility)
+    return visibility
+
+
+def build_threads_visibility(user, categories):
+    visibility = {
+        'show_all': [],
+        'show_accepted_visible': [],
+        'show_accepted': [],
+        'show_visible': [],
+        'show_owned': [],
+        'show_owned_visible': [],
+    }
+
+    for category in categories:
+        add_acl(user, category)
+
+        if not (category.acl['can_see'] and category.acl['can_browse']):
+            continue
+
+        can_hide = category.acl['can_hide_threads']
+        if category.acl['can_see_all_threads']:
+            can_mod = category.acl['can_approve_content']
+
+            if can_mod and can_hide:
+                group = 'show_all'
+            elif user.is_authenticated():
+                if not can_mod and not can_hide:
+                    group = 'show_accepted_visible'
+                elif not can_mod:
+                    group = 'show_accepted'
+                elif not can_hide:
+                    group = 'show_visible'
+            else:
+                group = 'show_accepted_visible'
+        elif user.is_authenticated():
+            if can_hide:
+                group = 'show_owned'
+            else:
+                group = 'show_owned_visible'
+        else:
+            continue
+
+        visibility[group].append(category.pk)
+
+    for group in visibility.values():
+        group.sort()
+    return visibility
+
+
 def exclude_invisible_posts(queryset, user, category):
     if not category.acl['can_approve_content']:
         if user.is_authenticated():
@@ -0,0 +1,64 @@
+"""
+Pinned threads sets
+
+Pinned threads change rarely, yet lists used to run two queries for them
+on every first page. Ids of threads pinned globally and locally are kept
+in single cache entry, that is deleted whenever thread is pinned, unpinned,
+moved or deleted, and once more after that change is committed. Lists then
+select pinned threads from their visible queryset by those ids, or skip this
+query altogether if there are none.
+"""
+from misago.core.cache import cache, invalidate_on_commit
+
+from misago.threads.models import Thread
+
+
+PINNED_CACHE_KEY = 'misago_pinned_threads'
+
+
+def get_pinned_threads(queryset, category, threads_categories):
+    pinned_ids = get_pinned_threads_ids(category, threads_categories)
+    if not pinned_ids:
+        return []
+
+    queryset = queryset.filter(id__in=pinned_ids)
+    return list(queryset.order_by('-weight', '-last_post_id'))
+
+
+def get_pinned_threads_ids(category, threads_categories):
+    pinned = get_pinned_threads_dict()
+
+    pinned_ids = list(pinned['global'])
+    if category.level:
+        for threads_category in threads_categories:
+            pinned_ids += pinned['local'].get(threads_category.pk, [])
+    return pinned_ids
+
+
+def get_pinned_threads_dict():
+    pinned = cache.get(PINNED_CACHE_KEY)
+    if pinned is None:
+        pinned = get_pinned_threads_dict_from_db()
+        cache.set(PINNED_CACHE_KEY, pinned, None)
+    return pinned
+
+
+def get_pinned_threads_dict_from_db():
+    pinned = {'global': [], 'local': {}}
+
+    queryset = Thread.objects.filter(weight__gt=0)
+    for thread_id, category_id, weight in queryset.values_list(
+            'id', 'category_id', 'weight'):
+        if weight == 2:
+            pinned['global'].append(thread_id)
+        else:
+            pinned['local'].setdefault(category_id, []).append(thread_id)
+    return pinned
+
+
+def invalidate_pinned_threads():
+    invalidate_on_commit(delete_pinned_threads)
+
+
+def delete_pinned_threads():
+    cache.delete(PINNED_CACHE_KEY)
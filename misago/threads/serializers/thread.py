@@ -1,8 +1,12 @@
-from django.core.urlresolvers import reverse
+from collections import OrderedDict
+
+from django.core.urlresolvers import get_script_prefix, get_urlconf, reverse
+from django.db import models
 from rest_framework import serializers
 
 from misago.categories.serializers import BasicCategorySerializer
 
+from misago.threads import threadtypes
 from misago.threads.models import Thread
 
 
@@ -12,6 +16,19 @@ __all__ = [
 ]
 
 
+URL_PK_PLACEHOLDER = 918273645546372819
+URL_SLUG_PLACEHOLDER = 'misagourlslugplaceholder'
+
+THREAD_URLS = (
+    ('absolute_url', 'get_thread_absolute_url'),
+    ('last_post_url', 'get_thread_last_post_url'),
+    ('new_post_url', 'get_thread_new_post_url'),
+    ('api_url', 'get_thread_api_url'),
+)
+
+_urls_templates = {}
+
+
 class ThreadSerializer(serializers.ModelSerializer):
     category = BasicCategorySerializer()
     is_read = serializers.SerializerMethodField()
@@ -85,6 +102,114 @@ class ThreadSerializer(serializers.ModelSerializer):
             return {}
 
 
+class UrlPlaceholder(object):
+    pk = id = URL_PK_PLACEHOLDER
+    slug = URL_SLUG_PLACEHOLDER
+
+
+def make_url_template(url):
+    url = url.replace('%', '%%')
+    url = url.replace(str(URL_PK_PLACEHOLDER), '%(pk)s')
+    return url.replace(URL_SLUG_PLACEHOLDER, '%(slug)s')
+
+
+def get_urls_templates():
+    """
+    Returns dict of url templates used by threads lists, reversed once
+    per script prefix and urlconf. Only thread types that declare
+    supports_url_templates get templates, threads of other types are
+    serialized field by field instead.
+    """
+    cache_key = (get_script_prefix(), get_urlconf())
+    if cache_key not in _urls_templates:
+        user_url = reverse('misago:user', kwargs={
+            'slug': URL_SLUG_PLACEHOLDER,
+            'pk': URL_PK_PLACEHOLDER,
+        })
+
+        threads_urls = {}
+        placeholder = UrlPlaceholder()
+        for thread_type in threadtypes.THREAD_TYPES.values():
+            if not thread_type.supports_url_templates:
+                continue
+
+            type_urls = {}
+            for name, method in THREAD_URLS:
+                url = getattr(thread_type, method)(placeholder)
+                type_urls[name] = make_url_template(url)
+            threads_urls[thread_type.type_name] = type_urls
+
+        _urls_templates[cache_key] = {
+            'user': make_url_template(user_url),
+            'threads': threads_urls,
+        }
+    return _urls_templates[cache_key]
+
+
+class ThreadsListFastSerializer(serializers.ListSerializer):
+    """
+    Builds threads list representation directly from threads attributes
+    and url templates, skipping per-field serializer machinery and url
+    reversing for every thread on list
+    """
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+
+        urls_templates = get_urls_templates()
+        started_on_field = self.child.fields['started_on']
+        last_post_on_field = self.child.fields['last_post_on']
+
+        results = []
+        for thread in iterable:
+            thread_urls = urls_templates['threads'].get(
+                thread.category.thread_type.type_name)
+            if not thread_urls:
+                results.append(self.child.to_representation(thread))
+                continue
+
+            url_kwargs = {'pk': thread.pk, 'slug': thread.slug}
+
+            if thread.last_poster_id:
+                last_poster_url = urls_templates['user'] % {
+                    'pk': thread.last_poster_id,
+                    'slug': thread.last_poster_slug,
+                }
+            else:
+                last_poster_url = None
+
+            top_category = getattr(thread, 'top_category', None)
+            subscription = getattr(thread, 'subscription', None)
+
+            results.append(OrderedDict((
+                ('id', thread.pk),
+                ('category', thread.category_id),
+                ('title', thread.title),
+                ('weight', thread.weight),
+                ('top_category', top_category.pk if top_category else None),
+                ('replies', thread.replies),
+                ('has_unapproved_posts', thread.has_unapproved_posts),
+                ('started_on',
+                    started_on_field.to_representation(thread.started_on)),
+                ('last_post', thread.last_post_id),
+                ('last_poster_name', thread.last_poster_name),
+                ('last_poster_url', last_poster_url),
+                ('last_post_on',
+                    last_post_on_field.to_representation(thread.last_post_on)),
+                ('is_read', getattr(thread, 'is_read', None)),
+                ('is_unapproved', thread.is_unapproved),
+                ('is_hidden', thread.is_hidden),
+                ('is_closed', thread.is_closed),
+                ('absolute_url', thread_urls['absolute_url'] % url_kwargs),
+                ('last_post_url', thread_urls['last_post_url'] % url_kwargs),
+                ('new_post_url', thread_urls['new_post_url'] % url_kwargs),
+                ('subscription',
+                    subscription.send_email if subscription else None),
+                ('api_url', thread_urls['api_url'] % url_kwargs),
+                ('acl', getattr(thread, 'acl', {})),
+            )))
+        return results
+
+
 class ThreadListSerializer(ThreadSerializer):
     category = serializers.PrimaryKeyRelatedField(read_only=True)
     last_post = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -92,6 +217,7 @@ class ThreadListSerializer(ThreadSerializer):
 
     class Meta:
         model = Thread
+        list_serializer_class = ThreadsListFastSerializer
         fields = (
             'id',
             'category',
@@ -1,10 +1,16 @@
 from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver, Signal
 
-from misago.categories.models import Category
-from misago.core.pgutils import batch_update, batch_delete
+from misago.conf import settings
+from misago.core import fpc
+from misago.core.pgutils import batch_update
 
+from misago.threads import usernames
+from misago.threads.counts import invalidate_threads_counts
+from misago.threads.deletion import ContentDeletion
 from misago.threads.models import Thread, Post, Event
+from misago.threads.pinned import invalidate_pinned_threads
 
 
 delete_post = Signal()
@@ -16,9 +22,68 @@ move_thread = Signal()
 remove_thread_participant = Signal(providing_args=["user"])
 
 
+# fields displayed on threads lists cached for guests
+FPC_THREAD_FIELDS = (
+    'category_id',
+    'title',
+    'slug',
+    'weight',
+    'replies',
+    'has_unapproved_posts',
+    'started_on',
+    'last_post_id',
+    'last_post_on',
+    'last_poster_id',
+    'last_poster_name',
+    'last_poster_slug',
+    'starter_id',
+    'starter_name',
+    'starter_slug',
+    'is_unapproved',
+    'is_hidden',
+    'is_closed',
+)
+
+
 """
 Signal handlers
 """
+@receiver(post_save, sender=Thread)
+def invalidate_new_thread_counts(sender, **kwargs):
+    if kwargs['created']:
+        invalidate_threads_counts([kwargs['instance'].category_id])
+
+
+@receiver(post_save, sender=Thread)
+def invalidate_new_thread_pinned(sender, **kwargs):
+    if kwargs['created'] and kwargs['instance'].weight:
+        invalidate_pinned_threads()
+
+
+@receiver(post_delete, sender=Thread)
+def invalidate_deleted_thread_pinned(sender, **kwargs):
+    if kwargs['instance'].weight:
+        invalidate_pinned_threads()
+
+
+@receiver(post_save, sender=Thread)
+def invalidate_saved_thread_fpc(sender, **kwargs):
+    thread = kwargs['instance']
+    if kwargs['created'] or thread.has_changed(
+            FPC_THREAD_FIELDS, kwargs['update_fields']):
+        fpc.invalidate()
+
+
+@receiver(post_delete, sender=Thread)
+def invalidate_deleted_thread_fpc(sender, **kwargs):
+    fpc.invalidate()
+
+
+@receiver(delete_thread)
+def invalidate_deleted_thread_counts(sender, **kwargs):
+    invalidate_threads_counts([sender.category_id])
+
+
 @receiver(merge_thread)
 def merge_threads_posts(sender, **kwargs):
     other_thread = kwargs['other_thread']
@@ -35,14 +100,23 @@ from misago.categories.signals import (delete_category_content,
                                        move_category_content)
 @receiver(delete_category_content)
 def delete_category_threads(sender, **kwargs):
+    invalidate_threads_counts([sender.pk])
+
+    deletion = ContentDeletion()
+
     sender.event_set.all().delete()
-    sender.thread_set.all().delete()
-    sender.post_set.all().delete()
+    deletion.delete_threads(sender.thread_set.all())
+    deletion.delete_posts(sender.post_set.all())
+
+    if deletion.has_pinned_threads:
+        invalidate_pinned_threads()
 
 
 @receiver(move_category_content)
 def move_category_threads(sender, **kwargs):
     new_category = kwargs['new_category']
+    invalidate_threads_counts([sender.pk, new_category.pk])
+    invalidate_pinned_threads()
 
     Thread.objects.filter(category=sender).update(category=new_category)
     Post.objects.filter(category=sender).update(category=new_category)
@@ -52,55 +126,18 @@ def move_category_threads(sender, **kwargs):
 from misago.users.signals import delete_user_content, username_changed
 @receiver(delete_user_content)
 def delete_user_threads(sender, **kwargs):
-    recount_categories = set()
-    recount_threads = set()
-
-    for thread in batch_delete(sender.thread_set.all(), 50):
-        recount_categories.add(thread.category_id)
-        with transaction.atomic():
-            thread.delete()
-
-    for post in batch_delete(sender.post_set.all(), 50):
-        recount_categories.add(post.category_id)
-        recount_threads.add(post.thread_id)
-        with transaction.atomic():
-            post.delete()
-
-    if recount_threads:
-        changed_threads_qs = Thread.objects.filter(id__in=recount_threads)
-        for thread in batch_update(changed_threads_qs, 50):
-            thread.synchronize()
-            thread.save()
-
-    if recount_categories:
-        for category in Category.objects.filter(id__in=recount_categories):
-            category.synchronize()
-            category.save()
+    deletion = ContentDeletion()
+    deletion.delete_threads(sender.thread_set.all())
+    deletion.delete_posts(sender.post_set.all())
+    deletion.synchronize()
 
 
 @receiver(username_changed)
 def update_usernames(sender, **kwargs):
-    Thread.objects.filter(starter=sender).update(
-        starter_name=sender.username,
-        starter_slug=sender.slug
-    )
-
-    Thread.objects.filter(last_poster=sender).update(
-        last_poster_name=sender.username,
-        last_poster_slug=sender.slug
-    )
-
-    Post.objects.filter(poster=sender).update(poster_name=sender.username)
-
-    Post.objects.filter(last_editor=sender).update(
-        last_editor_name=sender.username,
-        last_editor_slug=sender.slug
-    )
-
-    Event.objects.filter(author=sender).update(
-        author_name=sender.username,
-        author_slug=sender.slug
-    )
+    if settings.MISAGO_DEFER_USERNAME_UPDATES:
+        usernames.queue(sender)
+    else:
+        usernames.update_usernames(sender)
 
 
 from django.contrib.auth import get_user_model
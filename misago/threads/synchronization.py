@@ -0,0 +1,196 @@
+"""
+Set-based threads synchronization
+
+Synchronizing thread used to cost a count, several exists() checks and two
+posts lookups. All counters and flags are now read from posts with single
+conditional aggregate, that can be grouped by thread to synchronize many
+threads at once. Results are then written with single UPDATE per chunk.
+"""
+from django.db.models import (
+    Case, F, IntegerField, Max, Min, Q, Sum, Value, When)
+
+from misago.core.utils import slugify
+
+from misago.threads.models import Event, Post, Thread
+
+
+FIRST_POST_FIELDS = (
+    'started_on',
+    'first_post_id',
+    'starter_id',
+    'starter_name',
+    'starter_slug',
+    'is_unapproved',
+    'is_hidden',
+)
+
+LAST_POST_FIELDS = (
+    'last_post_on',
+    'last_post_id',
+    'last_poster_id',
+    'last_poster_name',
+    'last_poster_slug',
+)
+
+SYNCHRONIZED_FIELDS = (
+    'replies',
+    'has_reported_posts',
+    'has_open_reports',
+    'has_unapproved_posts',
+    'has_hidden_posts',
+    'has_events',
+) + FIRST_POST_FIELDS + LAST_POST_FIELDS
+
+POST_FIELDS = (
+    'id',
+    'posted_on',
+    'poster_id',
+    'poster_name',
+    'poster__slug',
+    'is_unapproved',
+    'is_hidden',
+)
+
+
+def count_if(condition):
+    return Sum(Case(
+        When(condition, then=Value(1)),
+        default=Value(0),
+        output_field=IntegerField()
+    ))
+
+
+def get_posts_aggregates():
+    """
+    Returns conditional aggregates used to synchronize thread
+    """
+    return {
+        'approved_posts': count_if(Q(is_unapproved=False)),
+        'reported_posts': count_if(Q(has_reports=True)),
+        'open_reports': count_if(Q(has_open_reports=True)),
+        'unapproved_posts': count_if(Q(is_unapproved=True)),
+        'hidden_posts': count_if(Q(is_hidden=True)),
+        'first_post': Min('id'),
+        'last_post': Max(Case(
+            When(is_unapproved=False, then=F('id')),
+            output_field=IntegerField()
+        )),
+    }
+
+
+def get_thread_values(aggregates, has_events, posts):
+    values = {
+        'replies': max(aggregates['approved_posts'] - 1, 0),
+        'has_reported_posts': bool(aggregates['reported_posts']),
+        'has_unapproved_posts': bool(aggregates['unapproved_posts']),
+        'has_hidden_posts': bool(aggregates['hidden_posts']),
+        'has_events': has_events,
+    }
+
+    if values['has_reported_posts']:
+        values['has_open_reports'] = bool(aggregates['open_reports'])
+    else:
+        values['has_open_reports'] = False
+
+    first_post = posts[aggregates['first_post']]
+    last_post = posts.get(aggregates['last_post'], first_post)
+
+    values.update({
+        'started_on': first_post['posted_on'],
+        'first_post_id': first_post['id'],
+        'starter_id': first_post['poster_id'],
+        'starter_name': first_post['poster_name'],
+        'starter_slug': get_poster_slug(first_post),
+        'is_unapproved': first_post['is_unapproved'],
+        'is_hidden': first_post['is_hidden'],
+
+        'last_post_on': last_post['posted_on'],
+        'last_post_id': last_post['id'],
+        'last_poster_id': last_post['poster_id'],
+        'last_poster_name': last_post['poster_name'],
+        'last_poster_slug': get_poster_slug(last_post),
+    })
+
+    return values
+
+
+def get_poster_slug(post):
+    if post['poster_id']:
+        return post['poster__slug']
+    else:
+        return slugify(post['poster_name'])
+
+
+def get_posts_dict(posts_ids):
+    posts_ids = [post_id for post_id in posts_ids if post_id]
+    queryset = Post.objects.filter(id__in=posts_ids).values(*POST_FIELDS)
+    return dict((post['id'], post) for post in queryset)
+
+
+def get_thread_synchronization(thread):
+    """
+    Returns dict of synchronized values for single thread
+    """
+    aggregates = thread.post_set.aggregate(**get_posts_aggregates())
+    has_events = thread.event_set.exists()
+
+    posts = get_posts_dict((
+        aggregates['first_post'],
+        aggregates['last_post'],
+    ))
+
+    return get_thread_values(aggregates, has_events, posts)
+
+
+def synchronize_threads(threads_ids, chunk_size=500):
+    """
+    Synchronizes threads with specified ids, returns number of
+    synchronized threads
+    """
+    threads_ids = sorted(set(threads_ids))
+
+    synchronized = 0
+    for i in range(0, len(threads_ids), chunk_size):
+        synchronized += synchronize_threads_chunk(
+            threads_ids[i:i + chunk_size])
+    return synchronized
+
+
+def synchronize_threads_chunk(threads_ids):
+    values = get_threads_values(threads_ids)
+    if not values:
+        return 0
+
+    updates = {}
+    for field in SYNCHRONIZED_FIELDS:
+        updates[field] = Case(
+            *[When(pk=thread_id, then=Value(values[thread_id][field]))
+              for thread_id in values],
+            output_field=Thread._meta.get_field(field)
+        )
+
+    Thread.objects.filter(pk__in=values.keys()).update(**updates)
+    return len(values)
+
+
+def get_threads_values(threads_ids):
+    aggregates_queryset = Post.objects.filter(
+        thread_id__in=threads_ids).order_by().values('thread_id').annotate(
+            **get_posts_aggregates())
+    aggregates = dict((a['thread_id'], a) for a in aggregates_queryset)
+
+    threads_with_events = set(Event.objects.filter(
+        thread_id__in=threads_ids).order_by().values_list(
+            'thread_id', flat=True).distinct())
+
+    posts_ids = []
+    for thread_aggregates in aggregates.values():
+        posts_ids.append(thread_aggregates['first_post'])
+        posts_ids.append(thread_aggregates['last_post'])
+    posts = get_posts_dict(posts_ids)
+
+    values = {}
+    for thread_id, thread_aggregates in aggregates.items():
+        values[thread_id] = get_thread_values(
+            thread_aggregates, thread_id in threads_with_events, posts)
+    return values
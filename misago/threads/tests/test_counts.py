@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+
+from misago.categories.models import Category
+from misago.users.testutils import UserTestCase
+
+from misago.threads import testutils
+from misago.threads.counts import (
+    get_threads_list_count, invalidate_threads_counts)
+from misago.threads.models import Thread
+from misago.threads.moderation.threads import pin_thread_globally
+from misago.threads.permissions.threads import exclude_invisible_threads
+
+
+class ThreadsListCountTests(UserTestCase):
+    def setUp(self):
+        super(ThreadsListCountTests, self).setUp()
+
+        self.category = Category.objects.get(slug='first-category')
+        self.categories = [self.category]
+
+        testutils.post_thread(category=self.category)
+
+    def get_count(self, list_type='all'):
+        queryset = Thread.objects.filter(category=self.category)
+        return get_threads_list_count(self.user, self.category,
+            self.categories, list_type, queryset)
+
+    def test_count_is_cached(self):
+        """threads count is cached until category is invalidated"""
+        self.assertEqual(self.get_count(), 1)
+
+        # queryset delete bypasses signals, leaving cached count stale
+        Thread.objects.filter(category=self.category).delete()
+        self.assertEqual(self.get_count(), 1)
+
+        invalidate_threads_counts([self.category.pk])
+        self.assertEqual(self.get_count(), 0)
+
+    def test_new_thread_invalidates_count(self):
+        """posting thread invalidates cached count"""
+        self.assertEqual(self.get_count(), 1)
+
+        testutils.post_thread(category=self.category)
+        self.assertEqual(self.get_count(), 2)
+
+    def test_user_lists_are_not_cached(self):
+        """counts of lists specific to user are not cached"""
+        self.assertEqual(self.get_count('my'), 1)
+
+        Thread.objects.filter(category=self.category).delete()
+        self.assertEqual(self.get_count('my'), 0)
+
+    def test_user_threads_are_not_shared(self):
+        """count including user's own unapproved threads isn't shared"""
+        user = self.get_authenticated_user()
+        testutils.post_thread(
+            category=self.category, poster=user, is_unapproved=True)
+
+        other_user = get_user_model().objects.create_user(
+            'OtherUser', 'other@user.com', self.USER_PASSWORD)
+
+        def get_user_count(user):
+            queryset = exclude_invisible_threads(
+                user, self.categories, Thread.objects.all())
+            return get_threads_list_count(user, self.category,
+                self.categories, 'all', queryset)
+
+        self.assertEqual(get_user_count(user), 2)
+        self.assertEqual(get_user_count(other_user), 1)
+
+    def test_pinning_invalidates_count(self):
+        """pinning thread globally invalidates cached count"""
+        thread = testutils.post_thread(category=self.category)
+
+        def get_all_count():
+            queryset = Thread.objects.filter(
+                category=self.category, weight__lt=2)
+            return get_threads_list_count(self.user, self.category,
+                self.categories, 'all', queryset)
+
+        self.assertEqual(get_all_count(), 2)
+
+        pin_thread_globally(self.get_authenticated_user(), thread)
+        self.assertEqual(get_all_count(), 1)
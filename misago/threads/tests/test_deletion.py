@@ -0,0 +1,93 @@
+from django.utils import timezone
+
+from misago.categories.models import Category
+from misago.readtracker.models import ThreadRead
+from misago.users.testutils import AuthenticatedUserTestCase
+
+from misago.threads import testutils
+from misago.threads.deletion import ContentDeletion
+from misago.threads.models import Post, Subscription, Thread
+
+
+class ContentDeletionTests(AuthenticatedUserTestCase):
+    def setUp(self):
+        super(ContentDeletionTests, self).setUp()
+
+        self.category = Category.objects.get(slug='first-category')
+        self.thread = testutils.post_thread(self.category)
+
+    def test_delete_threads(self):
+        """threads are deleted in chunks and category is synchronized"""
+        threads = [testutils.post_thread(self.category, poster=self.user)
+                   for t in xrange(5)]
+
+        deletion = ContentDeletion(chunk_size=2)
+        deleted = deletion.delete_threads(self.user.thread_set.all())
+        deletion.synchronize()
+
+        self.assertEqual(deleted, 5)
+        self.assertFalse(Thread.objects.filter(
+            id__in=[t.pk for t in threads]).exists())
+
+        category = Category.objects.get(pk=self.category.pk)
+        self.assertEqual(category.threads, 1)
+        self.assertEqual(category.last_thread_id, self.thread.pk)
+
+    def test_delete_threads_dependent_rows(self):
+        """rows depending on deleted threads are deleted with them"""
+        thread = testutils.post_thread(self.category, poster=self.user)
+        testutils.reply_thread(thread)
+
+        ThreadRead.objects.create(
+            user=self.user,
+            category=self.category,
+            thread=thread,
+            last_read_on=timezone.now())
+        Subscription.objects.create(
+            user=self.user, category=self.category, thread=thread)
+
+        deletion = ContentDeletion()
+        deletion.delete_threads(Thread.objects.filter(pk=thread.pk))
+        deletion.synchronize()
+
+        self.assertFalse(Post.objects.filter(thread_id=thread.pk).exists())
+        self.assertFalse(
+            ThreadRead.objects.filter(thread_id=thread.pk).exists())
+        self.assertFalse(
+            Subscription.objects.filter(thread_id=thread.pk).exists())
+
+        category = Category.objects.get(pk=self.category.pk)
+        self.assertEqual(category.last_thread_id, self.thread.pk)
+
+    def test_delete_posts(self):
+        """posts are deleted and their threads are synchronized"""
+        [testutils.reply_thread(self.thread, poster=self.user)
+         for r in xrange(5)]
+
+        deletion = ContentDeletion(chunk_size=2)
+        deleted = deletion.delete_posts(self.user.post_set.all())
+        deletion.synchronize()
+
+        self.assertEqual(deleted, 5)
+        self.assertEqual(self.user.post_set.count(), 0)
+
+        thread = Thread.objects.get(pk=self.thread.pk)
+        self.assertEqual(thread.replies, 0)
+        self.assertEqual(thread.last_post_id, thread.first_post_id)
+
+        category = Category.objects.get(pk=self.category.pk)
+        self.assertEqual(category.posts, 1)
+
+    def test_delete_posts_limit(self):
+        """delete_posts stops after deleting limit of posts"""
+        [testutils.reply_thread(self.thread, poster=self.user)
+         for r in xrange(5)]
+
+        deletion = ContentDeletion(chunk_size=2)
+        self.assertEqual(deletion.delete_posts(
+            self.user.post_set.all(), 3), 3)
+        deletion.synchronize()
+
+        self.assertEqual(Post.objects.filter(poster=self.user).count(), 2)
+        thread = Thread.objects.get(pk=self.thread.pk)
+        self.assertEqual(thread.replies, 2)
@@ -0,0 +1,74 @@
+from misago.categories.models import Category
+from misago.users.testutils import AuthenticatedUserTestCase
+
+from misago.threads import moderation, testutils
+from misago.threads.models import Thread
+from misago.threads.pinned import get_pinned_threads, get_pinned_threads_ids
+
+
+class PinnedThreadsTests(AuthenticatedUserTestCase):
+    def setUp(self):
+        super(PinnedThreadsTests, self).setUp()
+
+        self.root = Category.objects.root_category()
+        self.category = Category.objects.get(slug='first-category')
+        self.thread = testutils.post_thread(category=self.category)
+
+    def get_pinned_ids(self, category):
+        return get_pinned_threads_ids(category, [category])
+
+    def test_pinned_threads_are_cached(self):
+        """pinned threads ids are cached until invalidated"""
+        self.assertEqual(self.get_pinned_ids(self.category), [])
+
+        # queryset update bypasses invalidation, leaving cached ids stale
+        Thread.objects.update(weight=2)
+        self.assertEqual(self.get_pinned_ids(self.category), [])
+
+        thread = Thread.objects.get(pk=self.thread.pk)
+        moderation.unpin_thread(self.user, thread)
+        self.assertEqual(self.get_pinned_ids(self.category), [])
+
+    def test_pin_invalidates_cache(self):
+        """pinning and unpinning threads invalidates cached ids"""
+        self.assertEqual(self.get_pinned_ids(self.category), [])
+
+        moderation.pin_thread_locally(self.user, self.thread)
+        self.assertEqual(self.get_pinned_ids(self.category), [self.thread.pk])
+        self.assertEqual(self.get_pinned_ids(self.root), [])
+
+        moderation.pin_thread_globally(self.user, self.thread)
+        self.assertEqual(self.get_pinned_ids(self.category), [self.thread.pk])
+        self.assertEqual(self.get_pinned_ids(self.root), [self.thread.pk])
+
+        moderation.unpin_thread(self.user, self.thread)
+        self.assertEqual(self.get_pinned_ids(self.category), [])
+
+    def test_new_and_deleted_threads_invalidate_cache(self):
+        """posting and deleting pinned threads invalidates cached ids"""
+        self.assertEqual(self.get_pinned_ids(self.category), [])
+
+        thread = testutils.post_thread(category=self.category, is_pinned=True)
+        self.assertEqual(self.get_pinned_ids(self.category), [thread.pk])
+
+        thread.delete()
+        self.assertEqual(self.get_pinned_ids(self.category), [])
+
+    def test_get_pinned_threads(self):
+        """get_pinned_threads returns visible pinned threads in order"""
+        self.assertEqual(get_pinned_threads(
+            Thread.objects.all(), self.category, [self.category]), [])
+
+        local = testutils.post_thread(category=self.category, is_pinned=True)
+        announcement = testutils.post_thread(
+            category=self.category, is_global=True)
+        hidden = testutils.post_thread(
+            category=self.category, is_global=True, is_hidden=True)
+
+        queryset = Thread.objects.filter(is_hidden=False)
+        self.assertEqual(
+            get_pinned_threads(queryset, self.category, [self.category]),
+            [announcement, local])
+        self.assertEqual(
+            get_pinned_threads(queryset, self.root, [self.category]),
+            [announcement])
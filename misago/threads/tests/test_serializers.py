@@ -0,0 +1,47 @@
+from misago.categories.models import Category
+from misago.users.testutils import AuthenticatedUserTestCase
+
+from misago.threads import testutils, threadtypes
+from misago.threads.serializers import ThreadListSerializer
+from misago.threads.serializers.thread import get_urls_templates
+
+
+class ThreadListSerializerTests(AuthenticatedUserTestCase):
+    def setUp(self):
+        super(ThreadListSerializerTests, self).setUp()
+
+        self.category = Category.objects.get(slug='first-category')
+
+    def test_fast_serializer_matches_serializer(self):
+        """threads list serializer returns same data as single serializer"""
+        threads = [
+            testutils.post_thread(category=self.category),
+            testutils.post_thread(category=self.category, poster=self.user),
+            testutils.post_thread(category=self.category, is_closed=True),
+        ]
+
+        threads[0].top_category = self.category
+        threads[1].is_read = True
+        threads[1].acl = {'can_reply': True}
+
+        serialized_list = ThreadListSerializer(threads, many=True).data
+        self.assertEqual(len(serialized_list), len(threads))
+
+        for thread, serialized in zip(threads, serialized_list):
+            single = ThreadListSerializer(thread).data
+            self.assertEqual(serialized.keys(), single.keys())
+            self.assertEqual(serialized, single)
+
+        self.assertEqual(serialized_list[0]['top_category'], self.category.pk)
+        self.assertIn(self.user.slug, serialized_list[1]['last_poster_url'])
+
+    def test_urls_templates_opt_in(self):
+        """only thread types supporting url templates get templates"""
+        threads_urls = get_urls_templates()['threads']
+        for thread_type in threadtypes.THREAD_TYPES.values():
+            if thread_type.supports_url_templates:
+                self.assertIn(thread_type.type_name, threads_urls)
+            else:
+                self.assertNotIn(thread_type.type_name, threads_urls)
+        self.assertIn('thread', threads_urls)
+        self.assertNotIn('private_threads', threads_urls)
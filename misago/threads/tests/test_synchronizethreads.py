@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
 from django.utils.six import StringIO
 
 from misago.categories.models import Category
@@ -39,3 +39,74 @@ class SynchronizeThreadsTests(TestCase):
 
         command_output = out.getvalue().splitlines()[-1].strip()
         self.assertEqual(command_output, 'Synchronized 10 threads')
+
+    def test_threads_sync_in_chunks(self):
+        """command synchronizes threads in ids ranges"""
+        category = Category.objects.all_categories()[:1][0]
+
+        threads = [testutils.post_thread(category) for t in xrange(5)]
+        for i, thread in enumerate(threads):
+            [testutils.reply_thread(thread) for r in xrange(i)]
+            thread.replies = 0
+            thread.has_events = True
+            thread.save()
+
+        command = synchronizethreads.Command()
+
+        out = StringIO()
+        command.execute(stdout=out, chunk_size=2)
+
+        for i, thread in enumerate(threads):
+            db_thread = category.thread_set.get(id=thread.id)
+            self.assertEqual(db_thread.replies, i)
+            self.assertFalse(db_thread.has_events)
+            self.assertEqual(db_thread.last_post_id, thread.post_set.last().pk)
+
+        command_output = out.getvalue().splitlines()[-1].strip()
+        self.assertEqual(command_output, 'Synchronized 5 threads')
+
+    def test_threads_without_posts(self):
+        """command reports threads without posts"""
+        category = Category.objects.all_categories()[:1][0]
+
+        threads = [testutils.post_thread(category) for t in xrange(3)]
+        threads[1].post_set.all().delete()
+
+        command = synchronizethreads.Command()
+
+        out = StringIO()
+        command.execute(stdout=out)
+
+        self.assertIn(
+            'Skipped 1 threads without posts: %s' % threads[1].pk,
+            out.getvalue())
+
+        command_output = out.getvalue().splitlines()[-1].strip()
+        self.assertEqual(command_output, 'Synchronized 2 threads')
+
+
+class SynchronizeThreadsProcessesTests(TransactionTestCase):
+    serialized_rollback = True
+
+    def test_threads_sync_in_processes(self):
+        """command synchronizes threads in many processes"""
+        category = Category.objects.all_categories()[:1][0]
+
+        threads = [testutils.post_thread(category) for t in xrange(6)]
+        for i, thread in enumerate(threads):
+            [testutils.reply_thread(thread) for r in xrange(i)]
+            thread.replies = 0
+            thread.save()
+
+        command = synchronizethreads.Command()
+
+        out = StringIO()
+        command.execute(stdout=out, processes=3, chunk_size=2)
+
+        for i, thread in enumerate(threads):
+            db_thread = category.thread_set.get(id=thread.id)
+            self.assertEqual(db_thread.replies, i)
+            self.assertEqual(db_thread.last_post_id, thread.post_set.last().pk)
+
+        command_output = out.getvalue().splitlines()[-1].strip()
+        self.assertEqual(command_output, 'Synchronized 6 threads')
@@ -400,6 +400,69 @@ class AllThreadsListTests(ThreadsListTestCase):
         response = self.client.get('/?page=4')
         self.assertEqual(response.status_code, 404)
 
+    def test_api_cursor_pagination(self):
+        """threads api seeks pages using cursors"""
+        threads = []
+        for i in xrange(24 * 3):
+            threads.append(testutils.post_thread(category=self.first_category))
+        threads.reverse()
+
+        # first page links to cursor for next page
+        response = self.client.get(self.api_link)
+        self.assertEqual(response.status_code, 200)
+
+        response_json = json_loads(response.content)
+        results = [t['id'] for t in response_json['results']]
+        self.assertEqual(results, [t.pk for t in threads[:24]])
+        self.assertEqual(
+            response_json['next_cursor'], threads[23].last_post_id)
+
+        # cursor after first page returns second page
+        self.access_all_categories()
+        response = self.client.get(
+            '%s?after=%s' % (self.api_link, response_json['next_cursor']))
+        self.assertEqual(response.status_code, 200)
+
+        response_json = json_loads(response.content)
+        results = [t['id'] for t in response_json['results']]
+        self.assertEqual(results, [t.pk for t in threads[24:48]])
+        self.assertEqual(
+            response_json['previous_cursor'], threads[24].last_post_id)
+        self.assertEqual(
+            response_json['next_cursor'], threads[47].last_post_id)
+
+        # last page has no next cursor
+        self.access_all_categories()
+        response = self.client.get(
+            '%s?after=%s' % (self.api_link, response_json['next_cursor']))
+        self.assertEqual(response.status_code, 200)
+
+        response_json = json_loads(response.content)
+        results = [t['id'] for t in response_json['results']]
+        self.assertEqual(results, [t.pk for t in threads[48:]])
+        self.assertIsNone(response_json['next_cursor'])
+
+        # cursor before last page returns second page
+        self.access_all_categories()
+        response = self.client.get(
+            '%s?before=%s' % (self.api_link, response_json['previous_cursor']))
+        self.assertEqual(response.status_code, 200)
+
+        response_json = json_loads(response.content)
+        results = [t['id'] for t in response_json['results']]
+        self.assertEqual(results, [t.pk for t in threads[24:48]])
+
+        # invalid cursor gives 404
+        self.access_all_categories()
+        response = self.client.get('%s?after=bob' % self.api_link)
+        self.assertEqual(response.status_code, 404)
+
+        # both cursors give 404
+        self.access_all_categories()
+        response = self.client.get('%s?before=%s&after=%s' % (
+            self.api_link, threads[30].last_post_id, threads[10].last_post_id))
+        self.assertEqual(response.status_code, 404)
+
 
 class CategoryThreadsListTests(ThreadsListTestCase):
     def test_access_hidden_category(self):
@@ -0,0 +1,121 @@
+import json
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import RequestFactory
+
+from misago.acl.testutils import override_acl
+from misago.categories.models import Category
+from misago.users.testutils import UserTestCase
+
+from misago.threads import testutils
+from misago.threads.api.threadendpoints.list import ThreadsListEndpoint
+from misago.threads.models import Thread
+
+
+def get_plan_indexes(queryset):
+    sql, params = queryset.query.sql_with_params()
+
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) %s' % sql, params)
+        plan = cursor.fetchone()[0]
+
+    if not isinstance(plan, list):
+        plan = json.loads(plan)
+
+    indexes = set()
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if node.get('Index Name'):
+            indexes.add(node['Index Name'])
+        nodes.extend(node.get('Plans', []))
+    return indexes
+
+
+@skipUnless(connection.vendor == 'postgresql',
+            "query plans are checked only on PostgreSQL")
+class ThreadsListsIndexesTests(UserTestCase):
+    """
+    Partial index can be used only for query which conditions imply index's
+    predicate, so querysets are built by threads list code, and planner is
+    discouraged from seq scan of small seeded table in test's transaction
+    """
+    def setUp(self):
+        super(ThreadsListsIndexesTests, self).setUp()
+
+        self.root = Category.objects.root_category()
+        self.category = Category.objects.get(slug='first-category')
+
+        for i in range(60):
+            testutils.post_thread(
+                category=self.category,
+                is_hidden=i % 10 == 0,
+                is_unapproved=i % 15 == 0,
+            )
+        Thread.objects.filter(pk__in=Thread.objects.all()[:5]).update(
+            has_unapproved_posts=True)
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE %s' % Thread._meta.db_table)
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def get_list_queryset(self, user, category, list_type='all'):
+        request = RequestFactory().get('/')
+        request.user = user
+
+        endpoint = ThreadsListEndpoint()
+        categories = [self.root, self.category]
+        if category.level:
+            threads_categories = [category]
+        else:
+            threads_categories = categories
+
+        queryset = endpoint.get_queryset(request, categories, list_type)
+        return endpoint.get_rest_queryset(
+            category, queryset, threads_categories)[:24]
+
+    def get_moderator(self):
+        user = self.get_authenticated_user()
+        override_acl(user, {
+            'visible_categories': [self.root.pk, self.category.pk],
+            'can_approve_content': [self.category.pk],
+            'categories': {
+                self.category.pk: {
+                    'can_see': 1,
+                    'can_browse': 1,
+                    'can_see_all_threads': 1,
+                    'can_see_own_threads': 0,
+                    'can_hide_threads': 1,
+                    'can_approve_content': 1,
+                },
+            },
+        })
+        return user
+
+    def assertIndexUsed(self, queryset, index_name):
+        self.assertIn(index_name, get_plan_indexes(queryset))
+
+    def test_guest_category_threads_list(self):
+        """category threads list for guest uses visible threads index"""
+        queryset = self.get_list_queryset(
+            self.get_anonymous_user(), self.category)
+        self.assertIndexUsed(queryset, 'misago_thread_list_visible_partial')
+
+    def test_guest_threads_list(self):
+        """threads list for guest uses visible threads index"""
+        queryset = self.get_list_queryset(
+            self.get_anonymous_user(), self.root)
+        self.assertIndexUsed(queryset, 'misago_thread_list_visible_partial')
+
+    def test_moderator_threads_list(self):
+        """threads list for moderator uses threads list index"""
+        queryset = self.get_list_queryset(self.get_moderator(), self.category)
+        self.assertIndexUsed(queryset, 'misago_thread_list_partial')
+
+    def test_unapproved_threads_list(self):
+        """unapproved content list uses unapproved threads index"""
+        queryset = self.get_list_queryset(
+            self.get_moderator(), self.category, 'unapproved')
+        self.assertIndexUsed(
+            queryset, 'misago_thread_list_unapproved_partial')
@@ -0,0 +1,95 @@
+from django.contrib.auth import get_user_model
+from django.test.utils import override_settings
+from django.utils.six import StringIO
+
+from misago.categories.models import Category
+from misago.users.testutils import AuthenticatedUserTestCase
+
+from misago.threads import testutils, usernames
+from misago.threads.management.commands import updateusernames
+from misago.threads.models import Post, Thread
+
+
+class UsernamesTests(AuthenticatedUserTestCase):
+    def setUp(self):
+        super(UsernamesTests, self).setUp()
+
+        self.category = Category.objects.get(slug='first-category')
+        self.thread = testutils.post_thread(self.category, poster=self.user)
+        [testutils.reply_thread(self.thread, poster=self.user)
+         for r in xrange(3)]
+
+    def assertContentUsername(self, username):
+        thread = Thread.objects.get(pk=self.thread.pk)
+        self.assertEqual(thread.starter_name, username)
+        self.assertEqual(thread.last_poster_name, username)
+
+        for post in Post.objects.filter(poster=self.user):
+            self.assertEqual(post.poster_name, username)
+
+    def test_update_usernames(self):
+        """update_usernames updates content in chunks"""
+        self.user.username = 'NewName'
+        self.user.slug = 'newname'
+
+        usernames.update_usernames(self.user, chunk_size=2)
+        self.assertContentUsername('NewName')
+
+    def test_rename_updates_content(self):
+        """renaming user updates its content"""
+        self.user.set_username('NewName')
+        self.user.save()
+
+        self.assertContentUsername('NewName')
+
+    @override_settings(MISAGO_DEFER_USERNAME_UPDATES=True)
+    def test_deferred_rename(self):
+        """renaming user queues its content update for command"""
+        old_username = self.user.username
+
+        self.user.set_username('NewName')
+        self.user.save()
+
+        self.assertContentUsername(old_username)
+        self.reload_user()
+        self.assertTrue(self.user.sync_content_usernames)
+
+        command = updateusernames.Command()
+
+        out = StringIO()
+        command.execute(stdout=out)
+
+        self.assertContentUsername('NewName')
+        self.assertEqual(
+            out.getvalue().strip(), 'Renamed users updated: 1')
+
+        self.reload_user()
+        self.assertFalse(self.user.sync_content_usernames)
+        self.assertEqual(usernames.flush(), 0)
+
+    @override_settings(MISAGO_DEFER_USERNAME_UPDATES=True)
+    def test_deferred_rename_flag_is_saved_with_name(self):
+        """deferred rename saves flag in same query as new name"""
+        self.user.set_username('NewName')
+        self.user.save(update_fields=['username', 'slug'])
+
+        self.reload_user()
+        self.assertEqual(self.user.username, 'NewName')
+        self.assertTrue(self.user.sync_content_usernames)
+
+    def test_flush_user_renamed_during_update(self):
+        """flag is kept for user that was renamed while content was updated"""
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            username='NewName', slug='newname', sync_content_usernames=True)
+
+        renamed_user = usernames.clear_flag(self.user)
+        self.assertEqual(renamed_user.username, 'NewName')
+
+        self.reload_user()
+        self.assertTrue(self.user.sync_content_usernames)
+
+        self.assertEqual(usernames.flush(), 1)
+        self.assertContentUsername('NewName')
+
+        self.reload_user()
+        self.assertFalse(self.user.sync_content_usernames)
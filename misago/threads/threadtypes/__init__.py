@@ -7,6 +7,10 @@ from django.utils.translation import ugettext_lazy as _
 class ThreadTypeBase(object):
     type_name = 'undefined'
 
+    # set to True if thread urls are built only from thread's pk and slug,
+    # so threads lists can build them from url templates reversed once
+    supports_url_templates = False
+
     def get_forum_name(self, forum):
         return forum.name
 
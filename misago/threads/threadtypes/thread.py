@@ -5,6 +5,7 @@ from misago.threads.threadtypes import ThreadTypeBase
 
 class Thread(ThreadTypeBase):
     type_name = 'thread'
+    supports_url_templates = True
 
     def get_category_name(self, category):
         return category.name
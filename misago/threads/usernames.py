@@ -0,0 +1,135 @@
+"""
+Usernames on threads, posts and events
+
+Usernames are copied to threads, posts and events so lists don't have to
+join users. Renaming prolific user used to update all those rows during
+rename request. Rows are now updated in chunks of ids, and when
+MISAGO_DEFER_USERNAME_UPDATES is enabled, renamed users are flagged with
+sync_content_usernames and updated later by "updateusernames" command.
+
+Flag is saved together with user's new name, so command never sees flag
+without that name. Content is updated in chunks committed one by one, and
+flag is cleared only if user's name didn't change in meantime, so update
+that failed or was interrupted is retried on next run.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from misago.threads.models import Event, Post, Thread
+
+
+CHUNK_SIZE = 500
+
+
+def get_updates(user):
+    """
+    Returns list of (model, user field, {field: new value}) to update
+    """
+    return [
+        (Thread, 'starter', {
+            'starter_name': user.username,
+            'starter_slug': user.slug,
+        }),
+        (Thread, 'last_poster', {
+            'last_poster_name': user.username,
+            'last_poster_slug': user.slug,
+        }),
+        (Post, 'poster', {
+            'poster_name': user.username,
+        }),
+        (Post, 'last_editor', {
+            'last_editor_name': user.username,
+            'last_editor_slug': user.slug,
+        }),
+        (Event, 'author', {
+            'author_name': user.username,
+            'author_slug': user.slug,
+        }),
+    ]
+
+
+def update_usernames(user, chunk_size=CHUNK_SIZE):
+    """
+    Updates user's name on content in chunks, returns number of updated rows
+    """
+    updated = 0
+    for model, user_field, values in get_updates(user):
+        queryset = model.objects.filter(**{user_field: user}).order_by('id')
+        ids_queryset = queryset.values_list('id', flat=True)
+
+        last_id = 0
+        while True:
+            ids = list(ids_queryset.filter(id__gt=last_id)[:chunk_size])
+            if not ids:
+                break
+
+            updated += model.objects.filter(id__in=ids).update(**values)
+            last_id = ids[-1]
+    return updated
+
+
+def queue(user):
+    """
+    Flags renamed user for update, flag is saved with user's new name
+    """
+    user.sync_content_usernames = True
+
+
+def flush():
+    """
+    Updates usernames of flagged users, returns number of updated users
+    """
+    User = get_user_model()
+    queryset = User.objects.filter(sync_content_usernames=True)
+    ids_queryset = queryset.order_by('id').values_list('id', flat=True)
+
+    updated = 0
+    last_id = 0
+    while True:
+        users_ids = list(ids_queryset.filter(id__gt=last_id)[:CHUNK_SIZE])
+        if not users_ids:
+            break
+
+        for user_id in users_ids:
+            if flush_user(user_id):
+                updated += 1
+        last_id = users_ids[-1]
+    return updated
+
+
+def flush_user(user_id):
+    """
+    Updates flagged user's content, then clears flag if user wasn't renamed
+    while content was updated
+    """
+    User = get_user_model()
+    try:
+        user = User.objects.get(pk=user_id, sync_content_usernames=True)
+    except User.DoesNotExist:
+        return False
+
+    while True:
+        update_usernames(user)
+        user = clear_flag(user)
+        if not user:
+            return True
+
+
+@transaction.atomic
+def clear_flag(user):
+    """
+    Clears user's flag and returns None, or returns renamed user to update
+    """
+    User = get_user_model()
+    try:
+        locked_user = User.objects.select_for_update().get(
+            pk=user.pk, sync_content_usernames=True)
+    except User.DoesNotExist:
+        return None
+
+    if (locked_user.username, locked_user.slug) != (user.username, user.slug):
+        return locked_user
+
+    locked_user.sync_content_usernames = False
+    locked_user.save(update_fields=['sync_content_usernames'])
+    return None
@@ -1,4 +1,10 @@
+from misago.categories.models import Category
+
+
 def add_categories_to_threads(root_category, categories, threads):
+    catalogue = Category.objects.get_catalogue()
+    tree_root_id = catalogue.get_root().pk
+
     categories_dict = {}
     for category in categories:
         categories_dict[category.pk] = category
@@ -9,24 +15,20 @@ def add_categories_to_threads(root_category, categories, threads):
         thread.top_category = None
         thread.category = categories_dict[thread.category_id]
 
-        if thread.category == root_category:
+        if thread.category_id == root_category.pk:
             continue
         elif thread.category.parent_id == root_category.pk:
             thread.top_category = thread.category
-        elif thread.category_id in top_categories_map:
-            thread.top_category = top_categories_map[thread.category_id]
-        elif root_category.has_child(thread.category):
-            # thread in subcategory resolution
-            for category in categories:
-                if (category.parent_id == root_category.pk and
-                        category.has_child(thread.category)):
-                    top_categories_map[thread.category_id] = category
-                    thread.top_category = category
-        else:
-            # global thread in other category resolution
-            for category in categories:
-                if category.level == 1 and (
-                        category == thread.category or
-                        category.has_child(thread.category)):
-                    top_categories_map[thread.category_id] = category
-                    thread.top_category = category
+            continue
+
+        if thread.category_id not in top_categories_map:
+            top_category_id = catalogue.get_top_category_id(
+                root_category.pk, thread.category_id)
+            if not top_category_id:
+                # global thread in other category resolution
+                top_category_id = catalogue.get_top_category_id(
+                    tree_root_id, thread.category_id)
+            top_categories_map[thread.category_id] = categories_dict.get(
+                top_category_id)
+
+        thread.top_category = top_categories_map[thread.category_id]
@@ -15,6 +15,7 @@ from misago.core.shortcuts import paginate, pagination_dict, validate_slug
 from misago.readtracker import threadstracker
 
 from misago.threads.mixins.threadslists import ThreadsListMixin
+from misago.threads.pinned import get_pinned_threads
 from misago.threads.serializers import ThreadListSerializer
 from misago.threads.subscriptions import make_subscription_aware
 from misago.threads.utils import add_categories_to_threads
@@ -34,14 +35,7 @@ class BaseList(View):
     template_name = 'misago/threadslist/threads.html'
     preloaded_data_prefix = ''
 
-    def get_subcategories(self, category, categories):
-        subcategories = []
-        for subcategory in categories:
-            if category.has_child(subcategory):
-                subcategories.append(subcategory)
-        return subcategories
-
-    def get_pinned_threads(self, request, queryset):
+    def get_pinned_threads(self, category, queryset, threads_categories):
         return []
 
     def get_rest_queryset(self, request, queryset, threads_categories):
@@ -74,14 +68,17 @@ class BaseList(View):
         threads_categories = [category] + subcategories
         rest_queryset = self.get_rest_queryset(queryset, threads_categories)
 
-        page = paginate(rest_queryset, page, 24, 6)
+        threads_count = self.get_threads_count(request, category,
+            threads_categories, list_type, rest_queryset)
+
+        page = paginate(rest_queryset, page, 24, 6, count=threads_count)
         paginator = pagination_dict(page, include_page_range=False)
 
         if page.number > 1:
             threads = list(page.object_list)
         else:
             pinned_threads = self.get_pinned_threads(
-                queryset, threads_categories)
+                category, queryset, threads_categories)
             threads = list(pinned_threads) + list(page.object_list)
 
         if list_type in ('new', 'unread'):
@@ -93,12 +90,12 @@ class BaseList(View):
 
         add_categories_to_threads(category, categories, threads)
 
-        visible_subcategories = []
+        threads_categories_ids = set(c.pk for c in threads_categories)
+        visible_subcategories = set()
         for thread in threads:
             if (thread.top_category and
-                    thread.category in threads_categories and
-                    thread.top_category.pk not in visible_subcategories):
-                visible_subcategories.append(thread.top_category.pk)
+                    thread.category_id in threads_categories_ids):
+                visible_subcategories.add(thread.top_category.pk)
 
         category.subcategories = []
         for subcategory in subcategories:
@@ -108,6 +105,10 @@ class BaseList(View):
         add_acl(request.user, threads)
         make_subscription_aware(request.user, threads)
 
+        # categories serializer shows last activity depending on their ACLs,
+        # that aren't added by memoized threads visibility check
+        add_acl(request.user, categories[1:])
+
         request.frontend_context.update({
             'THREADS': dict(
                 results=ThreadListSerializer(threads, many=True).data,
@@ -141,8 +142,8 @@ class ThreadsList(BaseList, ThreadsListMixin):
     def get_category(self, request, categories, **kwargs):
         return categories[0]
 
-    def get_pinned_threads(self, queryset, threads_categories):
-        return queryset.filter(weight=2)
+    def get_pinned_threads(self, category, queryset, threads_categories):
+        return get_pinned_threads(queryset, category, threads_categories)
 
     def get_rest_queryset(self, queryset, threads_categories):
         return queryset.filter(
@@ -180,11 +181,8 @@ class CategoryThreadsList(ThreadsList, ThreadsListMixin):
         else:
             raise Http404()
 
-    def get_pinned_threads(self, queryset, threads_categories):
-        return list(queryset.filter(weight=2)) + list(queryset.filter(
-            weight=1,
-            category__in=threads_categories
-        ))
+    def get_pinned_threads(self, category, queryset, threads_categories):
+        return get_pinned_threads(queryset, category, threads_categories)
 
     def get_rest_queryset(self, queryset, threads_categories):
         return queryset.filter(
@@ -14,6 +14,7 @@ from misago.core.shortcuts import get_int_or_404, get_object_or_404
 
 from misago.users.activepostersranking import get_active_posters_ranking
 from misago.users.models import Rank
+from misago.users.online.buckets import get_online_users
 from misago.users.online.utils import make_users_status_aware
 from misago.users.serializers import UserSerializer, ScoredUserSerializer
 
@@ -33,6 +34,18 @@ def active(request):
     })
 
 
+def online(request):
+    queryset = get_online_users(request.user.acl, timezone.now())
+    queryset = queryset.select_related('rank', 'ban_cache', 'online_tracker')
+
+    paginator = Paginator()
+    users = paginator.paginate_queryset(queryset.order_by('slug'), request)
+
+    make_users_status_aware(users, request.user.acl)
+    return paginator.get_paginated_response(
+        UserSerializer(users, many=True).data)
+
+
 def generic(request):
     queryset = get_user_model().objects
     if request.query_params.get('followers'):
@@ -66,6 +79,7 @@ def generic(request):
 
 LISTS = {
     'active': active,
+    'online': online,
 }
 
 
@@ -0,0 +1,173 @@
+"""
+In-process matcher for checked bans
+
+Checking value for bans used to load every checked ban of checked types
+and compile regex for each of them. Matcher loads bans once per process and
+keeps them for as long as bans cachebuster version and version token stored
+in shared cache stay same.
+
+For every ban type, matcher keeps dict of exact values and single regex
+matching all wildcard values. Value is compared against wildcards one by one
+only when this regex matches it. IP bans for networks are kept in prefix
+tree. Expiration dates are checked when value is matched, so bans expiring
+don't require matcher to be rebuilt.
+"""
+import re
+import time
+
+from django.utils import timezone
+
+from misago.core import cachebuster, threadstore
+from misago.core.cache import cache
+
+from misago.users.iptree import IPTree, is_network
+from misago.users.models.ban import BAN_CACHEBUSTER, BAN_IP, Ban
+
+
+BAN_FIELDS = (
+    'id',
+    'check_type',
+    'banned_value',
+    'user_message',
+    'staff_message',
+    'expires_on',
+)
+
+VERSION_CACHE_KEY = 'misago_bans_matcher_version'
+
+_matcher = None
+
+
+def compile_ban_pattern(banned_value):
+    # no groups, so wildcards can be joined in one regex
+    return re.escape(banned_value).replace('\\*', '.*?')
+
+
+class ValuesMatcher(object):
+    """
+    Matches values against bans of single type
+    """
+    def __init__(self, bans):
+        self.exact = {}
+        self.wildcards = []
+
+        for ban in bans:
+            if '*' in ban['banned_value']:
+                pattern = '^%s$' % compile_ban_pattern(ban['banned_value'])
+                self.wildcards.append((re.compile(pattern), ban))
+            else:
+                self.exact.setdefault(ban['banned_value'], []).append(ban)
+
+        if self.wildcards:
+            self.wildcards_regex = re.compile('|'.join(
+                '(?:%s)' % r.pattern for r, ban in self.wildcards))
+        else:
+            self.wildcards_regex = None
+
+    def get_bans(self, value):
+        """
+        Returns list of bans matching value
+        """
+        bans = list(self.exact.get(value, []))
+        if self.wildcards_regex and self.wildcards_regex.match(value):
+            for regex, ban in self.wildcards:
+                if regex.match(value):
+                    bans.append(ban)
+        return bans
+
+
+class IPMatcher(ValuesMatcher):
+    """
+    Matches IP addresses against networks and IP values
+    """
+    def __init__(self, bans):
+        self.networks = IPTree()
+
+        values_bans = []
+        for ban in bans:
+            if is_network(ban['banned_value']):
+                try:
+                    self.networks.insert(ban['banned_value'], ban)
+                except ValueError:
+                    pass
+            else:
+                values_bans.append(ban)
+
+        super(IPMatcher, self).__init__(values_bans)
+
+    def get_bans(self, value):
+        bans = super(IPMatcher, self).get_bans(value)
+        return bans + self.networks.lookup(value)
+
+
+class BansMatcher(object):
+    def __init__(self, version, bans):
+        self.version = version
+
+        bans_by_type = {}
+        for ban in bans:
+            bans_by_type.setdefault(ban['check_type'], []).append(ban)
+
+        self.matchers = {}
+        for check_type, type_bans in bans_by_type.items():
+            self.matchers[check_type] = self.get_values_matcher(
+                check_type, type_bans)
+
+    def get_values_matcher(self, check_type, bans):
+        if check_type == BAN_IP:
+            return IPMatcher(bans)
+        else:
+            return ValuesMatcher(bans)
+
+    def get_ban(self, values):
+        """
+        Takes list of (check_type, value) tuples, returns newest ban that
+        matches any of them and is not expired, or None
+        """
+        now = timezone.now()
+
+        found_ban = None
+        for check_type, value in values:
+            if check_type not in self.matchers:
+                continue
+
+            for ban in self.matchers[check_type].get_bans(value):
+                if ban['expires_on'] and ban['expires_on'] < now:
+                    continue
+                if not found_ban or found_ban['id'] < ban['id']:
+                    found_ban = ban
+
+        if found_ban:
+            return Ban(**found_ban)
+        else:
+            return None
+
+
+def get_matcher():
+    global _matcher
+
+    version = get_version()
+    if not _matcher or _matcher.version != version:
+        _matcher = build_matcher(version)
+    return _matcher
+
+
+def get_version():
+    token = threadstore.get(VERSION_CACHE_KEY)
+    if token is None:
+        token = cache.get(VERSION_CACHE_KEY)
+        if token is None:
+            token = int(time.time() * 1000)
+            cache.set(VERSION_CACHE_KEY, token, None)
+        threadstore.set(VERSION_CACHE_KEY, token)
+    return (cachebuster.get_version(BAN_CACHEBUSTER), token)
+
+
+def build_matcher(version):
+    queryset = Ban.objects.filter(is_checked=True).values(*BAN_FIELDS)
+    return BansMatcher(version, list(queryset.iterator()))
+
+
+def clear_matcher():
+    cache.delete(VERSION_CACHE_KEY)
+    threadstore.set(VERSION_CACHE_KEY, None)
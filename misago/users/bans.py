@@ -6,17 +6,22 @@ Calling this instead of Ban.objects.find_ban is preffered, if you don't want
 to use validate_X_banned validators
 """
 from datetime import timedelta
+from hashlib import md5
 
 from django.utils import timezone
-from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes
 
-from misago.core import cachebuster
+from misago.core import cachebuster, threadstore
+from misago.core.cache import cache
+from misago.users.banmatcher import get_version as get_bans_version
 from misago.users.models import BAN_IP, Ban, BanCache
 
 
-BAN_CACHE_SESSION_KEY = 'misago_ip_check'
+BAN_CACHE_KEY = 'misago_ip_check'
 BAN_VERSION_KEY = 'misago_bans'
 
+IP_BAN_CACHE_TIMEOUT = 3600
+
 
 def get_username_ban(username):
     try:
@@ -85,68 +90,54 @@ def _set_user_ban_cache(user):
 """
 Utility for checking if request came from banned IP
 
-This check may be performed frequently, which is why there is extra
-boilerplate that caches ban check result in session
+This check may be performed frequently, which is why its result is cached
+for request and in shared cache under key made of bans version and IP. This
+way checking IP never touches session, so no session is created for
+anonymous visitors just to remember that their IP was not banned.
 """
 def get_request_ip_ban(request):
-    session_ban_cache = _get_session_bancache(request)
-    if session_ban_cache:
-        if session_ban_cache['is_banned']:
-            return session_ban_cache
-        else:
-            return False
-
-    found_ban = get_ip_ban(request.user_ip)
-
-    ban_cache = request.session[BAN_CACHE_SESSION_KEY] = {
-        'version': cachebuster.get_version(BAN_VERSION_KEY),
-        'ip': request.user_ip,
-    }
-
-    if found_ban:
-        if found_ban.expires_on:
-            ban_cache['expires_on'] = found_ban.expires_on.isoformat()
-        else:
-            ban_cache['expires_on'] = None
-
-        ban_cache.update({
-                'is_banned': True,
-                'message': found_ban.user_message
-            })
-        request.session[BAN_CACHE_SESSION_KEY] = ban_cache
-        return _hydrate_session_cache(request.session[BAN_CACHE_SESSION_KEY])
+    ban_cache_key = _get_ip_ban_cache_key(request.user_ip)
+
+    ban_cache = threadstore.get(ban_cache_key)
+    if ban_cache is None:
+        ban_cache = cache.get(ban_cache_key)
+    if ban_cache is None or not _is_ip_ban_cache_valid(ban_cache):
+        ban_cache = _get_ip_ban_cache(request.user_ip)
+        cache.set(ban_cache_key, ban_cache, IP_BAN_CACHE_TIMEOUT)
+    threadstore.set(ban_cache_key, ban_cache)
+
+    if ban_cache['is_banned']:
+        return ban_cache.copy()
     else:
-        ban_cache['is_banned'] = False
-        request.session[BAN_CACHE_SESSION_KEY] = ban_cache
         return None
 
 
-def _get_session_bancache(request):
-    try:
-        ban_cache = request.session[BAN_CACHE_SESSION_KEY]
-        ban_cache = _hydrate_session_cache(ban_cache)
-        if ban_cache['ip'] != request.user_ip:
-            return None
-        if not cachebuster.is_valid(BAN_VERSION_KEY, ban_cache['version']):
-            return None
-        if ban_cache.get('expires_on'):
-            """
-            Hydrate ban date
-            """
-            if ban_cache['expires_on'] < timezone.today():
-                return None
-        return ban_cache
-    except KeyError:
-        return None
+def _get_ip_ban_cache_key(ip):
+    version, token = get_bans_version()
+    ip_hash = md5(force_bytes(ip)).hexdigest()
+    return '%s_%s_%s_%s' % (BAN_CACHE_KEY, version, token, ip_hash)
+
 
+def _is_ip_ban_cache_valid(ban_cache):
+    if ban_cache['is_banned'] and ban_cache['expires_on']:
+        return ban_cache['expires_on'] > timezone.now()
+    else:
+        return True
 
-def _hydrate_session_cache(ban_cache):
-    hydrated = ban_cache.copy()
 
-    if hydrated.get('expires_on'):
-        hydrated['expires_on'] = parse_datetime(hydrated['expires_on'])
+def _get_ip_ban_cache(ip):
+    ban_cache = {'ip': ip}
 
-    return hydrated
+    found_ban = get_ip_ban(ip)
+    if found_ban:
+        ban_cache.update({
+            'is_banned': True,
+            'expires_on': found_ban.expires_on,
+            'message': found_ban.user_message,
+        })
+    else:
+        ban_cache['is_banned'] = False
+    return ban_cache
 
 
 """
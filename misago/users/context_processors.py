@@ -1,5 +1,7 @@
 from django.core.urlresolvers import reverse
+from django.utils import timezone
 
+from misago.users.online.buckets import get_online_users_count
 from misago.users.pages import usercp, users_list, user_profile
 from misago.users.serializers import (
     AuthenticatedUserSerializer, AnonymousUserSerializer)
@@ -32,6 +34,8 @@ def user_links(request):
 def preload_user_json(request):
     request.frontend_context.update({
         'isAuthenticated': request.user.is_authenticated(),
+        'onlineUsersCount': get_online_users_count(
+            request.user.acl, timezone.now()),
     })
 
     if request.user.is_authenticated():
@@ -6,9 +6,10 @@ from misago.core import forms, threadstore
 from misago.core.validators import validate_sluggable
 from misago.acl.models import Role
 
+from misago.users.iptree import is_network, normalize_network
 from misago.users.models import (
     AUTO_SUBSCRIBE_CHOICES, PRIVATE_THREAD_INVITES_LIMITS_CHOICES,
-    BANS_CHOICES, RESTRICTIONS_CHOICES, Ban, Rank, WarningLevel)
+    BAN_IP, BANS_CHOICES, RESTRICTIONS_CHOICES, Ban, Rank, WarningLevel)
 from misago.users.validators import (
     validate_username, validate_email, validate_password)
 
@@ -418,7 +419,8 @@ class BanForm(forms.ModelForm):
         max_length=250,
         help_text=_('This value is case-insensitive and accepts asterisk (*) '
                     'for rought matches. For example, making IP ban for value '
-                    '"83.*" will ban all IP addresses beginning with "83.".'),
+                    '"83.*" will ban all IP addresses beginning with "83.". '
+                    'IP bans also accept networks, like "83.12.0.0/16".'),
         error_messages={
             'max_length': _("Banned value can't be longer "
                             "than 250 characters.")
@@ -469,6 +471,16 @@ class BanForm(forms.ModelForm):
         if data == '*':
             raise forms.ValidationError(_("Banned value is too vague."))
 
+        if self.cleaned_data.get('check_type') == BAN_IP and is_network(data):
+            if '*' in data:
+                raise forms.ValidationError(
+                    _("IP network can't contain asterisks."))
+            try:
+                data = normalize_network(data)
+            except ValueError:
+                raise forms.ValidationError(
+                    _("Banned value is not valid IP network."))
+
         return data
 
 
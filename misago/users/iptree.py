@@ -0,0 +1,106 @@
+"""
+IP networks and prefix tree for IP bans
+
+IP bans may be written as CIDR networks (eg. "83.12.0.0/16" or
+"2001:db8::/32"), that are stored normalized, with host bits cleared.
+Networks are kept in binary prefix tree, so IP is checked against all
+of them in number of steps not greater than its length in bits.
+"""
+import socket
+
+
+IP_VERSIONS = (
+    (socket.AF_INET, 32),
+    (socket.AF_INET6, 128),
+)
+
+
+def parse_ip(value):
+    """
+    Returns tuple of address family, address length and address as int
+    Raises ValueError if value is not valid IP address
+    """
+    for family, length in IP_VERSIONS:
+        try:
+            packed = socket.inet_pton(family, value)
+        except (socket.error, UnicodeError, TypeError):
+            continue
+
+        address = 0
+        for byte in bytearray(packed):
+            address = (address << 8) | byte
+        return family, length, address
+
+    raise ValueError('"%s" is not valid IP address' % value)
+
+
+def format_ip(family, length, address):
+    packed = bytearray()
+    for shift in range(length - 8, -8, -8):
+        packed.append((address >> shift) & 0xff)
+    return socket.inet_ntop(family, bytes(packed))
+
+
+def is_network(value):
+    return '/' in value
+
+
+def parse_network(value):
+    """
+    Returns tuple of address family, address length, network address as int
+    and prefix length. Raises ValueError if value is not valid network
+    """
+    try:
+        address, prefix = value.strip().split('/')
+        prefix = int(prefix)
+    except ValueError:
+        raise ValueError('"%s" is not valid network' % value)
+
+    family, length, address = parse_ip(address)
+    if not 0 < prefix <= length:
+        raise ValueError('"%s" has invalid prefix length' % value)
+
+    mask = ((1 << prefix) - 1) << (length - prefix)
+    return family, length, address & mask, prefix
+
+
+def normalize_network(value):
+    """
+    Returns network in "address/prefix" form with host bits cleared
+    """
+    family, length, address, prefix = parse_network(value)
+    return '%s/%s' % (format_ip(family, length, address), prefix)
+
+
+class IPTree(object):
+    def __init__(self):
+        self.roots = {}
+
+    def insert(self, network, item):
+        family, length, address, prefix = parse_network(network)
+
+        node = self.roots.setdefault(family, {})
+        for bit in xrange(prefix):
+            key = (address >> (length - bit - 1)) & 1
+            node = node.setdefault(key, {})
+        node.setdefault('items', []).append(item)
+
+    def lookup(self, ip):
+        """
+        Returns list of items inserted for networks containing ip
+        """
+        try:
+            family, length, address = parse_ip(ip)
+        except ValueError:
+            return []
+
+        items = []
+        node = self.roots.get(family)
+        bit = 0
+        while node is not None:
+            items.extend(node.get('items', []))
+            if bit == length:
+                break
+            node = node.get((address >> (length - bit - 1)) & 1)
+            bit += 1
+        return items
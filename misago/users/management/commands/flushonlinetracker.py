@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from misago.users.online.presence import get_presence_backend
+
+
+class Command(BaseCommand):
+    help = 'Writes buffered online tracker clicks to database'
+
+    def handle(self, *args, **options):
+        flushed_count = get_presence_backend().flush()
+        self.stdout.write('Online tracker clicks flushed: %s' % flushed_count)
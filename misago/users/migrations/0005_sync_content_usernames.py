@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+from misago.core.pgutils import CreatePartialIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('misago_users', '0004_default_ranks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='sync_content_usernames',
+            field=models.BooleanField(default=False),
+        ),
+        CreatePartialIndex(
+            field='User.id',
+            index_name='misago_user_sync_content_usernames_partial',
+            condition='sync_content_usernames = TRUE',
+        ),
+    ]
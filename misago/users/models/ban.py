@@ -6,6 +6,8 @@ from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
 from misago.core import cachebuster
+from misago.core.cache import invalidate_on_commit
+from misago.users.iptree import IPTree, is_network, normalize_network
 
 
 __all__ = [
@@ -40,37 +42,32 @@ class BansManager(models.Manager):
         return self.get_ban(email=email)
 
     def invalidate_cache(self):
+        from misago.users.banmatcher import clear_matcher
+
         cachebuster.invalidate(BAN_CACHEBUSTER)
+        invalidate_on_commit(clear_matcher)
+
+    def bulk_create(self, *args, **kwargs):
+        from misago.users.banmatcher import clear_matcher
+
+        bans = super(BansManager, self).bulk_create(*args, **kwargs)
+        invalidate_on_commit(clear_matcher)
+        return bans
 
     def get_ban(self, username=None, email=None, ip=None):
-        checks = []
+        from misago.users.banmatcher import get_matcher
 
+        values = []
         if username:
-            username = username.lower()
-            checks.append(BAN_USERNAME)
+            values.append((BAN_USERNAME, username.lower()))
         if email:
-            email = email.lower()
-            checks.append(BAN_EMAIL)
+            values.append((BAN_EMAIL, email.lower()))
         if ip:
-            checks.append(BAN_IP)
-
-        queryset = self.filter(is_checked=True)
-        if len(checks) == 1:
-            queryset = queryset.filter(check_type=checks[0])
-        elif checks:
-            queryset = queryset.filter(check_type__in=checks)
-
-        for ban in queryset.order_by('-id').iterator():
-            if ban.is_expired:
-                continue
-            elif (ban.check_type == BAN_USERNAME and username and
-                    ban.check_value(username)):
-                return ban
-            elif (ban.check_type == BAN_EMAIL and email and
-                    ban.check_value(email)):
-                return ban
-            elif ban.check_type == BAN_IP and ip and ban.check_value(ip):
-                return ban
+            values.append((BAN_IP, ip))
+
+        ban = get_matcher().get_ban(values)
+        if ban:
+            return ban
         else:
             raise Ban.DoesNotExist('specified values are not banned')
 
@@ -86,10 +83,24 @@ class Ban(models.Model):
     objects = BansManager()
 
     def save(self, *args, **kwargs):
+        from misago.users.banmatcher import clear_matcher
+
         self.banned_value = self.banned_value.lower()
+        if self.check_type == BAN_IP and is_network(self.banned_value):
+            try:
+                self.banned_value = normalize_network(self.banned_value)
+            except ValueError:
+                pass # invalid networks are never matched
         self.is_checked = not self.is_expired
 
-        return super(Ban, self).save(*args, **kwargs)
+        super(Ban, self).save(*args, **kwargs)
+        invalidate_on_commit(clear_matcher)
+
+    def delete(self, *args, **kwargs):
+        from misago.users.banmatcher import clear_matcher
+
+        super(Ban, self).delete(*args, **kwargs)
+        invalidate_on_commit(clear_matcher)
 
     def get_serialized_message(self):
         from misago.users.serializers import BanMessageSerializer
@@ -111,7 +122,14 @@ class Ban(models.Model):
             return False
 
     def check_value(self, value):
-        if '*' in self.banned_value:
+        if self.check_type == BAN_IP and is_network(self.banned_value):
+            tree = IPTree()
+            try:
+                tree.insert(self.banned_value, self)
+            except ValueError:
+                return False # invalid networks are never matched
+            return bool(tree.lookup(value))
+        elif '*' in self.banned_value:
             regex = re.escape(self.banned_value).replace('\*', '(.*?)')
             return re.search('^%s$' % regex, value) is not None
         else:
@@ -249,6 +249,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     )
     unread_private_threads = models.PositiveIntegerField(default=0)
     sync_unread_private_threads = models.BooleanField(default=False)
+    sync_content_usernames = models.BooleanField(default=False)
 
     subscribe_to_started_threads = models.PositiveIntegerField(
         default=AUTO_SUBSCRIBE_NONE
@@ -272,6 +273,14 @@ class User(AbstractBaseUser, PermissionsMixin):
         """Locks user in DB"""
         return User.objects.select_for_update().get(pk=self.pk)
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields and 'username' in update_fields:
+            # content update is flagged in same query that changes name
+            kwargs['update_fields'] = list(update_fields) + [
+                'sync_content_usernames']
+        return super(User, self).save(*args, **kwargs)
+
     def delete(self, *args, **kwargs):
         if kwargs.pop('delete_content', False):
             self.delete_content()
@@ -0,0 +1,182 @@
+"""
+Time-bucketed index of online users
+
+Listing or counting users that were active within ACTIVITY_CUTOFF would
+require scan of online tracker table. Instead, recorded clicks are added to
+short buckets kept in cache. Every user has key pointing at bucket of their
+latest recorded click, and is added to that bucket once, under next number
+in bucket's sequence. Buckets also keep counters of users whose latest click
+they hold, that are moved between buckets as users click, so online users
+are counted by summing counters of few buckets covering ACTIVITY_CUTOFF.
+
+Online users are users found in those buckets whose latest bucket is still
+one of them. Oldest of those buckets starts before ACTIVITY_CUTOFF, so users
+found only in it are listed if their last click is within it. Buckets store
+users ids only, so users hiding their presence are excluded when online
+users are listed. Counters count users as hidden if they were hiding their
+presence when their latest click was recorded.
+
+Users that signed out are removed from their latest bucket.
+"""
+from calendar import timegm
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from misago.core.cache import cache
+
+
+BUCKETS_CACHE_KEY = 'misago_online_buckets'
+
+BUCKET_LENGTH = 20
+
+
+def get_bucket(now):
+    return timegm(now.utctimetuple()) // BUCKET_LENGTH
+
+
+def get_bucket_key(bucket):
+    return '%s_%s' % (BUCKETS_CACHE_KEY, bucket)
+
+
+def get_user_key(user_id):
+    return '%s_user_%s' % (BUCKETS_CACHE_KEY, user_id)
+
+
+def get_counter_key(bucket, is_hidden):
+    if is_hidden:
+        return '%s_hidden' % get_bucket_key(bucket)
+    else:
+        return '%s_visible' % get_bucket_key(bucket)
+
+
+def get_buckets(now):
+    from misago.users.online.utils import ACTIVITY_CUTOFF
+
+    current_bucket = get_bucket(now)
+    buckets_count = int(ACTIVITY_CUTOFF.total_seconds()) // BUCKET_LENGTH
+    return range(current_bucket - buckets_count, current_bucket + 1)
+
+
+def get_timeout():
+    from misago.users.online.utils import ACTIVITY_CUTOFF
+    return int(ACTIVITY_CUTOFF.total_seconds()) + BUCKET_LENGTH * 2
+
+
+def record(user, now):
+    bucket = get_bucket(now)
+    bucket_key = get_bucket_key(bucket)
+    timeout = get_timeout()
+
+    if not cache.add('%s_user_%s' % (bucket_key, user.pk), True, timeout):
+        return
+
+    user_key = get_user_key(user.pk)
+    previous_bucket = cache.get(user_key)
+    if previous_bucket and previous_bucket[0] > bucket:
+        return
+
+    cache.set(user_key, (bucket, user.is_hiding_presence), timeout)
+
+    sequence_key = '%s_sequence' % bucket_key
+    try:
+        sequence = cache.incr(sequence_key)
+    except ValueError:
+        cache.add(sequence_key, 0, timeout)
+        sequence = cache.incr(sequence_key)
+
+    cache.set('%s_%s' % (bucket_key, sequence), user.pk, timeout)
+
+    incr_counter(
+        get_counter_key(bucket, user.is_hiding_presence), 1, timeout)
+    if previous_bucket:
+        incr_counter(get_counter_key(*previous_bucket), -1)
+
+
+def remove(user):
+    """
+    Removes user from their latest bucket
+    """
+    user_key = get_user_key(user.pk)
+    latest_bucket = cache.get(user_key)
+    if latest_bucket:
+        cache.delete(user_key)
+        incr_counter(get_counter_key(*latest_bucket), -1)
+
+
+def incr_counter(counter_key, delta, timeout=None):
+    try:
+        cache.incr(counter_key, delta)
+    except ValueError:
+        # counters of buckets that expired are not decremented
+        if timeout:
+            cache.add(counter_key, 0, timeout)
+            cache.incr(counter_key, delta)
+
+
+def get_online_users_ids(now):
+    """
+    Returns set of ids of users active within ACTIVITY_CUTOFF
+    """
+    from misago.users.online.presence import get_presence_backend
+    from misago.users.online.utils import ACTIVITY_CUTOFF
+
+    buckets = get_buckets(now)
+    sequences_keys = ['%s_sequence' % get_bucket_key(b) for b in buckets]
+    sequences = cache.get_many(sequences_keys)
+
+    entries_keys = []
+    for sequence_key, sequence in sequences.items():
+        bucket_key = sequence_key[:-len('_sequence')]
+        for i in xrange(1, sequence + 1):
+            entries_keys.append('%s_%s' % (bucket_key, i))
+
+    users_ids = set(cache.get_many(entries_keys).values())
+    latest_buckets = cache.get_many([get_user_key(u) for u in users_ids])
+
+    online_users_ids = set()
+    edge_users_ids = set()
+    for user_id in users_ids:
+        latest_bucket = latest_buckets.get(get_user_key(user_id))
+        if not latest_bucket or latest_bucket[0] < buckets[0]:
+            continue
+        if latest_bucket[0] == buckets[0]:
+            edge_users_ids.add(user_id)
+        else:
+            online_users_ids.add(user_id)
+
+    if edge_users_ids:
+        User = get_user_model()
+        last_clicks = get_presence_backend().get_last_clicks(
+            [User(pk=user_id) for user_id in edge_users_ids])
+
+        cutoff = now - ACTIVITY_CUTOFF
+        for user_id, last_click in last_clicks.items():
+            if last_click >= cutoff:
+                online_users_ids.add(user_id)
+
+    return online_users_ids
+
+
+def get_online_users(acl, now):
+    """
+    Returns queryset of online users that acl allows to see
+    """
+    queryset = get_user_model().objects.filter(
+        id__in=get_online_users_ids(now))
+    if not acl['can_see_hidden_users']:
+        queryset = queryset.filter(is_hiding_presence=False)
+    return queryset
+
+
+def get_online_users_count(acl, now=None):
+    """
+    Returns number of online users that acl allows to see
+    """
+    buckets = get_buckets(now or timezone.now())
+
+    counters_keys = [get_counter_key(b, False) for b in buckets]
+    if acl['can_see_hidden_users']:
+        counters_keys += [get_counter_key(b, True) for b in buckets]
+
+    return max(sum(cache.get_many(counters_keys).values()), 0)
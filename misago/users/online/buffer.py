@@ -0,0 +1,75 @@
+"""
+Write-behind buffer for online tracker clicks
+
+Instead of updating Online row on every request, newest click of every user
+is kept in cache buffer and written to Online rows and users last_login in
+bulk by "flushonlinetracker" command. Buffered clicks are also read by
+requests to tell if it's time to buffer next one without reading database.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Value, When
+from django.db.transaction import atomic
+
+from misago.core.cachebuffer import CacheBuffer
+
+from misago.users.models import Online
+
+
+FLUSH_CHUNK_SIZE = 500
+
+clicks_buffer = CacheBuffer('misago_online_buffer')
+
+
+def get_click(user_id):
+    """
+    Returns (last_click, current_ip) of newest buffered click or None
+    """
+    return clicks_buffer.get(user_id)
+
+
+def get_clicks(users_ids):
+    """
+    Returns dict of user_id: (last_click, current_ip) of buffered clicks
+    """
+    return clicks_buffer.get_many(users_ids)
+
+
+def clear_click(user_id):
+    clicks_buffer.delete(user_id)
+
+
+def record(user_id, last_click, current_ip):
+    clicks_buffer.set(user_id, (last_click, current_ip))
+
+
+def flush():
+    return clicks_buffer.flush(save_clicks)
+
+
+@atomic
+def save_clicks(clicks):
+    users_ids = sorted(clicks.keys())
+    for i in xrange(0, len(users_ids), FLUSH_CHUNK_SIZE):
+        chunk = users_ids[i:i + FLUSH_CHUNK_SIZE]
+
+        Online.objects.filter(user_id__in=chunk).update(
+            last_click=Case(
+                *[When(user_id=user_id, then=Value(clicks[user_id][0]))
+                  for user_id in chunk],
+                output_field=Online._meta.get_field('last_click')
+            ),
+            current_ip=Case(
+                *[When(user_id=user_id, then=Value(clicks[user_id][1]))
+                  for user_id in chunk],
+                output_field=Online._meta.get_field('current_ip')
+            ),
+        )
+
+        User = get_user_model()
+        User.objects.filter(id__in=chunk).update(
+            last_login=Case(
+                *[When(id=user_id, then=Value(clicks[user_id][0]))
+                  for user_id in chunk],
+                output_field=User._meta.get_field('last_login')
+            ),
+        )
@@ -0,0 +1,109 @@
+"""
+Users presence backends
+
+Presence backend records users clicks and tells when users were last seen.
+DatabasePresence keeps them in Online table. When MISAGO_ONLINE_TRACKER_BUFFER
+is enabled, clicks are kept in cache buffer and read from it, and written to
+Online table and users last_login in bulk when "flushonlinetracker" command
+runs.
+"""
+from datetime import timedelta
+from importlib import import_module
+
+from misago.conf import settings
+
+from misago.users.models import Online
+from misago.users.online import buckets, buffer
+
+
+def get_presence_backend():
+    name_bits = settings.MISAGO_PRESENCE_BACKEND.split('.')
+
+    backend_module = import_module('.'.join(name_bits[:-1]))
+    return getattr(backend_module, name_bits[-1])()
+
+
+def is_click_outdated(last_click, current_ip, now):
+    last_click_on, last_ip = last_click
+    if last_ip != current_ip:
+        return True
+
+    threshold = timedelta(seconds=settings.MISAGO_ONLINE_TRACKER_THRESHOLD)
+    return last_click_on < now - threshold
+
+
+class DatabasePresence(object):
+    def update(self, tracker, current_ip, now):
+        if settings.MISAGO_ONLINE_TRACKER_BUFFER:
+            last_click = buffer.get_click(tracker.user_id)
+        else:
+            last_click = None
+        last_click = last_click or (tracker.last_click, tracker.current_ip)
+
+        if not is_click_outdated(last_click, current_ip, now):
+            return
+
+        tracker.current_ip = current_ip
+        tracker.last_click = now
+
+        if settings.MISAGO_ONLINE_TRACKER_BUFFER:
+            buffer.record(tracker.user_id, now, current_ip)
+        else:
+            tracker.save(update_fields=['last_click', 'current_ip'])
+
+        buckets.record(tracker.user, now)
+
+    def get_last_click(self, tracker):
+        """
+        Returns (last_click, current_ip) of user's newest click
+        """
+        if settings.MISAGO_ONLINE_TRACKER_BUFFER:
+            last_click = buffer.get_click(tracker.user_id)
+            if last_click:
+                return last_click
+        return tracker.last_click, tracker.current_ip
+
+    def get_last_clicks(self, users):
+        """
+        Returns dict of user_id: last_click for users that have trackers
+        """
+        if settings.MISAGO_ONLINE_TRACKER_BUFFER:
+            clicks = buffer.get_clicks([user.pk for user in users])
+            users = [user for user in users if user.pk not in clicks]
+        else:
+            clicks = {}
+
+        last_clicks = self.get_trackers_last_clicks(users)
+        for user_id, click in clicks.items():
+            last_clicks[user_id] = click[0]
+        return last_clicks
+
+    def get_trackers_last_clicks(self, users):
+        last_clicks = {}
+        users_without_trackers = []
+
+        online_field = Online._meta.get_field('user')
+        cache_name = online_field.remote_field.get_cache_name()
+        for user in users:
+            if hasattr(user, cache_name):
+                online_tracker = getattr(user, cache_name)
+                if online_tracker:
+                    last_clicks[user.pk] = online_tracker.last_click
+            else:
+                users_without_trackers.append(user.pk)
+
+        if users_without_trackers:
+            queryset = Online.objects.filter(
+                user_id__in=users_without_trackers)
+            for user_id, last_click in queryset.values_list(
+                    'user_id', 'last_click'):
+                last_clicks[user_id] = last_click
+
+        return last_clicks
+
+    def stop(self, tracker):
+        if settings.MISAGO_ONLINE_TRACKER_BUFFER:
+            buffer.clear_click(tracker.user_id)
+
+    def flush(self):
+        return buffer.flush()
@@ -1,5 +1,8 @@
 from django.utils import timezone
+
 from misago.users.models import Online
+from misago.users.online import buckets
+from misago.users.online.presence import get_presence_backend
 
 
 def mute_tracker(request):
@@ -15,16 +18,21 @@ def start_tracking(request, user):
     request.user.online_tracker = online_tracker
     request._misago_online_tracker = online_tracker
 
+    buckets.record(user, online_tracker.last_click)
 
-def update_tracker(request, tracker):
-    tracker.current_ip = request.user_ip
-    tracker.last_click = timezone.now()
 
-    tracker.save(update_fields=['last_click', 'current_ip'])
+def update_tracker(request, tracker):
+    get_presence_backend().update(tracker, request.user_ip, timezone.now())
 
 
 def stop_tracking(request, tracker):
+    presence = get_presence_backend()
+    tracker.last_click, tracker.current_ip = presence.get_last_click(tracker)
+    presence.stop(tracker)
+
     user = tracker.user
+    buckets.remove(user)
+
     user.last_login = tracker.last_click
     user.last_ip = tracker.current_ip
     user.save(update_fields=['last_login', 'last_ip'])
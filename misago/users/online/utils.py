@@ -3,7 +3,8 @@ from datetime import timedelta
 from django.utils import timezone
 
 from misago.users.bans import get_user_ban
-from misago.users.models import Online, BanCache
+from misago.users.models import BanCache
+from misago.users.online.presence import get_presence_backend
 
 
 ACTIVITY_CUTOFF = timedelta(minutes=2)
@@ -27,16 +28,15 @@ def get_user_status(user, acl):
         user_status['is_banned'] = True
         user_status['banned_until'] = user_ban.expires_on
 
-    try:
-        online_tracker = user.online_tracker
-        is_hidden = user.is_hiding_presence and not acl['can_see_hidden_users']
+    if not hasattr(user, 'last_click'):
+        last_clicks = get_presence_backend().get_last_clicks([user])
+        user.last_click = last_clicks.get(user.pk)
 
-        if online_tracker and not is_hidden:
-            if online_tracker.last_click >= timezone.now() - ACTIVITY_CUTOFF:
-                user_status['is_online'] = True
-                user_status['last_click'] = online_tracker.last_click
-    except Online.DoesNotExist:
-        pass
+    is_hidden = user.is_hiding_presence and not acl['can_see_hidden_users']
+    if user.last_click and not is_hidden:
+        if user.last_click >= timezone.now() - ACTIVITY_CUTOFF:
+            user_status['is_online'] = True
+            user_status['last_click'] = user.last_click
 
     if user_status['is_hidden']:
         if acl['can_see_hidden_users']:
@@ -68,9 +68,10 @@ def make_users_status_aware(users, acl, fetch_state=False):
         for ban_cache in BanCache.objects.filter(user__in=users_dict.keys()):
             users_dict[ban_cache.user_id].ban_cache = ban_cache
 
-        # Fill user online trackers
-        for online_tracker in Online.objects.filter(user__in=users_dict.keys()):
-            users_dict[online_tracker.user_id].online_tracker = online_tracker
+    # Fill users last clicks
+    last_clicks = get_presence_backend().get_last_clicks(users)
+    for user in users:
+        user.last_click = last_clicks.get(user.pk)
 
     # Fill user states
     for user in users:
@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from misago.users.banmatcher import BansMatcher
+from misago.users.models import Ban, BAN_EMAIL, BAN_IP, BAN_USERNAME
+
+
+def get_ban(ban_id, check_type, banned_value, expires_on=None):
+    return {
+        'id': ban_id,
+        'check_type': check_type,
+        'banned_value': banned_value,
+        'user_message': None,
+        'staff_message': None,
+        'expires_on': expires_on,
+    }
+
+
+class BansMatcherTests(TestCase):
+    def setUp(self):
+        self.matcher = BansMatcher(1, [
+            get_ban(1, BAN_USERNAME, 'bob'),
+            get_ban(2, BAN_USERNAME, 'adm*'),
+            get_ban(3, BAN_EMAIL, '*.ru'),
+            get_ban(4, BAN_EMAIL, '*@spam.ru'),
+            get_ban(5, BAN_IP, '127.0.*'),
+            get_ban(6, BAN_USERNAME, 'admiral',
+                    timezone.now() - timedelta(days=1)),
+        ])
+
+    def test_exact_match(self):
+        """matcher finds ban for exact value"""
+        self.assertEqual(self.matcher.get_ban([(BAN_USERNAME, 'bob')]).pk, 1)
+        self.assertIsNone(self.matcher.get_ban([(BAN_USERNAME, 'bobby')]))
+        self.assertIsNone(self.matcher.get_ban([(BAN_EMAIL, 'bob')]))
+
+    def test_wildcard_match(self):
+        """matcher finds newest ban for wildcard value"""
+        ban = self.matcher.get_ban([(BAN_EMAIL, 'bob@spam.ru')])
+        self.assertEqual(ban.pk, 4)
+
+        ban = self.matcher.get_ban([(BAN_EMAIL, 'bob@mail.ru')])
+        self.assertEqual(ban.pk, 3)
+
+        self.assertIsNone(self.matcher.get_ban([(BAN_EMAIL, 'bob@mail.com')]))
+
+    def test_expired_ban(self):
+        """matcher skips expired bans"""
+        ban = self.matcher.get_ban([(BAN_USERNAME, 'admiral')])
+        self.assertEqual(ban.pk, 2)
+
+    def test_many_values(self):
+        """matcher checks all values"""
+        ban = self.matcher.get_ban([
+            (BAN_USERNAME, 'jeb'),
+            (BAN_IP, '127.0.0.1'),
+        ])
+        self.assertEqual(ban.pk, 5)
+
+    def test_matcher_is_rebuilt(self):
+        """bans manager sees bans created after matcher was built"""
+        with self.assertRaises(Ban.DoesNotExist):
+            Ban.objects.get_ban(username='jeb')
+
+        ban = Ban.objects.create(banned_value='jeb')
+        self.assertEqual(Ban.objects.get_ban(username='jeb').pk, ban.pk)
+
+        ban.delete()
+        with self.assertRaises(Ban.DoesNotExist):
+            Ban.objects.get_ban(username='jeb')
@@ -191,6 +191,24 @@ class RequestIPBansTests(TestCase):
         # repeated call uses cache
         get_request_ip_ban(FakeRequest())
 
+    def test_new_ban(self):
+        """cached check result is not used after ip is banned"""
+        self.assertIsNone(get_request_ip_ban(FakeRequest()))
+
+        Ban.objects.create(check_type=BAN_IP,
+                           banned_value='127.0.0.*',
+                           user_message='User reason')
+
+        ip_ban = get_request_ip_ban(FakeRequest())
+        self.assertTrue(ip_ban['is_banned'])
+        self.assertEqual(ip_ban['message'], 'User reason')
+
+    def test_session_untouched(self):
+        """ip check result is not stored in session"""
+        request = FakeRequest()
+        get_request_ip_ban(request)
+        self.assertEqual(request.session, {})
+
 
 class BanUserTests(TestCase):
     def test_ban_user(self):
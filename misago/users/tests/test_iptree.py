@@ -0,0 +1,52 @@
+from django.test import TestCase
+
+from misago.users.iptree import IPTree, normalize_network
+from misago.users.models import Ban, BAN_IP
+
+
+class IPTreeTests(TestCase):
+    def test_normalize_network(self):
+        """networks are normalized"""
+        self.assertEqual(normalize_network('83.12.1.5/16'), '83.12.0.0/16')
+        self.assertEqual(
+            normalize_network('2001:DB8:0:0::1/32'), '2001:db8::/32')
+
+        with self.assertRaises(ValueError):
+            normalize_network('83.12.1.5/33')
+        with self.assertRaises(ValueError):
+            normalize_network('83.12.1/16')
+
+    def test_lookup(self):
+        """tree returns items of all networks containing ip"""
+        tree = IPTree()
+        tree.insert('83.0.0.0/8', 'a')
+        tree.insert('83.12.0.0/16', 'b')
+        tree.insert('83.12.1.1/32', 'c')
+        tree.insert('2001:db8::/32', 'd')
+
+        self.assertEqual(tree.lookup('83.12.1.1'), ['a', 'b', 'c'])
+        self.assertEqual(tree.lookup('83.12.1.2'), ['a', 'b'])
+        self.assertEqual(tree.lookup('83.13.1.1'), ['a'])
+        self.assertEqual(tree.lookup('84.12.1.1'), [])
+        self.assertEqual(tree.lookup('2001:db8:1::1'), ['d'])
+        self.assertEqual(tree.lookup('2001:db9::1'), [])
+        self.assertEqual(tree.lookup('invalid'), [])
+
+    def test_network_ban(self):
+        """ip bans for networks are normalized and matched"""
+        ban = Ban.objects.create(
+            check_type=BAN_IP, banned_value='83.12.1.5/16')
+        self.assertEqual(ban.banned_value, '83.12.0.0/16')
+
+        self.assertEqual(Ban.objects.get_ip_ban('83.12.200.1').pk, ban.pk)
+        with self.assertRaises(Ban.DoesNotExist):
+            Ban.objects.get_ip_ban('83.13.0.1')
+
+    def test_invalid_network_ban(self):
+        """ip bans for invalid networks are never matched"""
+        ban = Ban.objects.create(
+            check_type=BAN_IP, banned_value='83.12.1/16')
+        self.assertFalse(ban.check_value('83.12.1.1'))
+
+        with self.assertRaises(Ban.DoesNotExist):
+            Ban.objects.get_ip_ban('83.12.1.1')
@@ -0,0 +1,138 @@
+import json
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+
+from misago.acl.testutils import override_acl
+from misago.core.cache import cache
+
+from misago.users.models import Online
+from misago.users.online import buckets
+from misago.users.online.tracker import stop_tracking
+from misago.users.testutils import AuthenticatedUserTestCase
+
+
+class OnlineBucketsTests(AuthenticatedUserTestCase):
+    def setUp(self):
+        super(OnlineBucketsTests, self).setUp()
+        cache.clear()
+
+        self.other_user = self.get_superuser()
+        self.other_user.is_hiding_presence = True
+        self.other_user.save()
+
+    def test_online_users(self):
+        """recorded users are online until their buckets expire"""
+        now = timezone.now()
+
+        buckets.record(self.user, now)
+        buckets.record(self.user, now)
+        buckets.record(self.other_user, now - timedelta(minutes=10))
+
+        self.assertEqual(
+            buckets.get_online_users_ids(now), set([self.user.pk]))
+
+    def test_edge_bucket(self):
+        """users in oldest bucket are online if clicked within cutoff"""
+        now = datetime.utcfromtimestamp(
+            buckets.get_bucket(timezone.now()) * buckets.BUCKET_LENGTH + 10)
+        now = timezone.make_aware(now, timezone.utc)
+
+        edge_click = now - timedelta(seconds=125)
+        self.assertEqual(
+            buckets.get_bucket(edge_click), buckets.get_buckets(now)[0])
+
+        buckets.record(self.user, now)
+        buckets.record(self.other_user, edge_click)
+        tracker = Online.objects.create(
+            user=self.other_user,
+            current_ip='127.0.0.1',
+            last_click=edge_click,
+        )
+
+        self.assertEqual(
+            buckets.get_online_users_ids(now), set([self.user.pk]))
+
+        tracker.last_click = now - timedelta(seconds=115)
+        tracker.save()
+
+        self.assertEqual(
+            buckets.get_online_users_ids(now),
+            set([self.user.pk, self.other_user.pk]))
+
+    def test_user_moves_between_buckets(self):
+        """user is counted once in their latest bucket"""
+        now = timezone.now()
+        acl = {'can_see_hidden_users': True}
+
+        buckets.record(self.other_user, now - timedelta(seconds=60))
+        self.assertEqual(buckets.get_online_users_count(acl, now), 1)
+
+        buckets.record(self.other_user, now)
+        self.assertEqual(buckets.get_online_users_count(acl, now), 1)
+        self.assertEqual(
+            buckets.get_online_users_ids(now), set([self.other_user.pk]))
+
+    def test_stop_tracking(self):
+        """user that signed out is removed from buckets"""
+        now = timezone.now()
+        acl = {'can_see_hidden_users': True}
+
+        buckets.record(self.other_user, now)
+        tracker = Online.objects.create(
+            user=self.other_user,
+            current_ip='127.0.0.1',
+            last_click=now,
+        )
+        self.assertEqual(buckets.get_online_users_count(acl, now), 1)
+
+        stop_tracking(None, tracker)
+
+        self.assertEqual(buckets.get_online_users_ids(now), set())
+        self.assertEqual(buckets.get_online_users_count(acl, now), 0)
+
+    def test_hidden_users(self):
+        """hidden users are listed only for users that can see them"""
+        now = timezone.now()
+
+        buckets.record(self.user, now)
+        buckets.record(self.other_user, now)
+
+        acl = {'can_see_hidden_users': False}
+        self.assertEqual(
+            list(buckets.get_online_users(acl, now)), [self.user])
+        self.assertEqual(buckets.get_online_users_count(acl, now), 1)
+
+        acl = {'can_see_hidden_users': True}
+        queryset = buckets.get_online_users(acl, now)
+        self.assertEqual(
+            sorted(queryset.values_list('pk', flat=True)),
+            sorted([self.user.pk, self.other_user.pk]))
+        self.assertEqual(buckets.get_online_users_count(acl, now), 2)
+
+    def test_user_starts_hiding(self):
+        """user that starts hiding after click is no longer listed"""
+        now = timezone.now()
+
+        buckets.record(self.user, now)
+
+        self.user.is_hiding_presence = True
+        self.user.save()
+
+        acl = {'can_see_hidden_users': False}
+        self.assertEqual(list(buckets.get_online_users(acl, now)), [])
+
+    def test_online_users_api(self):
+        """api lists online users"""
+        buckets.record(self.user, timezone.now())
+        buckets.record(self.other_user, timezone.now())
+
+        override_acl(self.user, {'can_see_hidden_users': 0})
+
+        response = self.client.get('/api/users/?list=online')
+        self.assertEqual(response.status_code, 200)
+
+        response_json = json.loads(response.content)
+        self.assertEqual(response_json['count'], 1)
+        self.assertEqual(len(response_json['results']), 1)
+        self.assertEqual(response_json['results'][0]['id'], self.user.pk)
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+from django.utils.six import StringIO
+
+from misago.users.management.commands import flushonlinetracker
+from misago.users.models import Online
+from misago.users.online import tracker
+
+
+class MockRequest(object):
+    def __init__(self, user_ip='127.0.0.1'):
+        self.user_ip = user_ip
+
+
+class OnlineTrackerTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user('Bob', 'bob@bob.com', 'pass123')
+
+        self.last_click = timezone.now() - timedelta(seconds=10)
+        Online.objects.filter(user=self.user).update(
+            last_click=self.last_click, current_ip='127.0.0.1')
+
+    def get_tracker(self):
+        return Online.objects.get(user=self.user)
+
+    def test_update_skipped_within_threshold(self):
+        """tracker isn't updated if last click is recent and ip is same"""
+        tracker.update_tracker(MockRequest(), self.get_tracker())
+        self.assertEqual(self.get_tracker().last_click, self.last_click)
+
+    def test_update_on_ip_change(self):
+        """tracker is updated if user's ip has changed"""
+        tracker.update_tracker(MockRequest('127.0.0.2'), self.get_tracker())
+
+        online_tracker = self.get_tracker()
+        self.assertEqual(online_tracker.current_ip, '127.0.0.2')
+        self.assertTrue(online_tracker.last_click > self.last_click)
+
+    @override_settings(MISAGO_ONLINE_TRACKER_THRESHOLD=0)
+    def test_update_without_threshold(self):
+        """tracker is updated on every click if threshold is disabled"""
+        tracker.update_tracker(MockRequest(), self.get_tracker())
+        self.assertTrue(self.get_tracker().last_click > self.last_click)
+
+    @override_settings(MISAGO_ONLINE_TRACKER_BUFFER=True)
+    def test_buffered_update(self):
+        """buffered clicks are written to database by command"""
+        tracker.update_tracker(MockRequest('127.0.0.2'), self.get_tracker())
+        self.assertEqual(self.get_tracker().current_ip, '127.0.0.1')
+
+        out = StringIO()
+        flushonlinetracker.Command().execute(stdout=out)
+
+        self.assertEqual(self.get_tracker().current_ip, '127.0.0.2')
+        self.assertEqual(
+            out.getvalue().strip(), 'Online tracker clicks flushed: 1')
@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from misago.acl import get_user_acl
+from misago.users.models import Online
+from misago.users.online import buffer
+from misago.users.online.presence import DatabasePresence
+from misago.users.online.utils import make_users_status_aware
+
+
+class PresenceTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user('Bob', 'bob@bob.com', 'pass123')
+        self.other_user = User.objects.create_user(
+            'Alice', 'alice@bob.com', 'pass123')
+
+        self.last_click = timezone.now() - timedelta(minutes=10)
+        Online.objects.update(last_click=self.last_click)
+
+        buffer.clear_click(self.user.pk)
+        buffer.clear_click(self.other_user.pk)
+
+    def test_database_presence(self):
+        """users status is read from online trackers"""
+        Online.objects.filter(user=self.user).update(
+            last_click=timezone.now())
+
+        users = [self.user, self.other_user]
+        make_users_status_aware(users, get_user_acl(self.user))
+
+        self.assertTrue(self.user.status['is_online'])
+        self.assertFalse(self.other_user.status['is_online'])
+
+    @override_settings(MISAGO_ONLINE_TRACKER_BUFFER=True)
+    def test_buffered_presence(self):
+        """users status is read from buffer and flushed to database"""
+        presence = DatabasePresence()
+
+        tracker = Online.objects.get(user=self.user)
+        presence.update(tracker, '127.0.0.2', timezone.now())
+
+        users = [self.user, self.other_user]
+        make_users_status_aware(users, get_user_acl(self.user))
+
+        self.assertTrue(self.user.status['is_online'])
+        self.assertFalse(self.other_user.status['is_online'])
+
+        tracker = Online.objects.get(user=self.user)
+        self.assertEqual(tracker.last_click, self.last_click)
+
+        self.assertEqual(presence.flush(), 1)
+
+        tracker = Online.objects.get(user=self.user)
+        self.assertTrue(tracker.last_click > self.last_click)
+        self.assertEqual(tracker.current_ip, '127.0.0.2')
+
+        user = get_user_model().objects.get(pk=self.user.pk)
+        self.assertEqual(user.last_login, tracker.last_click)
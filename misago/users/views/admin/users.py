@@ -1,17 +1,14 @@
 from django.contrib import messages
 from django.contrib.auth import get_user_model, update_session_auth_hash
-from django.db import transaction
 from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.utils.translation import ugettext_lazy as _
 
 from misago.admin.auth import start_admin_session
 from misago.admin.views import generic
-from misago.categories.models import Category
 from misago.conf import settings
 from misago.core.mail import mail_users
-from misago.core.pgutils import batch_update
-from misago.threads.models import Thread
+from misago.threads.deletion import ContentDeletion
 
 from misago.users.avatars.dynamic import set_avatar as set_dynamic_avatar
 from misago.users.forms.admin import (StaffFlagUserFormFactory, NewUserForm,
@@ -22,6 +19,9 @@ from misago.users.models.ban import BAN_USERNAME, BAN_EMAIL, BAN_IP
 from misago.users.signatures import set_user_signature
 
 
+DELETION_STEP_SIZE = 500
+
+
 class UserAdmin(generic.AdminBaseMixin):
     root_link = 'misago:admin:users:accounts:index'
     templates_dir = 'misago/admin/users'
@@ -325,60 +325,27 @@ class DeletionStep(UserAdmin, generic.ButtonView):
 
 class DeleteThreadsStep(DeletionStep):
     def execute_step(self, user):
-        recount_categories = set()
-
-        deleted_threads = 0
-        is_completed = False
-
-        for thread in user.thread_set.order_by('-id')[:50]:
-            recount_categories.add(thread.category_id)
-            with transaction.atomic():
-                thread.delete()
-                deleted_threads += 1
-
-        if recount_categories:
-            for category in Category.objects.filter(id__in=recount_categories):
-                category.synchronize()
-                category.save()
-        else:
-            is_completed = True
+        deletion = ContentDeletion()
+        deleted_threads = deletion.delete_threads(
+            user.thread_set.all(), DELETION_STEP_SIZE)
+        deletion.synchronize()
 
         return {
             'deleted_count': deleted_threads,
-            'is_completed': is_completed
+            'is_completed': not deleted_threads
         }
 
 
 class DeletePostsStep(DeletionStep):
     def execute_step(self, user):
-        recount_categories = set()
-        recount_threads = set()
-
-        deleted_posts = 0
-        is_completed = False
-
-        for post in user.post_set.order_by('-id')[:50]:
-            recount_categories.add(post.category_id)
-            recount_threads.add(post.thread_id)
-            with transaction.atomic():
-                post.delete()
-                deleted_posts += 1
-
-        if recount_categories:
-            changed_threads_qs = Thread.objects.filter(id__in=recount_threads)
-            for thread in batch_update(changed_threads_qs, 50):
-                thread.synchronize()
-                thread.save()
-
-            for category in Category.objects.filter(id__in=recount_categories):
-                category.synchronize()
-                category.save()
-        else:
-            is_completed = True
+        deletion = ContentDeletion()
+        deleted_posts = deletion.delete_posts(
+            user.post_set.all(), DELETION_STEP_SIZE)
+        deletion.synchronize()
 
         return {
             'deleted_count': deleted_posts,
-            'is_completed': is_completed
+            'is_completed': not deleted_posts
         }
 
 